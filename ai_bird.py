@@ -1,8 +1,20 @@
 import gym  # OpenAI 的 gym 庫，用於建立和訓練強化學習環境
 import numpy as np  # 用於數組運算和數據處理
 from stable_baselines3 import PPO  # 從 stable_baselines3 庫中導入 PPO 演算法
+from stable_baselines3.common.callbacks import BaseCallback, CheckpointCallback  # 訓練過程的回調（吞吐量記錄與定期檢查點）
 from stable_baselines3.common.env_util import make_vec_env  # 用於創建向量化環境
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv  # 單進程與多進程的向量化環境
+from batched_env import make_batched_env  # 用於創建批次化的向量環境
+from env_core import (BIRD_START_Y, JUMP_VELOCITY, GRAVITY, PIPE_START_X, PIPE_SPEED, PIPE_Y_LOW, PIPE_Y_HIGH,
+                      CRASH_REWARD, STEP_REWARD, bird_crashed)  # 與批次環境和演化訓練共用的物理參數與規則
+import argparse  # 用於解析命令列參數
+import glob  # 用於尋找檢查點文件
+import json  # 用於保存早停狀態
+import multiprocessing  # 用於建立背景評估進程
 import os  # 用於處理文件路徑和文件操作
+import re  # 用於從檢查點檔名取出步數
+import time  # 用於計時環境取樣與模型更新
+from concurrent.futures import ProcessPoolExecutor  # 用於在背景進程中評估
 
 # 定義 Flappy Bird 環境類別，繼承自 gym.Env
 class FlappyBirdEnv(gym.Env):
@@ -22,10 +34,10 @@ class FlappyBirdEnv(gym.Env):
 
     def reset(self):
         # 重置小鳥和管道的初始位置
-        self.bird_y = 250  # 小鳥的初始高度
+        self.bird_y = BIRD_START_Y  # 小鳥的初始高度
         self.bird_velocity = 0  # 小鳥的初始速度
-        self.pipe_x = 400  # 管道的初始橫坐標
-        self.pipe_y = self.np_random.integers(100, 300)  # 隨機設置管道的初始縱坐標
+        self.pipe_x = PIPE_START_X  # 管道的初始橫坐標
+        self.pipe_y = self.np_random.integers(PIPE_Y_LOW, PIPE_Y_HIGH)  # 隨機設置管道的初始縱坐標
         self.done = False  # 標記遊戲是否結束
         # 返回初始狀態，包含小鳥的高度、速度、管道的位置和縱坐標差
         return np.array([self.bird_y, self.bird_velocity, self.pipe_x, self.bird_y - self.pipe_y, self.pipe_y], dtype=np.float32)
@@ -33,21 +45,21 @@ class FlappyBirdEnv(gym.Env):
     def step(self, action):
         # 根據行動更新小鳥的速度和位置
         if action == 1:
-            self.bird_velocity = -8  # 如果動作為 1，讓小鳥跳躍
-        self.bird_velocity += 0.5  # 模擬重力效果
+            self.bird_velocity = JUMP_VELOCITY  # 如果動作為 1，讓小鳥跳躍
+        self.bird_velocity += GRAVITY  # 模擬重力效果
         self.bird_y += self.bird_velocity  # 更新小鳥的縱坐標
-        self.pipe_x -= 5  # 更新管道的橫坐標
+        self.pipe_x -= PIPE_SPEED  # 更新管道的橫坐標
 
         if self.pipe_x < 0:
             # 如果管道移出屏幕，重置管道位置
-            self.pipe_x = 400
-            self.pipe_y = self.np_random.integers(100, 300)  # 隨機設置新的管道縱坐標
+            self.pipe_x = PIPE_START_X
+            self.pipe_y = self.np_random.integers(PIPE_Y_LOW, PIPE_Y_HIGH)  # 隨機設置新的管道縱坐標
 
-        reward = 1  # 每一步的基礎獎勵為 1
-        if self.bird_y < 0 or self.bird_y > 600 or (self.pipe_x < 50 and abs(self.bird_y - self.pipe_y) > 50):
+        reward = STEP_REWARD  # 每一步的基礎獎勵
+        if bird_crashed(self.bird_y, self.pipe_x, self.pipe_y):
             # 如果小鳥撞到地面或飛出屏幕，或者撞到管道，遊戲結束
             self.done = True
-            reward = -100  # 獎勵設為 -100 表示懲罰
+            reward = CRASH_REWARD  # 撞擊的懲罰
 
         # 返回新的狀態、獎勵、遊戲是否結束和額外信息（此處為空字典）
         state = np.array([self.bird_y, self.bird_velocity, self.pipe_x, self.bird_y - self.pipe_y, self.pipe_y], dtype=np.float32)
@@ -56,61 +68,298 @@ class FlappyBirdEnv(gym.Env):
     def render(self, mode='human'):
         pass  # 渲染環境，此處為空實現
 
-# 評估模型性能的函數
-def evaluate_model(env, model, num_episodes=10):
-    all_rewards = []  # 儲存每次評估的總獎勵
-    for _ in range(num_episodes):
-        obs = env.reset()  # 重置環境
-        total_reward = 0  # 初始化總獎勵
-        done = False  # 標記遊戲是否結束
-        while not done:
-            action, _ = model.predict(obs, deterministic=True)  # 使用模型預測動作
-            obs, reward, done, _ = env.step(action)  # 執行動作，更新狀態和獲得獎勵
-            total_reward += reward  # 累計獎勵
-        all_rewards.append(total_reward)  # 將此次回合的總獎勵加入列表
-    mean_reward = np.mean(all_rewards)  # 計算平均獎勵
-    return mean_reward
+# 創建訓練用的向量化環境：subproc 每個環境一個子進程（預設數量為 CPU 核心數），batched 在單一進程中以 NumPy 批次模擬
+def make_training_env(n_envs=None, vec_env="subproc", seed=None):
+    n_envs = n_envs or os.cpu_count() or 1
+    if vec_env == "batched":
+        return make_batched_env(n_envs=n_envs, seed=seed)
+    vec_env_cls = SubprocVecEnv if vec_env == "subproc" else DummyVecEnv
+    return make_vec_env(FlappyBirdEnv, n_envs=n_envs, seed=seed, vec_env_cls=vec_env_cls)
+
+
+# 記錄每次迭代的環境取樣速度（步/秒）與模型更新時間
+class ThroughputCallback(BaseCallback):
+    def __init__(self, verbose=1):
+        super(ThroughputCallback, self).__init__(verbose)
+        self.iteration = 0  # 已完成的迭代次數
+        self.rollout_start = None  # 這次取樣開始的時間
+        self.rollout_end = None  # 這次取樣結束（模型開始更新）的時間
+        self.rollout_timesteps = 0  # 取樣開始時的總步數
+        self.steps_per_sec = 0.0  # 這次取樣的速度
+
+    def _report_update(self):
+        # 上一次取樣結束到現在的時間就是模型更新的時間
+        if self.rollout_end is None:
+            return
+        update_time = time.perf_counter() - self.rollout_end
+        self.logger.record("time/update_sec", update_time)
+        if self.verbose:
+            print("Iteration {}: {:.0f} env steps/sec, update {:.2f} s".format(self.iteration, self.steps_per_sec, update_time))
+        self.rollout_end = None
+
+    def _on_rollout_start(self):
+        self._report_update()
+        self.rollout_start = time.perf_counter()
+        self.rollout_timesteps = self.num_timesteps
+
+    def _on_step(self):
+        return True
+
+    def _on_rollout_end(self):
+        self.rollout_end = time.perf_counter()
+        self.iteration += 1
+        self.steps_per_sec = (self.num_timesteps - self.rollout_timesteps) / (self.rollout_end - self.rollout_start)
+        self.logger.record("time/env_steps_per_sec", self.steps_per_sec)
+
+    def _on_training_end(self):
+        self._report_update()  # 最後一次更新
+
+
+# 找出步數最大的檢查點，沒有時返回 None
+def latest_checkpoint(checkpoint_dir, name_prefix="ppo_flappybird"):
+    best_path, best_steps = None, -1
+    for path in glob.glob(os.path.join(checkpoint_dir, name_prefix + "_*_steps.zip")):
+        match = re.search(r"_(\d+)_steps\.zip$", path)
+        if match and int(match.group(1)) > best_steps:
+            best_path, best_steps = path, int(match.group(1))
+    return best_path
+
+
+EVAL_SEED = 12345  # 評估環境的固定種子，每次評估都使用相同的管道序列，結果可以互相比較
+MAX_EVAL_STEPS = 10000  # 每局評估的最大步數，避免策略學會一直存活時評估停不下來
+
+
+# 創建評估用的環境：與訓練環境分開，評估不會打斷訓練中的回合
+def make_eval_env(num_envs=10, seed=EVAL_SEED):
+    return make_batched_env(n_envs=num_envs, seed=seed)
+
+
+# 評估模型性能的函數：所有環境一起推論，每個環境完成自己分到的回合數，返回獎勵與回合長度的平均值和標準差
+# 每次評估前都以 seed 重新設定環境的亂數，重複使用同一個評估環境時每次評估仍是相同的管道序列
+def evaluate_model(env, model, num_episodes=10, max_steps=MAX_EVAL_STEPS, seed=EVAL_SEED):
+    n = env.num_envs
+    if seed is not None:
+        env.seed(seed)
+    targets = np.array([(num_episodes + i) // n for i in range(n)])  # 每個環境要完成的回合數
+    counts = np.zeros(n, dtype=np.int64)  # 每個環境已完成的回合數
+    episode_rewards = np.zeros(n)  # 進行中的回合的總獎勵
+    episode_lengths = np.zeros(n, dtype=np.int64)  # 進行中的回合的步數
+    rewards, lengths = [], []
+    obs = env.reset()  # 重置環境
+    while (counts < targets).any():
+        action, _ = model.predict(obs, deterministic=True)  # 一次預測所有環境的動作
+        obs, reward, done, _ = env.step(action)  # 執行動作，結束的環境自動重置
+        episode_rewards += reward
+        episode_lengths += 1
+        finished = (done | (episode_lengths >= max_steps)) & (counts < targets)
+        for i in np.flatnonzero(finished):
+            rewards.append(float(episode_rewards[i]))
+            lengths.append(int(episode_lengths[i]))
+            counts[i] += 1
+            if not done[i]:
+                counts[i] = targets[i]  # 達到最大步數的環境沒有自動重置，不再計入之後的回合
+        episode_rewards[done] = 0
+        episode_lengths[done] = 0
+    return {"mean_reward": float(np.mean(rewards)), "std_reward": float(np.std(rewards)),
+            "mean_length": float(np.mean(lengths)), "std_length": float(np.std(lengths)), "episodes": len(rewards)}
+
+
+# 在評估進程中執行：以策略快照（policy_arrays 的結果）建立純 NumPy 策略，不需要 torch 推論
+def evaluate_snapshot(arrays, num_episodes=10, seed=EVAL_SEED, max_steps=MAX_EVAL_STEPS):
+    from numpy_policy import NumpyPolicy
+    env = make_eval_env(min(num_episodes, 10), seed)
+    try:
+        return evaluate_model(env, NumpyPolicy(arrays=arrays), num_episodes, max_steps, seed)
+    finally:
+        env.close()
+
+
+# 背景評估器：把策略權重的快照交給另一個進程評估，model.learn 不需要等待評估完成
+class BackgroundEvaluator:
+    def __init__(self, num_episodes=10, seed=EVAL_SEED, max_steps=MAX_EVAL_STEPS):
+        self.num_episodes = num_episodes  # 每次評估的回合數
+        self.seed = seed  # 評估環境的種子
+        self.max_steps = max_steps  # 每局的最大步數
+        # 以 spawn 建立新的進程，不 fork 訓練進程的記憶體與 torch 執行緒；工作進程仍會匯入 ai_bird（因此也匯入 torch 與
+        # stable-baselines3），但評估只以 NumPy 推論
+        self.pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        self.pending = []  # (步數, 暫存的模型路徑, future)，依提交順序排列
+
+    def submit(self, model, model_path=None):
+        # 提交目前策略的快照；指定 model_path 時同時保存模型，評估結果是最佳時才保留
+        from numpy_policy import policy_arrays
+        if model_path:
+            model.save(model_path)
+        future = self.pool.submit(evaluate_snapshot, policy_arrays(model), self.num_episodes, self.seed, self.max_steps)
+        self.pending.append((model.num_timesteps, model_path, future))
+
+    def results(self, wait=False):
+        # 依提交順序返回已完成的評估 (步數, 暫存的模型路徑, 結果)；wait 為 True 時等待全部完成
+        done = []
+        while self.pending and (wait or self.pending[0][2].done()):
+            timesteps, model_path, future = self.pending.pop(0)
+            done.append((timesteps, model_path, future.result()))
+        return done
+
+    def close(self):
+        # 取消還沒開始的評估；沒有經過 results() 的快照不會成為最佳模型，刪除暫存的模型文件
+        self.pool.shutdown(cancel_futures=True)
+        for _, model_path, _ in self.pending:
+            if model_path and os.path.exists(model_path):
+                os.remove(model_path)
+        self.pending = []
+
+
+# 訓練新模型並保存的函數
+def train_model(model_path="best_ppo_flappybird.zip", total_timesteps=100000):
+    env = make_batched_env(n_envs=4)  # 創建批次化向量環境，包含 4 個環境實例
+    model = PPO("MlpPolicy", env, verbose=1)  # 使用 PPO 演算法和 MlpPolicy 訓練模型
+    model.learn(total_timesteps=total_timesteps)  # 訓練模型 100,000 個時間步
+    model.save(model_path)  # 保存訓練好的模型
+    return model
 
 # 加載或訓練新模型的函數
-def load_model():
-    model_path = "best_ppo_flappybird.zip"  # 模型保存的路徑
+def load_model(model_path="best_ppo_flappybird.zip"):
     if os.path.exists(model_path):
         model = PPO.load(model_path)  # 如果模型文件存在，則加載模型
         print("Model loaded successfully")
     else:
         print("Model not found, training new model")
-        env = make_vec_env(FlappyBirdEnv, n_envs=4)  # 創建向量化環境，包含 4 個環境實例
-        model = PPO("MlpPolicy", env, verbose=1)  # 使用 PPO 演算法和 MlpPolicy 訓練模型
-        model.learn(total_timesteps=100000)  # 訓練模型 100,000 個時間步
-        model.save(model_path)  # 保存訓練好的模型
+        model = train_model(model_path)  # 訓練並保存新模型
     return model
 
-# 主程序部分
-if __name__ == "__main__":
-    env = make_vec_env(FlappyBirdEnv, n_envs=4)  # 創建向量化環境，包含 4 個環境實例
-    model = PPO("MlpPolicy", env, verbose=1)  # 使用 PPO 演算法和 MlpPolicy 訓練模型
-    total_timesteps = 500000  # 設定總訓練步數
-    num_eval_episodes = 10  # 設定每次評估的回合數
-    eval_interval = 50000  # 設定評估間隔
-    early_stopping_patience = 3  # 設定早停耐心次數
-    no_improvement_steps = 0  # 初始化無改進步數計數
-    best_mean_reward = -np.inf  # 設定最佳平均獎勵初始值
-
-    for i in range(total_timesteps // eval_interval):
-        model.learn(total_timesteps=eval_interval)  # 訓練模型指定步數
-        mean_reward = evaluate_model(env, model, num_eval_episodes)  # 評估模型性能
-        print(f"Evaluation after {eval_interval * (i+1)} timesteps: Mean Reward = {mean_reward}")
-
-        if mean_reward > best_mean_reward:
-            best_mean_reward = mean_reward  # 更新最佳平均獎勵
-            no_improvement_steps = 0  # 重置無改進步數計數
-            print("New best model found")
-            model.save("best_ppo_flappybird")  # 保存新的最佳模型
+EARLY_STOPPING_STATE_NAME = "early_stopping.json"  # 檢查點目錄中保存最佳平均獎勵與早停計數的文件
+
+
+# 讀取保存的早停狀態，沒有時返回 None
+def load_early_stopping_state(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+# 保存早停狀態：先寫暫存文件再取代，中途中斷也不會留下損壞的文件
+def save_early_stopping_state(path, state, timesteps):
+    with open(path + ".tmp", "w") as f:
+        json.dump({"best_mean_reward": state["best_mean_reward"], "no_improvement_steps": state["no_improvement_steps"],
+                   "timesteps": timesteps}, f)
+    os.replace(path + ".tmp", path)
+
+
+# 訓練、定期評估並早停：連續 patience 次評估沒有進步就停止，返回最佳平均獎勵與每次評估的結果
+# 指定 evaluator（BackgroundEvaluator）時評估在背景進程中進行，早停依據的是已完成的評估，因此會晚一個評估間隔生效
+# 指定 state_path 時每次評估後保存最佳平均獎勵與早停計數；續跑時以 resume_state（load_early_stopping_state 的結果）接續，
+# 較差的模型不會覆蓋之前的最佳模型，早停也不會重新計數
+def train_with_early_stopping(model, eval_env, total_timesteps, eval_interval=50000, num_eval_episodes=10,
+                              early_stopping_patience=3, callbacks=None, best_model_path=None, verbose=True,
+                              evaluator=None, state_path=None, resume_state=None):
+    state = {"best_mean_reward": -np.inf, "no_improvement_steps": 0, "stopped_early": False}
+    if resume_state is not None:
+        state["best_mean_reward"] = resume_state["best_mean_reward"]
+        state["no_improvement_steps"] = resume_state["no_improvement_steps"]
+    evaluations = []  # 每次評估的步數與結果
+
+    def handle(timesteps, result, pending_path=None):
+        # 記錄一次評估的結果，更新最佳模型與早停計數；pending_path 為背景評估時暫存的模型
+        evaluations.append(dict(result, timesteps=timesteps))
+        if verbose:
+            print("Evaluation after {} timesteps: Mean Reward = {:.1f} +/- {:.1f}, Episode Length = {:.1f} +/- {:.1f}".format(
+                timesteps, result["mean_reward"], result["std_reward"], result["mean_length"], result["std_length"]))
+        if result["mean_reward"] > state["best_mean_reward"]:
+            state["best_mean_reward"] = result["mean_reward"]  # 更新最佳平均獎勵
+            state["no_improvement_steps"] = 0  # 重置無改進步數計數
+            if verbose:
+                print("New best model found")
+            if pending_path:
+                os.replace(pending_path, best_model_path)  # 暫存的模型就是新的最佳模型
+            elif best_model_path:
+                model.save(best_model_path)  # 保存新的最佳模型
         else:
-            no_improvement_steps += 1  # 增加無改進步數計數
-            if no_improvement_steps >= early_stopping_patience:
-                print("Early stopping triggered")
-                break
+            if pending_path:
+                os.remove(pending_path)
+            state["no_improvement_steps"] += 1  # 增加無改進步數計數
+            if state["no_improvement_steps"] >= early_stopping_patience and not state["stopped_early"]:
+                if verbose:
+                    print("Early stopping triggered")
+                state["stopped_early"] = True
+        if state_path:
+            save_early_stopping_state(state_path, state, timesteps)  # 續跑時接續最佳平均獎勵與早停計數
+
+    while model.num_timesteps < total_timesteps and not state["stopped_early"]:
+        steps = min(eval_interval, total_timesteps - model.num_timesteps)
+        model.learn(total_timesteps=steps, callback=callbacks, reset_num_timesteps=False)  # 訓練模型指定步數
+        if evaluator is None:
+            handle(model.num_timesteps, evaluate_model(eval_env, model, num_eval_episodes))  # 評估模型性能
+            continue
+        pending_path = None
+        if best_model_path:
+            pending_path = "{}.{}.pending.zip".format(os.path.splitext(best_model_path)[0], model.num_timesteps)
+        evaluator.submit(model, pending_path)  # 評估在背景進行，繼續訓練
+        for timesteps, path, result in evaluator.results():
+            handle(timesteps, result, path)
+    if evaluator is not None:
+        for timesteps, path, result in evaluator.results(wait=True):  # 等待剩下的評估，較晚的快照仍可能成為最佳模型
+            handle(timesteps, result, path)
+    return {"best_mean_reward": float(state["best_mean_reward"]), "evaluations": evaluations,
+            "timesteps": model.num_timesteps, "stopped_early": state["stopped_early"]}
+
+# 可設定的訓練流程：多核心向量環境、定期檢查點、從最新的檢查點續跑，並記錄吞吐量
+def train(total_timesteps=500000, n_envs=None, vec_env="subproc", seed=None, checkpoint_dir="checkpoints",
+          checkpoint_freq=50000, resume=False, eval_interval=50000, num_eval_episodes=10,
+          early_stopping_patience=3, best_model_path=None, final_model_path="ppo_flappybird.zip",
+          background_eval=False):
+    env = make_training_env(n_envs, vec_env, seed)  # 創建訓練用的向量化環境
+    eval_env = None if background_eval else make_eval_env(min(num_eval_episodes, 10))  # 評估用的固定種子環境，與訓練環境分開
+    evaluator = BackgroundEvaluator(num_eval_episodes) if background_eval else None  # 在背景進程中評估
+    best_model_path = best_model_path or os.path.join(checkpoint_dir, "best_ppo_flappybird.zip")  # 不覆蓋專案附帶的模型
+    checkpoint = latest_checkpoint(checkpoint_dir) if resume else None
+    state_path = os.path.join(checkpoint_dir, EARLY_STOPPING_STATE_NAME)  # 最佳平均獎勵與早停計數
+    resume_state = None
+    if checkpoint is not None:
+        model = PPO.load(checkpoint, env=env)  # 從檢查點續跑，保留已訓練的步數
+        print("Resuming from {} ({} timesteps)".format(checkpoint, model.num_timesteps))
+        resume_state = load_early_stopping_state(state_path)
+        if resume_state is not None:
+            print("Best mean reward so far {:.1f}, {} evaluations without improvement".format(
+                resume_state["best_mean_reward"], resume_state["no_improvement_steps"]))
+    else:
+        model = PPO("MlpPolicy", env, verbose=1, seed=seed)  # 使用 PPO 演算法和 MlpPolicy 訓練模型
+    callbacks = [
+        CheckpointCallback(save_freq=max(checkpoint_freq // env.num_envs, 1), save_path=checkpoint_dir, name_prefix="ppo_flappybird"),
+        ThroughputCallback(),
+    ]
+    try:
+        train_with_early_stopping(model, eval_env, total_timesteps, eval_interval, num_eval_episodes,
+                                  early_stopping_patience, callbacks, best_model_path, evaluator=evaluator,
+                                  state_path=state_path, resume_state=resume_state)
+    finally:
+        env.close()  # 關閉子進程
+        if evaluator is not None:
+            evaluator.close()
 
     print("Training completed")
-    model.save("ppo_flappybird")  # 保存最終訓練好的模型
+    model.save(final_model_path)  # 保存最終訓練好的模型
+    return model
+
+# 主程序部分
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the Flappy Bird PPO agent")
+    parser.add_argument("--timesteps", type=int, default=500000)  # 設定總訓練步數
+    parser.add_argument("--n-envs", type=int, default=None)  # 環境數量，預設為 CPU 核心數
+    parser.add_argument("--vec-env", choices=["subproc", "dummy", "batched"], default="subproc")  # 向量化環境的類型
+    parser.add_argument("--seed", type=int, default=None)  # 亂數種子
+    parser.add_argument("--checkpoint-dir", default="checkpoints")  # 檢查點目錄
+    parser.add_argument("--checkpoint-freq", type=int, default=50000)  # 每隔多少步保存一次檢查點
+    parser.add_argument("--resume", action="store_true")  # 從最新的檢查點繼續訓練
+    parser.add_argument("--eval-interval", type=int, default=50000)  # 設定評估間隔
+    parser.add_argument("--eval-episodes", type=int, default=10)  # 設定每次評估的回合數
+    parser.add_argument("--patience", type=int, default=3)  # 設定早停耐心次數
+    parser.add_argument("--best-out", default=None)  # 最佳模型的保存路徑（預設在檢查點目錄中）
+    parser.add_argument("--out", default="ppo_flappybird.zip")  # 最終模型的保存路徑
+    parser.add_argument("--background-eval", action="store_true")  # 在背景進程中評估，訓練不等待評估
+    args = parser.parse_args()
+
+    train(args.timesteps, args.n_envs, args.vec_env, args.seed, args.checkpoint_dir, args.checkpoint_freq,
+          args.resume, args.eval_interval, args.eval_episodes, args.patience, args.best_out, args.out,
+          args.background_eval)
@@ -0,0 +1,133 @@
+import os  # 用於檢查資源文件是否存在
+import pygame  # 用於載入圖片與音效
+from game_core import WINDOW_WIDTH, WINDOW_HEIGHT, BIRD_WIDTH, BIRD_HEIGHT  # 視窗與小鳥的尺寸
+
+VOLUME = 0.01  # 音樂與音效的音量
+
+# 圖片：名稱 -> (路徑, 縮放後的尺寸, 是否有透明通道)
+IMAGES = {
+    "bird": ("static/img/bird.png", (BIRD_WIDTH, BIRD_HEIGHT), True),
+    "background": ("static/img/background.png", (WINDOW_WIDTH, WINDOW_HEIGHT), False),
+    "background_night": ("static/img/background_night.jpg", (WINDOW_WIDTH, WINDOW_HEIGHT), False),
+    "homepage": ("static/img/homepage.png", (WINDOW_WIDTH, WINDOW_HEIGHT), False),
+    "gameover1": ("static/img/gameover1.png", (WINDOW_WIDTH, WINDOW_HEIGHT), False),
+    "gameover2": ("static/img/gameover2.png", (WINDOW_WIDTH, WINDOW_HEIGHT), False),
+    "rules": ("static/img/rules.png", (WINDOW_WIDTH, WINDOW_HEIGHT), False),
+}
+
+# 背景音樂：以 pygame.mixer.music 串流播放，不會整首解碼到記憶體中
+MUSIC = {
+    "menu": "static/sound/background_music.mp3",
+    "original": "static/sound/background_music1.mp3",
+    "shooting": "static/sound/background_music2.mp3",
+    "gameover": "static/sound/gameover.mp3",
+}
+
+# 短音效：解碼後常駐記憶體，播放時沒有延遲
+SOUNDS = {
+    "death": "static/sound/death.wav",
+    "shoot": "static/sound/shoot.wav",
+    "jump": "static/sound/jump.wav",
+    "hit": "static/sound/hit.wav",
+    "click": "static/sound/click.wav",
+}
+
+
+# 缺少音效文件或沒有音效裝置時使用的靜音音效，介面與 pygame.mixer.Sound 相同
+class SilentSound:
+    def play(self, *args, **kwargs):
+        return None
+
+    def stop(self):
+        pass
+
+    def set_volume(self, volume):
+        pass
+
+    def get_length(self):
+        return 0.0
+
+
+# 定義資源管理器：圖片與音效在第一次使用時才載入並快取，背景音樂串流播放，缺少的資源以替代品取代
+class AssetManager:
+    def __init__(self, volume=VOLUME):
+        self.volume = volume  # 音量
+        self.images = {}  # 名稱 -> 轉換過的圖片
+        self.sounds = {}  # 名稱 -> 常駐的音效
+        self.current_music = None  # 目前播放的背景音樂
+        self.muted = False  # 是否靜音
+        self.warned = set()  # 已經提示過缺少的資源
+
+    def _warn(self, path, reason):
+        if path not in self.warned:  # 每個資源只提示一次
+            self.warned.add(path)
+            print("Asset unavailable: {} ({})".format(path, reason))
+
+    def image(self, name):
+        # 第一次使用時載入、縮放並轉換成與視窗相同的像素格式（需先建立視窗）
+        surface = self.images.get(name)
+        if surface is None:
+            path, size, alpha = IMAGES[name]
+            try:
+                surface = pygame.transform.scale(pygame.image.load(path), size)
+            except (pygame.error, FileNotFoundError) as exc:
+                self._warn(path, exc)
+                surface = pygame.Surface(size, pygame.SRCALPHA if alpha else 0)  # 替代圖片：透明或黑色
+            surface = surface.convert_alpha() if alpha else surface.convert()
+            self.images[name] = surface
+        return surface
+
+    def sound(self, name):
+        # 第一次使用時載入短音效
+        sound = self.sounds.get(name)
+        if sound is None:
+            path = SOUNDS[name]
+            try:
+                if not pygame.mixer.get_init():
+                    raise pygame.error("mixer not initialized")
+                sound = pygame.mixer.Sound(path)
+                sound.set_volume(self.volume)
+            except (pygame.error, FileNotFoundError) as exc:
+                self._warn(path, exc)
+                sound = SilentSound()  # 缺少音效時靜音
+            self.sounds[name] = sound
+        return sound
+
+    def play_sound(self, name):
+        # 播放短音效，靜音時略過
+        if not self.muted:
+            self.sound(name).play()
+
+    def set_muted(self, muted):
+        # 切換靜音：音效不再播放，背景音樂音量調為 0（不中斷串流）
+        self.muted = muted
+        if pygame.mixer.get_init():
+            pygame.mixer.music.set_volume(0 if muted else self.volume)
+
+    def preload_sounds(self):
+        # 預先載入所有短音效，避免第一次播放時卡頓
+        for name in SOUNDS:
+            self.sound(name)
+
+    def play_music(self, name, loops=-1):
+        # 串流播放背景音樂；已經在播放同一首時不重新開始
+        if name == self.current_music:
+            return
+        self.stop_music()
+        path = MUSIC[name]
+        if not os.path.exists(path):
+            self._warn(path, "file not found")  # 缺少音樂時保持安靜
+            return
+        try:
+            pygame.mixer.music.load(path)
+            pygame.mixer.music.set_volume(0 if self.muted else self.volume)
+            pygame.mixer.music.play(loops)
+        except pygame.error as exc:
+            self._warn(path, exc)
+            return
+        self.current_music = name
+
+    def stop_music(self):
+        if self.current_music is not None and pygame.mixer.get_init():
+            pygame.mixer.music.stop()  # 停止背景音樂
+        self.current_music = None
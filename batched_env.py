@@ -0,0 +1,107 @@
+import gym  # OpenAI 的 gym 庫，用於定義觀察空間與行動空間
+import numpy as np  # 用於向量化的數組運算
+from stable_baselines3.common.vec_env import VecEnv, VecMonitor  # stable-baselines3 的向量化環境基底類別與統計包裝器
+from env_core import (BIRD_START_Y, PIPE_START_X, PIPE_SPEED, PIPE_Y_LOW, PIPE_Y_HIGH, CRASH_REWARD, STEP_REWARD,
+                      move_birds, bird_crashed, write_observation)  # 與 ai_bird.FlappyBirdEnv 共用的物理參數與規則
+
+
+# 定義批次化的 Flappy Bird 環境，將 N 隻小鳥與管道存放在 NumPy 數組中一次更新
+class BatchedFlappyBirdEnv(VecEnv):
+    def __init__(self, num_envs=64, seed=None):
+        # 觀察空間與行動空間與 FlappyBirdEnv 完全一致
+        observation_space = gym.spaces.Box(low=-float('inf'), high=float('inf'), shape=(5,), dtype=np.float32)
+        action_space = gym.spaces.Discrete(2)
+        super(BatchedFlappyBirdEnv, self).__init__(num_envs, observation_space, action_space)
+        self.bird_y = np.zeros(num_envs, dtype=np.float64)  # 每隻小鳥的高度
+        self.bird_velocity = np.zeros(num_envs, dtype=np.float64)  # 每隻小鳥的速度
+        self.pipe_x = np.zeros(num_envs, dtype=np.float64)  # 每個環境的管道橫坐標
+        self.pipe_y = np.zeros(num_envs, dtype=np.float64)  # 每個環境的管道縱坐標
+        self._obs = np.zeros((num_envs, 5), dtype=np.float32)  # 觀察值緩衝區，避免每步重新配置
+        self._actions = np.zeros(num_envs, dtype=np.int64)  # step_async 傳入的動作
+        self.seed(seed)  # 設置隨機數種子
+        self.reset()  # 重置所有環境
+
+    def seed(self, seed=None):
+        # 整批環境共用一個亂數產生器，給定相同種子即可重現整批的管道序列
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % (2 ** 31))
+        self.np_random = np.random.default_rng(seed)
+        # 與 DummyVecEnv 相同，回傳每個子環境對應的種子
+        return [seed + i for i in range(self.num_envs)]
+
+    def _reset_indices(self, indices):
+        # 只重置指定索引的環境
+        self.bird_y[indices] = BIRD_START_Y
+        self.bird_velocity[indices] = 0
+        self.pipe_x[indices] = PIPE_START_X
+        self.pipe_y[indices] = self.np_random.integers(PIPE_Y_LOW, PIPE_Y_HIGH, size=len(indices))
+
+    def _observe(self):
+        # 將狀態寫入觀察值緩衝區
+        return write_observation(self._obs, self.bird_y, self.bird_velocity, self.pipe_x, self.pipe_y).copy()
+
+    def reset(self):
+        # 重置全部環境並返回初始觀察值
+        self._reset_indices(np.arange(self.num_envs))
+        return self._observe()
+
+    def step_async(self, actions):
+        # 暫存動作，實際計算在 step_wait 中以向量化方式完成
+        self._actions = np.asarray(actions).reshape(self.num_envs)
+
+    def step_wait(self):
+        # 根據行動更新所有小鳥的速度和位置
+        move_birds(self.bird_y, self.bird_velocity, self._actions == 1)  # 跳躍與重力
+        self.pipe_x -= PIPE_SPEED  # 更新管道的橫坐標
+
+        respawn = np.flatnonzero(self.pipe_x < 0)  # 移出屏幕的管道
+        if respawn.size:
+            self.pipe_x[respawn] = PIPE_START_X
+            self.pipe_y[respawn] = self.np_random.integers(PIPE_Y_LOW, PIPE_Y_HIGH, size=respawn.size)
+
+        # 撞到上下邊界或管道即結束
+        dones = bird_crashed(self.bird_y, self.pipe_x, self.pipe_y)
+        rewards = np.where(dones, CRASH_REWARD, STEP_REWARD).astype(np.float32)
+        obs = self._observe()
+        infos = [{} for _ in range(self.num_envs)]
+
+        done_indices = np.flatnonzero(dones)
+        if done_indices.size:
+            # 與 DummyVecEnv 相同，在 info 中保留終止時的觀察值後自動重置
+            for i in done_indices:
+                infos[i]["terminal_observation"] = obs[i].copy()
+            self._reset_indices(done_indices)
+            obs[done_indices] = self._observe()[done_indices]
+        return obs, rewards, dones, infos
+
+    def close(self):
+        pass  # 沒有需要釋放的資源
+
+    def get_attr(self, attr_name, indices=None):
+        # 數組屬性按索引取值，其餘屬性對每個子環境回傳相同的值
+        value = getattr(self, attr_name)
+        indices = self._get_indices(indices)
+        if isinstance(value, np.ndarray) and value.shape[:1] == (self.num_envs,):
+            return [value[i] for i in indices]
+        return [value for _ in indices]
+
+    def set_attr(self, attr_name, value, indices=None):
+        # 數組屬性只寫入指定索引，其餘屬性直接覆寫
+        current = getattr(self, attr_name)
+        if isinstance(current, np.ndarray) and current.shape[:1] == (self.num_envs,):
+            current[list(self._get_indices(indices))] = value
+        else:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        # 批次環境只有一個實體，呼叫一次後對每個索引回傳相同結果
+        result = getattr(self, method_name)(*method_args, **method_kwargs)
+        return [result for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]  # 子環境沒有任何 gym 包裝器
+
+
+# 建立帶有回合統計的批次環境，用於取代 make_vec_env(FlappyBirdEnv, ...)
+def make_batched_env(n_envs=64, seed=None):
+    return VecMonitor(BatchedFlappyBirdEnv(num_envs=n_envs, seed=seed))
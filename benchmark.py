@@ -0,0 +1,378 @@
+import os  # 用於設定 SDL 的無畫面驅動程式
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # 不開啟真正的視窗
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")  # 不輸出聲音
+
+import argparse  # 用於解析命令列參數
+import functools  # 用於綁定場景的參數
+import json  # 用於讀寫基準結果
+import sys  # 用於設定結束代碼
+import time  # 用於高精度計時
+import tracemalloc  # 用於量測 Python 記憶體配置的峰值
+import numpy as np  # 用於數組運算
+from game_core import GameSimulation, WINDOW_WIDTH, WINDOW_HEIGHT, BIRD_X, BIRD_HEIGHT, PIPE_GAP, FPS  # 無畫面的遊戲模擬核心
+from profiler import FrameProfiler  # 用於計算幀時間百分位數
+
+DEFAULT_BASELINE_PATH = "benchmark_baseline.json"  # 預設的基準結果文件
+MEMORY_FRAMES = 2000  # 量測記憶體峰值時執行的幀數
+WARMUP_FRAMES = 100  # 計時之前先執行的幀數
+MAIN_LOOP_JUMP_EVERY = 15  # 主循環場景中每隔幾幀按一次空白鍵
+AI_SCENARIOS = ("original_ai", "ghost_race_100")  # 結果取決於使用哪一種 AI 策略的場景
+
+
+# 簡單的腳本控制器：瞄準下一個管道的間隙，沒有 AI 模型時用來驅動小鳥
+def heuristic_action(sim):
+    bird = sim.bird
+    pipes = sim.pipes
+    target = WINDOW_HEIGHT // 2
+    for x, top, gap in zip(pipes.x.tolist(), pipes.top.tolist(), pipes.gap.tolist()):
+        if x + 50 > bird.x - 5:  # 還沒飛過的第一個管道
+            target = top + gap * 0.9
+            break
+    return 1 if bird.y + bird.height > target and bird.velocity >= 0 else 0
+
+
+# 以觀察值矩陣批次計算的腳本策略，介面與 PPO.predict 相同，沒有 AI 模型時用於幽靈競賽
+class HeuristicPolicy:
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        obs = np.atleast_2d(observation)
+        target = obs[:, 4] + PIPE_GAP * 0.9  # 瞄準第一個管道的間隙下緣附近
+        return ((obs[:, 0] + BIRD_HEIGHT > target) & (obs[:, 1] >= 0)).astype(np.int64), state
+
+
+# 載入所有可用的 AI 策略：種類 -> 策略。"numpy" 為純 NumPy 權重（NumpyPolicy.predict），"ppo" 為 PPO 模型（model.predict）
+def load_policies():
+    policies = {}
+    try:
+        from numpy_policy import NumpyPolicy, DEFAULT_POLICY_PATH
+        if os.path.exists(DEFAULT_POLICY_PATH):
+            policies["numpy"] = NumpyPolicy(DEFAULT_POLICY_PATH)
+    except ImportError:
+        pass
+    try:
+        from ai_bird import load_model
+        if os.path.exists("best_ppo_flappybird.zip"):
+            policies["ppo"] = load_model()
+    except ImportError:
+        pass
+    return policies
+
+
+# 選出遊戲使用的 AI 策略：優先使用純 NumPy 權重，其次是 PPO 模型，都沒有時返回 None
+def preferred_policy(policies):
+    for kind in ("numpy", "ppo"):
+        if kind in policies:
+            return policies[kind], kind
+    return None, "heuristic"
+
+
+# 建立無畫面的渲染環境（dummy 驅動程式），與遊戲使用相同的渲染器
+def make_renderer():
+    import pygame
+    from renderer import Renderer, load_game_images
+    pygame.display.init()
+    pygame.font.init()
+    window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    bird_img, backgrounds = load_game_images()
+    font = pygame.font.SysFont("monospace", 35)
+    return Renderer(window, bird_img), backgrounds, font
+
+
+# 建立一個遊戲場景：返回每幀執行一次的函數（AI 決策、物理與繪圖）
+def make_game_scenario(mode, policy=None, start_score=0, shots_per_frame=0, seed=0, render=True):
+    sim = GameSimulation(mode, seed=seed)
+    renderer, backgrounds, font = make_renderer() if render else (None, None, None)
+
+    def restart():
+        sim.reset()
+        sim.score = start_score  # 直接從指定分數開始，例如 20 分以上會出現移動且夾動的管道
+        sim.jump()
+
+    restart()
+
+    def frame():
+        if sim.game_over:
+            restart()
+        if policy is not None:
+            action, _ = policy.predict(np.array(sim.observation(), dtype=np.float32), deterministic=True)
+        else:
+            action = heuristic_action(sim)
+        if action == 1:
+            sim.jump()
+        for _ in range(shots_per_frame):
+            sim.shoot()
+        sim.step()
+        if renderer is not None:
+            renderer.begin_frame(backgrounds[mode])
+            renderer.draw_bird(sim.bird)
+            renderer.draw_pipes(sim.pipes)
+            renderer.draw_enemies(sim.enemies)
+            renderer.draw_text(font, "Score: {}".format(sim.score), (255, 255, 255), topleft=(10, 10))
+            renderer.end_frame()
+
+    return frame
+
+
+# 幽靈競賽：多隻小鳥共用一次批次推論與同一張圖片，每幀推進所有小鳥
+def make_ghost_race_scenario(policy, num_birds=100, render=True):
+    from ghost_race import GhostRace, make_ghost_sprite
+    race = GhostRace([policy or HeuristicPolicy()], num_birds, seed=0)
+    renderer, backgrounds, _ = make_renderer() if render else (None, None, None)
+    sprite = make_ghost_sprite(renderer.bird_img, (255, 255, 255)) if render else None
+
+    def frame():
+        if race.finished:
+            race.reset()
+        race.step()
+        if renderer is not None:
+            renderer.begin_frame(backgrounds["original"])
+            renderer.draw_pipes(race.pipes)
+            renderer.draw_ghosts(sprite, BIRD_X, race.bird_y[race.alive])
+            renderer.end_frame()
+
+    return frame
+
+
+# 單一 FlappyBirdEnv 的 step 吞吐量
+def make_env_scenario():
+    from ai_bird import FlappyBirdEnv
+    env = FlappyBirdEnv()
+    rng = np.random.default_rng(0)
+    actions = (rng.random(4096) < 0.1).astype(np.int64).tolist()
+    state = {"i": 0}
+
+    def frame():
+        state["i"] += 1
+        _, _, done, _ = env.step(actions[state["i"] % len(actions)])
+        if done:
+            env.reset()
+
+    return frame
+
+
+# 批次環境的 step 吞吐量（每次呼叫推進 num_envs 個環境）
+def make_batched_env_scenario(num_envs=256):
+    from batched_env import BatchedFlappyBirdEnv
+    env = BatchedFlappyBirdEnv(num_envs=num_envs, seed=0)
+    rng = np.random.default_rng(0)
+    actions = (rng.random((64, num_envs)) < 0.1).astype(np.int64)
+    state = {"i": 0}
+
+    def frame():
+        state["i"] += 1
+        env.step(actions[state["i"] % len(actions)])
+
+    return frame
+
+
+# 單一觀察值的 predict 延遲
+def make_predict_scenario(policy):
+    observations = np.array([[300, 0, 200, 50, 250], [250, -8, 50, -20, 270], [400, 6, 10, 150, 250]], dtype=np.float32)
+    state = {"i": 0}
+
+    def frame():
+        state["i"] += 1
+        policy.predict(observations[state["i"] % len(observations)], deterministic=True)
+
+    return frame
+
+
+# 重播一局錄影的輸入（固定且可重現的真實玩家工作量），播完後從頭重播
+def make_replay_scenario(path):
+    from replay import load_replay, apply_inputs
+    mode, seed, frames = load_replay(path)
+    state = {"sim": GameSimulation(mode, seed=seed), "i": 0}
+
+    def frame():
+        if state["i"] == len(frames):
+            state["sim"] = GameSimulation(mode, seed=seed)
+            state["i"] = 0
+        sim = state["sim"]
+        apply_inputs(sim, frames[state["i"]])
+        sim.step()
+        state["i"] += 1
+
+    return frame
+
+
+# 執行一個場景：量測吞吐量、幀時間百分位數與記憶體峰值
+def run_scenario(make_frame, frames, steps_per_frame=1):
+    frame = make_frame()
+    for _ in range(min(WARMUP_FRAMES, frames)):  # 暖身，排除第一次配置與快取的成本
+        frame()
+    profiler = FrameProfiler(window=frames)
+    start = time.perf_counter()
+    for _ in range(frames):
+        profiler.begin_frame()
+        frame()
+        profiler.end_frame()
+    elapsed = time.perf_counter() - start
+
+    frame = make_frame()  # 以新的場景量測記憶體，避免 tracemalloc 影響計時
+    tracemalloc.start()
+    for _ in range(min(MEMORY_FRAMES, frames)):
+        frame()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return summarize(profiler, frames * steps_per_frame / elapsed, peak)
+
+
+# 整理一個場景的結果
+def summarize(profiler, steps_per_sec, peak):
+    stats = profiler.stats()
+    return {
+        "steps_per_sec": steps_per_sec,
+        "p50_ms": stats["p50_ms"],
+        "p95_ms": stats["p95_ms"],
+        "p99_ms": stats["p99_ms"],
+        "peak_kb": peak / 1024,
+    }
+
+
+# 腳本化的時鐘：代替 pygame.time.Clock 傳入 main.main()，每幀送出預定的按鍵（選擇經典模式，之後定時按空白鍵跳躍或重新開始），
+# 並以兩次 tick 之間的時間作為幀時間；暖身、計時與量測記憶體都跑完後送出 QUIT 結束主循環
+class ScriptedClock:
+    def __init__(self, frames, warmup=WARMUP_FRAMES, memory_frames=MEMORY_FRAMES, jump_every=MAIN_LOOP_JUMP_EVERY):
+        import pygame
+        self.pygame = pygame
+        self.frames = frames  # 計時的幀數
+        self.warmup = warmup  # 暖身的幀數
+        self.memory_frames = min(memory_frames, frames)  # 量測記憶體的幀數
+        self.jump_every = jump_every  # 每隔幾幀按一次空白鍵
+        self.count = 0  # 已經過的幀數
+        self.profiler = FrameProfiler(window=frames)
+        self.start = 0.0  # 開始計時的時間
+        self.elapsed = 0.0  # 計時的總時間
+        self.peak = 0  # 記憶體峰值（位元組）
+
+    def press(self, key):
+        pygame = self.pygame
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode="", scancode=0))
+
+    def tick(self, framerate=0):
+        self.count += 1
+        timed_end = self.warmup + self.frames
+        if self.warmup < self.count <= timed_end:
+            self.profiler.end_frame()
+        if self.count == self.warmup:
+            self.start = time.perf_counter()
+        elif self.count == timed_end:
+            self.elapsed = time.perf_counter() - self.start
+            tracemalloc.start()  # 計時結束後才開始追蹤記憶體，避免影響計時
+        elif self.count == timed_end + self.memory_frames:
+            _, self.peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.pygame.event.post(self.pygame.event.Event(self.pygame.QUIT))
+        if self.warmup <= self.count < timed_end:
+            self.profiler.begin_frame()
+
+        if self.count == 1:
+            self.press(self.pygame.K_1)  # 選擇經典模式
+        elif self.count % self.jump_every == 0:
+            self.press(self.pygame.K_SPACE)  # 遊戲中是跳躍，遊戲結束後是重新開始
+        return 1000.0 / FPS  # 每幀固定推進一步遊戲邏輯，結果與電腦速度無關
+
+
+# 以腳本化的輸入執行真正的遊戲主循環（事件、物理、繪圖與畫面更新），不限制幀率；
+# main.main() 結束時會關閉 pygame，因此一個進程只能執行一次，放在最後一個場景
+def run_main_loop(frames):
+    os.environ["SDL_AUDIODRIVER"] = "dummy"  # 匯入 gym 時會改成 dsp；沒有這個裝置時混音器無法初始化，主循環就少了播放音效的成本
+    import main as game
+    clock = ScriptedClock(frames)
+    try:
+        game.main(max_fps=0, clock=clock)
+    except SystemExit:  # 收到 QUIT 時主循環以 sys.exit() 結束
+        pass
+    return summarize(clock.profiler, frames / clock.elapsed, clock.peak)
+
+
+# 列出所有場景：名稱 -> 以幀數執行場景並返回結果的函數
+def build_scenarios(replay_path=None):
+    policies = load_policies()
+    policy, policy_kind = preferred_policy(policies)
+    scenarios = {
+        "original_ai": lambda: make_game_scenario("original", policy=policy),
+        "late_game_pipes": lambda: make_game_scenario("original", start_score=20),
+        "bullet_spam": lambda: make_game_scenario("shooting", shots_per_frame=5),
+        "headless_original": lambda: make_game_scenario("original", render=False),
+        "headless_bullet_spam": lambda: make_game_scenario("shooting", shots_per_frame=5, render=False),
+        "ghost_race_100": lambda: make_ghost_race_scenario(policy),
+        "env_step": make_env_scenario,
+    }
+    scenarios = {name: functools.partial(run_scenario, make_frame) for name, make_frame in scenarios.items()}
+    scenarios["batched_env_step"] = functools.partial(run_scenario, make_batched_env_scenario, steps_per_frame=256)
+    if replay_path:
+        scenarios["replay"] = functools.partial(run_scenario, lambda: make_replay_scenario(replay_path))
+    for kind, kind_policy in policies.items():  # NumpyPolicy.predict 與 PPO model.predict 分開計時
+        scenarios["predict_latency_" + kind] = functools.partial(run_scenario, functools.partial(make_predict_scenario, kind_policy))
+    scenarios["main_loop"] = run_main_loop
+    return scenarios, policy_kind
+
+
+# 與基準結果比較，返回 (退步的項目, 無法比較的項目)。names 為這次要執行的場景；
+# 基準結果為 {"policy": 策略種類, "scenarios": {名稱: 結果}}，AI 場景只和相同種類的策略比較
+def compare(results, baseline, tolerance, policy_kind, names):
+    regressions = []
+    missing = []
+    scenarios = baseline["scenarios"]
+    for name in names:
+        if name not in results:
+            if name in scenarios:
+                missing.append("{}: in the baseline but not run".format(name))
+            continue
+        result = results[name]
+        base = scenarios.get(name)
+        if base is None:
+            missing.append("{}: no baseline entry".format(name))
+            continue
+        if name in AI_SCENARIOS and baseline["policy"] != policy_kind:
+            missing.append("{}: baseline was recorded with the {} policy, this run uses {}".format(name, baseline["policy"], policy_kind))
+            continue
+        if result["steps_per_sec"] < base["steps_per_sec"] * (1 - tolerance):
+            regressions.append("{}: steps/sec {:.0f} < baseline {:.0f}".format(name, result["steps_per_sec"], base["steps_per_sec"]))
+        if result["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append("{}: p99 {:.3f} ms > baseline {:.3f} ms".format(name, result["p99_ms"], base["p99_ms"]))
+    return regressions, missing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless benchmarks for the game loop and training env")
+    parser.add_argument("--frames", type=int, default=5000)  # 每個場景執行的幀數
+    parser.add_argument("--only", nargs="*", default=None)  # 只執行指定的場景
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)  # 基準結果文件
+    parser.add_argument("--save-baseline", action="store_true")  # 將這次的結果存為基準
+    parser.add_argument("--tolerance", type=float, default=0.2)  # 容許的退步比例
+    parser.add_argument("--replay", default=None)  # 以錄影文件的輸入作為額外的場景
+    parser.add_argument("--allow-missing", action="store_true")  # 沒有基準可比較的場景只警告，不以非零代碼結束
+    args = parser.parse_args()
+
+    scenarios, policy_kind = build_scenarios(args.replay)
+    print("AI policy: {}".format(policy_kind))
+    print("{:<24}{:>14}{:>10}{:>10}{:>10}{:>12}".format("scenario", "steps/sec", "p50 ms", "p95 ms", "p99 ms", "peak KB"))
+    results = {}
+    names = [name for name in scenarios if not args.only or name in args.only]
+    for name in names:
+        run = scenarios[name]
+        try:
+            result = run(args.frames)
+        except ImportError as exc:
+            print("{:<24}skipped ({})".format(name, exc))  # 缺少 gym / stable-baselines3 等套件
+            continue
+        results[name] = result
+        print("{:<24}{:>14.0f}{:>10.3f}{:>10.3f}{:>10.3f}{:>12.1f}".format(
+            name, result["steps_per_sec"], result["p50_ms"], result["p95_ms"], result["p99_ms"], result["peak_kb"]))
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"policy": policy_kind, "scenarios": results}, f, indent=2)
+        print("Baseline saved to {}".format(args.baseline))
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions, missing = compare(results, json.load(f), args.tolerance, policy_kind, names)
+        for line in regressions:
+            print("REGRESSION " + line)
+        for line in missing:
+            print(("WARNING " if args.allow_missing else "NOT CHECKED ") + line)  # 沒有比較的場景一定要列出
+        if regressions or (missing and not args.allow_missing):
+            sys.exit(1)
+        print("No regressions against {}".format(args.baseline))
@@ -0,0 +1,61 @@
+import numpy as np  # 用於以數組儲存實體欄位
+
+
+# 定義實體池：同一類實體的每個欄位存成一個 NumPy 數組（struct-of-arrays），前 count 個元素為存活的實體
+class EntityPool:
+    # 固定屬性，避免 pool.x += 1 這類寫法默默建立新屬性（應寫成 x = pool.x; x += 1 原地修改）
+    __slots__ = ("fields", "capacity", "count", "arrays")
+
+    def __init__(self, fields, capacity=16):
+        self.fields = dict(fields)  # 欄位名稱 -> dtype
+        self.capacity = capacity  # 目前數組的容量
+        self.count = 0  # 存活的實體數量
+        self.arrays = {name: np.zeros(capacity, dtype=dtype) for name, dtype in self.fields.items()}  # 欄位數據
+
+    def __len__(self):
+        return self.count
+
+    def __getattr__(self, name):
+        # pool.x 返回存活實體的 x 欄位視圖（不複製），可以直接原地修改
+        if name == "arrays":
+            raise AttributeError(name)
+        arrays = self.arrays
+        if name not in arrays:
+            raise AttributeError(name)
+        return arrays[name][:self.count]
+
+    def _grow(self):
+        # 容量不足時加倍，攤銷後每次新增為 O(1)
+        self.capacity *= 2
+        for name, array in self.arrays.items():
+            grown = np.zeros(self.capacity, dtype=array.dtype)
+            grown[:self.count] = array[:self.count]
+            self.arrays[name] = grown
+
+    def append(self, **values):
+        # 新增一個實體，未指定的欄位為 0
+        if self.count == self.capacity:
+            self._grow()
+        index = self.count
+        for name, array in self.arrays.items():
+            array[index] = values.get(name, 0)
+        self.count += 1
+        return index
+
+    def keep(self, mask):
+        # 只保留 mask 為 True 的實體，並保持原本的順序（向量化的批次移除）
+        kept = int(np.count_nonzero(mask))
+        if kept == self.count:
+            return
+        for array in self.arrays.values():
+            array[:kept] = array[:self.count][mask]
+        self.count = kept
+
+    def pop_front(self):
+        # 移除最早加入的實體（管道與星星依生成順序排列）
+        mask = np.ones(self.count, dtype=bool)
+        mask[0] = False
+        self.keep(mask)
+
+    def clear(self):
+        self.count = 0  # 不釋放數組，之後直接重用
@@ -0,0 +1,37 @@
+import numpy as np  # 用於數組運算
+
+# 訓練環境的物理參數與規則：ai_bird.FlappyBirdEnv、batched_env 與 neuroevolution 共用，只依賴 NumPy
+BIRD_START_Y = 250  # 小鳥的初始高度
+JUMP_VELOCITY = -8  # 跳躍時的速度
+GRAVITY = 0.5  # 重力加速度
+PIPE_START_X = 400  # 管道的初始橫坐標
+PIPE_SPEED = 5  # 管道每步移動的距離
+PIPE_Y_LOW = 100  # 管道縱坐標的隨機下限（含）
+PIPE_Y_HIGH = 300  # 管道縱坐標的隨機上限（不含）
+SCREEN_HEIGHT = 600  # 畫面高度，超出即死亡
+PIPE_HIT_X = 50  # 管道橫坐標小於此值時進行碰撞判定
+GAP_HALF = 50  # 小鳥與管道縱坐標差的容許範圍
+CRASH_REWARD = -100.0  # 撞擊時的懲罰
+STEP_REWARD = 1.0  # 每一步的基礎獎勵
+
+
+# 以數組就地更新小鳥的速度與高度：選擇跳躍的小鳥速度設為跳躍速度，之後所有小鳥受重力影響
+def move_birds(bird_y, bird_velocity, jump):
+    bird_velocity[jump] = JUMP_VELOCITY
+    bird_velocity += GRAVITY
+    bird_y += bird_velocity
+
+
+# 小鳥是否撞到上下邊界或管道；可以是單一數值，也可以是互相廣播的數組
+def bird_crashed(bird_y, pipe_x, pipe_y):
+    return (bird_y < 0) | (bird_y > SCREEN_HEIGHT) | ((pipe_x < PIPE_HIT_X) & (np.abs(bird_y - pipe_y) > GAP_HALF))
+
+
+# 將狀態寫入觀察值數組的最後一維：高度、速度、管道位置、縱坐標差、管道縱坐標
+def write_observation(obs, bird_y, bird_velocity, pipe_x, pipe_y):
+    obs[..., 0] = bird_y
+    obs[..., 1] = bird_velocity
+    obs[..., 2] = pipe_x
+    obs[..., 3] = bird_y - pipe_y
+    obs[..., 4] = pipe_y
+    return obs
@@ -0,0 +1,276 @@
+import random  # 用於生成隨機數（決定障礙物的位置）
+import numpy as np  # 用於向量化的移動與碰撞計算
+from entity_pool import EntityPool  # 以數組儲存子彈、星星與管道
+
+# 遊戲世界的尺寸（與 main.py 的視窗大小一致）
+WINDOW_WIDTH = 400
+WINDOW_HEIGHT = 600
+
+FLOOR_HEIGHT_MODE_1 = 50  # 模式1的地板高度
+FLOOR_HEIGHT_MODE_2 = 80  # 模式2的地板高度
+
+BIRD_X = 50  # 小鳥的橫坐標（固定不動）
+BIRD_START_Y = WINDOW_HEIGHT // 2  # 小鳥的初始縱坐標，在窗口高度的一半
+BIRD_WIDTH = 50  # 小鳥的寬度（與縮放後的小鳥圖片相同）
+BIRD_HEIGHT = 38  # 小鳥的高度
+BIRD_GRAVITY = 0.5  # 重力
+BIRD_JUMP_STRENGTH = -8  # 跳躍力度
+
+FPS = 60  # 模擬的幀率，每次 step 代表 1/60 秒
+STAR_HIT_FRAMES = 6  # 星星被擊中後保留的幀數（約 100 毫秒）
+
+BULLET_SPEED = 10  # 子彈速度
+BULLET_WIDTH = 10  # 子彈寬度
+BULLET_HEIGHT = 5  # 子彈高度
+
+STAR_SPEED = 5  # 星星速度
+STAR_WIDTH = 50  # 星星寬度
+STAR_HEIGHT = 50  # 星星高度
+
+PIPE_GAP = 200  # 上下管道之間的初始間隙
+PIPE_SPEED = 5  # 管道移動速度
+PIPE_WIDTH = 50  # 管道寬度
+PIPE_MOVE_SPEED = 2  # 管道上下移動的速度
+PIPE_CLAMP_SPEED = 1  # 管道夾動的速度
+PIPE_SPAWN_DISTANCE = 200  # 最新的管道離開右邊緣這麼遠時生成下一個管道
+PIPE_MARGIN = 50  # 上下管道至少保留的高度
+PIPE_MIN_GAP = 150  # 夾動時的最小間隙
+MOVING_PIPE_SCORE = 10  # 分數達到這個值之後生成的管道會上下移動
+CLAMPING_PIPE_SCORE = 20  # 分數達到這個值之後生成的管道會夾動
+
+# 實體池的欄位
+BULLET_FIELDS = (("x", np.float64), ("y", np.float64))
+STAR_FIELDS = (("x", np.float64), ("y", np.float64), ("hit", np.bool_), ("hit_frame", np.int64))
+PIPE_FIELDS = (("x", np.float64), ("top", np.float64), ("bottom", np.float64), ("gap", np.float64),
+               ("is_moving", np.bool_), ("is_clamping", np.bool_), ("direction", np.float64))
+
+
+# 定義小鳥類別（純邏輯，不涉及繪圖與音效）
+class Bird:
+    def __init__(self):
+        self.x = BIRD_X  # 小鳥的初始橫坐標
+        self.y = BIRD_START_Y  # 小鳥的初始縱坐標，在窗口高度的一半
+        self.velocity = 0  # 初始速度
+        self.gravity = BIRD_GRAVITY  # 重力
+        self.jump_strength = BIRD_JUMP_STRENGTH  # 跳躍力度
+        self.width = BIRD_WIDTH  # 小鳥的寬度
+        self.height = BIRD_HEIGHT  # 小鳥的高度
+        self.bullets = EntityPool(BULLET_FIELDS, capacity=64)  # 子彈池，儲存小鳥發射的所有子彈
+
+    def jump(self):
+        self.velocity = self.jump_strength  # 設置跳躍速度
+
+    def move(self):
+        self.velocity += self.gravity  # 速度增加，模擬重力效果
+        self.y += self.velocity  # 更新小鳥的縱坐標
+
+    def shoot(self):
+        self.bullets.append(x=self.x + self.width, y=self.y + self.height // 2)  # 添加一顆新子彈到子彈池
+
+    def update_bullets(self):
+        bullets = self.bullets
+        if bullets.count:
+            x = bullets.x
+            x += BULLET_SPEED  # 移動所有子彈（原地修改數組）
+            if x[0] > WINDOW_WIDTH:  # 最早射出的子彈排在最前面，也最先移出窗口
+                bullets.keep(x <= WINDOW_WIDTH)  # 移除移出窗口的子彈
+
+
+# 以下是經典模式的規則，GameSimulation、ghost_race.GhostRace 與 server.SessionBatch 共用；
+# 數組參數可以是任意形狀（例如 server 的 對局 x 管道 矩陣），規則只在這裡定義一次
+
+# 新管道的各個欄位（與 PIPE_FIELDS 相同）
+def new_pipe(score, rng):
+    top = rng.randint(PIPE_MARGIN, WINDOW_HEIGHT - PIPE_GAP - FLOOR_HEIGHT_MODE_1 - PIPE_MARGIN)  # 上管道的高度
+    return {"x": WINDOW_WIDTH, "top": top, "bottom": WINDOW_HEIGHT - PIPE_GAP - top - FLOOR_HEIGHT_MODE_1,
+            "gap": PIPE_GAP, "is_moving": score >= MOVING_PIPE_SCORE,  # 當分數達到10時，管道開始移動
+            "is_clamping": score >= CLAMPING_PIPE_SCORE, "direction": 1}  # 當分數達到20時，管道開始夾動
+
+
+# 是否該生成新管道：newest_x 為最新管道的橫坐標
+def needs_pipe(newest_x):
+    return newest_x < WINDOW_WIDTH - PIPE_SPAWN_DISTANCE
+
+
+# 新增一個管道到管道池
+def spawn_pipe(pipes, score, rng):
+    pipes.append(**new_pipe(score, rng))
+
+
+# 上下移動與夾動管道：moving / clamping 為要移動與夾動的管道的遮罩，所有數組原地修改
+def shift_pipes(top, bottom, gap, direction, moving, clamping):
+    top[moving] += PIPE_MOVE_SPEED * direction[moving]  # 更新上管道的高度
+    bottom[moving] = WINDOW_HEIGHT - gap[moving] - top[moving] - FLOOR_HEIGHT_MODE_1  # 更新下管道的高度
+    out_of_range = moving & ((top < PIPE_MARGIN) | (top > WINDOW_HEIGHT - gap - FLOOR_HEIGHT_MODE_1 - PIPE_MARGIN))
+    direction[out_of_range] *= -1  # 超出範圍時反向移動
+    if clamping.any():  # 有會夾動的管道
+        gap[clamping] -= PIPE_CLAMP_SPEED * direction[clamping]  # 更新管道間隙
+        out_of_range = clamping & ((gap < PIPE_MIN_GAP) | (gap > PIPE_GAP))
+        direction[out_of_range] *= -1  # 間隙超出範圍時反向夾動
+
+
+# 以向量化方式移動所有管道（包括上下移動與夾動）
+def move_pipes(pipes):
+    x = pipes.x
+    x -= PIPE_SPEED  # 更新管道的橫坐標
+    # 分數只會增加，會移動／夾動的管道一定排在最後面，只需檢查最後一個管道
+    if pipes.is_moving[-1]:  # 有會移動的管道
+        shift_pipes(pipes.top, pipes.bottom, pipes.gap, pipes.direction, pipes.is_moving, pipes.is_clamping)
+
+
+# 橫向與小鳥重疊的管道
+def pipe_overlaps_bird(x):
+    return (x < BIRD_X + BIRD_WIDTH) & (x > BIRD_X - PIPE_WIDTH)
+
+
+# 小鳥與管道的 AABB 碰撞：y 可以是一個高度或與管道數組可廣播的高度數組
+def pipe_hits_bird(x, top, bottom, y, floor_height=FLOOR_HEIGHT_MODE_1):
+    return pipe_overlaps_bird(x) & ((top > y) | (bottom > WINDOW_HEIGHT - floor_height - y - BIRD_HEIGHT))
+
+
+# 小鳥是否撞到地面
+def bird_hits_floor(y, floor_height=FLOOR_HEIGHT_MODE_1):
+    return y + BIRD_HEIGHT >= WINDOW_HEIGHT - floor_height
+
+
+# 最前面的管道是否已經移出窗口（移除並加分）
+def pipe_passed(front_x):
+    return front_x < -PIPE_WIDTH
+
+
+# 定義無畫面的遊戲模擬器，涵蓋經典模式與射擊模式
+class GameSimulation:
+    def __init__(self, mode, seed=None):
+        self.mode = mode  # 遊戲模式："original" 或 "shooting"
+        self.floor_height = FLOOR_HEIGHT_MODE_1 if mode == "original" else FLOOR_HEIGHT_MODE_2  # 地板高度
+        self.rng = random.Random()  # 獨立的隨機數產生器，給定種子即可重現
+        self.reset(seed if seed is not None else random.randrange(2 ** 32))
+
+    def reset(self, seed=None):
+        # 每一局都有自己的種子；未指定時由目前的亂數產生，整串對局仍可由最初的種子重現
+        if seed is None:
+            seed = self.rng.randrange(2 ** 32)
+        self.seed = seed  # 這一局的種子（錄影時保存）
+        self.rng.seed(seed)
+        self.bird = Bird()  # 創建小鳥實例
+        self.pipes = EntityPool(PIPE_FIELDS, capacity=8)  # 管道池
+        self.enemies = EntityPool(STAR_FIELDS, capacity=8)  # 星星池
+        self.score = 0  # 分數
+        self.frame = 0  # 幀數計數器，取代 pygame.time.get_ticks
+        self.game_over = False  # 遊戲是否結束
+        self.game_started = False  # 遊戲是否開始
+
+    def jump(self):
+        # 第一次跳躍會開始遊戲
+        if self.game_over:
+            return False
+        self.game_started = True
+        self.bird.jump()
+        return True
+
+    def shoot(self):
+        # 只有射擊模式可以射擊
+        if self.game_over or self.mode != "shooting":
+            return False
+        self.bird.shoot()
+        return True
+
+    def observation(self):
+        # 與 AI 訓練環境相同的 5 維狀態：高度、速度、管道位置、縱坐標差、管道高度
+        bird = self.bird
+        if self.pipes.count:
+            pipe_x = float(self.pipes.x[0])
+            pipe_top = float(self.pipes.top[0])
+            return [bird.y, bird.velocity, pipe_x, bird.y - pipe_top, pipe_top]
+        return [bird.y, bird.velocity, 0, 0, 0]
+
+    def step(self):
+        # 推進一幀，返回此幀發生的事件（"hit" 擊中星星、"death" 死亡），供前端播放音效
+        events = []
+        if self.game_over:
+            return events
+        self.frame += 1
+        bird = self.bird
+        pipes = self.pipes
+        enemies = self.enemies
+
+        if self.game_started:
+            bird.move()  # 更新小鳥位置
+            if self.mode == "original":
+                if pipes.count == 0 or needs_pipe(pipes.x[-1]):
+                    spawn_pipe(pipes, self.score, self.rng)  # 添加新管道
+            elif self.mode == "shooting":
+                if enemies.count == 0 or enemies.x[-1] < WINDOW_WIDTH - 200:
+                    enemies.append(x=WINDOW_WIDTH, y=self.rng.randint(50, WINDOW_HEIGHT - self.floor_height - 100))  # 添加星星
+
+        bird.update_bullets()  # 移動子彈
+
+        if not self.game_started:
+            return events
+
+        dead = False
+        if self.mode == "original":
+            if pipes.count:
+                move_pipes(pipes)  # 移動管道
+
+                # 小鳥與所有管道的 AABB 碰撞檢測
+                if pipe_overlaps_bird(pipes.x).any():  # 粗篩：只有橫向重疊時才檢查上下管道
+                    if pipe_hits_bird(pipes.x, pipes.top, pipes.bottom, bird.y, self.floor_height).any():
+                        dead = True  # 撞到管道
+
+            if bird_hits_floor(bird.y, self.floor_height):
+                dead = True  # 撞到地面
+
+            if pipes.count and pipe_passed(pipes.x[0]):
+                pipes.pop_front()  # 移除已經移出窗口的管道
+                self.score += 1  # 增加分數
+        elif self.mode == "shooting":
+            if enemies.count:
+                x = enemies.x
+                x -= STAR_SPEED  # 移動星星
+                hit = enemies.hit
+                if hit.any():
+                    enemies.keep(~(hit & (self.frame - enemies.hit_frame > STAR_HIT_FRAMES)))  # 移除被擊中夠久的星星
+
+            if enemies.count:
+                ex, ey = enemies.x, enemies.y
+                # 小鳥與所有星星的 AABB 碰撞檢測
+                hit_bird = (bird.x + bird.width > ex) & (bird.x < ex + STAR_WIDTH) & (bird.y < ey + STAR_HEIGHT) & (bird.y + bird.height > ey)
+                if hit_bird.any():
+                    dead = True  # 撞到星星
+
+                bullets = bird.bullets
+                if bullets.count:
+                    # 粗篩：子彈都從同一位置射出並以相同速度前進，池中的橫坐標由大到小排列；
+                    # 星星同理由小到大排列，因此可用二分搜尋找出橫向落在星星範圍內的連續子彈區段
+                    neg_bx = -bullets.x
+                    start = np.searchsorted(neg_bx, -(ex[-1] + STAR_WIDTH), side="right")
+                    end = np.searchsorted(neg_bx, -(ex[0] - BULLET_WIDTH), side="left")
+                    if start < end:
+                        cx = bullets.x[start:end, None]
+                        cy = bullets.y[start:end, None]
+                        # 子彈 x 星星的重疊矩陣
+                        overlap = (cx + BULLET_WIDTH > ex) & (cx < ex + STAR_WIDTH) & (cy < ey + STAR_HEIGHT) & (cy + BULLET_HEIGHT > ey)
+                        hit_rows = overlap.any(axis=1)
+                        if hit_rows.any():
+                            # 每顆子彈只會擊中順序最前面的星星
+                            targets = overlap[hit_rows].argmax(axis=1)
+                            enemies.hit[targets] = True  # 標記星星被擊中
+                            enemies.hit_frame[targets] = self.frame  # 記錄擊中的幀數
+                            hits = len(targets)
+                            self.score += hits  # 每顆命中的子彈增加 1 分
+                            events.extend(["hit"] * hits)
+                            keep = np.ones(bullets.count, dtype=bool)
+                            keep[start:end] = ~hit_rows
+                            bullets.keep(keep)  # 移除擊中星星的子彈
+
+            if bird.y + bird.height >= WINDOW_HEIGHT - self.floor_height:
+                dead = True  # 撞到地面
+
+            if enemies.count and enemies.x[0] < -STAR_WIDTH:
+                enemies.pop_front()  # 移除已經移出窗口的星星
+
+        if dead:
+            self.game_over = True  # 遊戲結束
+            events.append("death")
+        return events
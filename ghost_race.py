@@ -0,0 +1,196 @@
+import argparse  # 用於解析命令列參數
+import os  # 用於取得策略文件名稱
+import random  # 用於生成隨機數（決定障礙物的位置）
+import numpy as np  # 用於向量化的小鳥狀態與批次推論
+from entity_pool import EntityPool  # 以數組儲存管道
+from game_core import (WINDOW_WIDTH, WINDOW_HEIGHT, BIRD_X, BIRD_START_Y, BIRD_GRAVITY, BIRD_JUMP_STRENGTH, PIPE_FIELDS,
+                       needs_pipe, spawn_pipe, move_pipes, pipe_overlaps_bird, pipe_hits_bird, bird_hits_floor, pipe_passed)
+
+START_SPREAD = 60  # 小鳥初始高度的隨機範圍（上下各 60 像素），讓相同策略的小鳥飛出不同的路線
+GHOST_ALPHA = 160  # 幽靈小鳥的透明度
+GHOST_COLORS = [(255, 255, 255), (120, 200, 255), (255, 140, 140), (160, 255, 160), (255, 220, 120), (220, 160, 255)]  # 每個策略的顏色
+
+
+# 讀取策略：.table.npz 為查表策略，.npz 使用純 NumPy 推論，其他文件視為 PPO 模型
+def load_policy(path):
+    from policy_table import TABLE_SUFFIX
+    if path.endswith(TABLE_SUFFIX):
+        from policy_table import PolicyTable
+        return PolicyTable(path)
+    if path.endswith(".npz"):
+        from numpy_policy import NumpyPolicy
+        return NumpyPolicy(path)
+    from ai_bird import load_model
+    return load_model(path)
+
+
+# 定義幽靈競賽：N 隻 AI 小鳥在同一條經典模式的管道路線上比賽，狀態存成數組，每幀對每個策略只呼叫一次 predict
+class GhostRace:
+    def __init__(self, policies, birds_per_policy=10, seed=None, spread=START_SPREAD):
+        self.policies = list(policies)  # 參賽的策略
+        self.birds_per_policy = birds_per_policy  # 每個策略的小鳥數量
+        self.num_birds = len(self.policies) * birds_per_policy  # 小鳥總數
+        self.group = np.repeat(np.arange(len(self.policies)), birds_per_policy)  # 每隻小鳥所屬的策略
+        self.spread = spread  # 初始高度的隨機範圍
+        self.obs = np.zeros((self.num_birds, 5), dtype=np.float32)  # 觀察值矩陣，每幀重用
+        self.rng = random.Random()  # 管道路線的隨機數產生器
+        self.reset(seed if seed is not None else random.randrange(2 ** 32))
+
+    def reset(self, seed=None):
+        # 開始新的一局；未指定種子時由目前的亂數產生
+        if seed is None:
+            seed = self.rng.randrange(2 ** 32)
+        self.seed = seed  # 這一局的種子
+        self.rng.seed(seed)
+        offsets = np.random.default_rng(seed).uniform(-self.spread, self.spread, self.num_birds)
+        self.bird_y = BIRD_START_Y + offsets  # 每隻小鳥的高度
+        self.bird_velocity = np.zeros(self.num_birds)  # 每隻小鳥的速度
+        self.alive = np.ones(self.num_birds, dtype=bool)  # 還活著的小鳥
+        self.death_scores = np.zeros(self.num_birds, dtype=np.int64)  # 死亡時的分數
+        self.pipes = EntityPool(PIPE_FIELDS, capacity=8)  # 所有小鳥共用的管道
+        self.score = 0  # 目前通過的管道數
+        self.frame = 0  # 幀數計數器
+
+    @property
+    def finished(self):
+        return not self.alive.any()  # 所有小鳥都死亡
+
+    def bird_scores(self):
+        # 每隻小鳥的分數：還活著的小鳥為目前的分數
+        return np.where(self.alive, self.score, self.death_scores)
+
+    def observations(self):
+        # 與 GameSimulation.observation 相同的 5 維狀態，一次建立所有小鳥的觀察值矩陣
+        obs = self.obs
+        obs[:, 0] = self.bird_y
+        obs[:, 1] = self.bird_velocity
+        if self.pipes.count:
+            pipe_x = self.pipes.x[0]
+            pipe_top = self.pipes.top[0]
+            obs[:, 2] = pipe_x
+            obs[:, 3] = self.bird_y - pipe_top
+            obs[:, 4] = pipe_top
+        else:
+            obs[:, 2:] = 0
+        return obs
+
+    def act(self):
+        # 每個策略對自己的整批小鳥只做一次推論
+        obs = self.observations()
+        jump = np.zeros(self.num_birds, dtype=bool)
+        size = self.birds_per_policy
+        for i, policy in enumerate(self.policies):
+            actions, _ = policy.predict(obs[i * size:(i + 1) * size], deterministic=True)
+            jump[i * size:(i + 1) * size] = np.asarray(actions).reshape(-1) == 1
+        return jump
+
+    def step(self, jump=None):
+        # 推進一幀；jump 為每隻小鳥是否跳躍，未指定時由策略決定
+        if self.finished:
+            return
+        if jump is None:
+            jump = self.act()
+        self.frame += 1
+        alive = self.alive
+        pipes = self.pipes
+
+        velocity = self.bird_velocity
+        velocity[jump & alive] = BIRD_JUMP_STRENGTH  # 讓選擇跳躍的小鳥跳躍
+        velocity[alive] += BIRD_GRAVITY  # 模擬重力效果
+        self.bird_y[alive] += velocity[alive]  # 更新小鳥的縱坐標（死亡的小鳥停在原處）
+
+        if pipes.count == 0 or needs_pipe(pipes.x[-1]):
+            spawn_pipe(pipes, self.score, self.rng)  # 添加新管道
+        move_pipes(pipes)  # 移動管道
+
+        y = self.bird_y
+        dead = bird_hits_floor(y)  # 撞到地面
+        overlap_x = pipe_overlaps_bird(pipes.x)
+        if overlap_x.any():  # 只檢查橫向與小鳥重疊的管道
+            # 小鳥 x 管道的碰撞矩陣
+            hit = pipe_hits_bird(pipes.x[overlap_x], pipes.top[overlap_x], pipes.bottom[overlap_x], y[:, None])
+            dead |= hit.any(axis=1)
+        dead &= alive
+        self.death_scores[dead] = self.score
+        alive &= ~dead
+
+        if pipe_passed(pipes.x[0]):
+            pipes.pop_front()  # 移除已經移出窗口的管道
+            self.score += 1  # 增加分數
+
+
+# 將小鳥圖片染色並調成半透明，同一個策略的所有小鳥共用這一張圖片
+def make_ghost_sprite(bird_img, color):
+    import pygame
+    sprite = bird_img.copy()
+    sprite.fill(color + (GHOST_ALPHA,), special_flags=pygame.BLEND_RGBA_MULT)
+    return sprite
+
+
+# 以遊戲畫面進行幽靈競賽，每一局結束後顯示各策略的成績並開始下一局
+def play(policies, names, birds_per_policy=10, seed=None, fps=60, rounds=0, dirty_rects=False):
+    import pygame
+    from assets import AssetManager
+    from renderer import Renderer, WHITE
+
+    pygame.init()
+    window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption('Flappy Bird - Ghost Race')
+    assets = AssetManager()
+    bird_img = assets.image("bird")
+    background = assets.image("background")
+    renderer = Renderer(window, bird_img, dirty_rects)
+    sprites = [make_ghost_sprite(bird_img, GHOST_COLORS[i % len(GHOST_COLORS)]) for i in range(len(policies))]
+    font = pygame.font.SysFont("monospace", 35)
+    small_font = pygame.font.Font(None, 24)
+    clock = pygame.time.Clock()
+    race = GhostRace(policies, birds_per_policy, seed)
+    played = 0
+
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                pygame.quit()
+                return
+        race.step()
+        if race.finished:
+            played += 1
+            scores = race.bird_scores()
+            for i, name in enumerate(names):
+                group = scores[race.group == i]
+                print("Round {} (seed {}): {:<30} mean {:.1f}, max {}".format(played, race.seed, name, group.mean(), group.max()))
+            if rounds and played >= rounds:
+                pygame.quit()
+                return
+            race.reset()
+
+        renderer.begin_frame(background)
+        renderer.draw_pipes(race.pipes)
+        for i, sprite in enumerate(sprites):
+            renderer.draw_ghosts(sprite, BIRD_X, race.bird_y[(race.group == i) & race.alive])  # 同一個策略的小鳥一次繪製
+        renderer.draw_text(font, "Score: {}".format(race.score), WHITE, topleft=(10, 10))
+        for i, name in enumerate(names):
+            alive = int(np.count_nonzero(race.alive[race.group == i]))
+            renderer.draw_text(small_font, "{}: {}/{}".format(name, alive, birds_per_policy),
+                               GHOST_COLORS[i % len(GHOST_COLORS)], topleft=(10, 50 + 20 * i))
+        renderer.draw_text(small_font, "FPS: {:.0f}".format(clock.get_fps()), WHITE, topleft=(WINDOW_WIDTH - 80, 10))
+        renderer.end_frame()
+        clock.tick(fps)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Race many AI ghost birds on the same pipe course")
+    parser.add_argument("--policy", action="append", default=None)  # 參賽的策略（.npz 或 PPO .zip），可以指定多個
+    parser.add_argument("--birds", type=int, default=20)  # 每個策略的小鳥數量
+    parser.add_argument("--seed", type=int, default=None)  # 第一局的種子
+    parser.add_argument("--fps", type=int, default=60)  # 幀率，0 表示不限速
+    parser.add_argument("--rounds", type=int, default=0)  # 比賽局數，0 表示一直進行
+    parser.add_argument("--dirty-rects", action="store_true")  # 只更新變動區域
+    args = parser.parse_args()
+
+    paths = args.policy
+    if not paths:
+        from model_loader import DEFAULT_MODEL_PATH, DEFAULT_POLICY_PATH
+        paths = [DEFAULT_POLICY_PATH if os.path.exists(DEFAULT_POLICY_PATH) else DEFAULT_MODEL_PATH]
+    play([load_policy(path) for path in paths], [os.path.basename(path) for path in paths],
+         args.birds, args.seed, args.fps, args.rounds, args.dirty_rects)
@@ -1,273 +1,164 @@
 import pygame # 用於建立遊戲視窗和處理遊戲中的圖形與音效
-import random # 用於生成隨機數（決定障礙物的位置）
 import sys  # 用於退出程式
-import math # 用於數學運算（畫模式2中星星的頂點座標）
+import argparse # 用於解析命令列參數
 import numpy as np # 用於數組運算、數據處理
 import ctypes # 用於設置鍵盤輸入為英文
-from ai_bird import FlappyBirdEnv, load_model # 導入 AI 模型相關函數
+import time # 用於快轉模式的計時
+from renderer import Renderer, WHITE, RED, YELLOW # 導入渲染器與顏色
+from assets import AssetManager # 導入資源管理器
+from replay import start_recording, save_recording # 導入輸入錄製
+from trajectory import TrajectoryWriter, STEP_REWARD, CRASH_REWARD # 導入軌跡記錄器
+from profiler import FrameProfiler # 導入每幀效能分析器
+from model_loader import BackgroundModelLoader, STATUS_LOADING, STATUS_TRAINING # 導入背景模型載入器
+from game_core import GameSimulation, WINDOW_WIDTH, WINDOW_HEIGHT, FPS, BULLET_SPEED, STAR_SPEED, PIPE_SPEED # 導入無畫面的遊戲模擬核心
 
 
 # 初始化 Pygame
 pygame.init()
 
-# 設置遊戲視窗大小
-WINDOW_WIDTH = 400
-WINDOW_HEIGHT = 600
+# 設置遊戲視窗
 WINDOW = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
 
 pygame.display.set_caption('Flappy Bird')  # 設置遊戲視窗標題
 
-FLOOR_HEIGHT_MODE_1 = 50  # 模式1的地板高度
-FLOOR_HEIGHT_MODE_2 = 80  # 模式2的地板高度
+TICK_SECONDS = 1.0 / FPS  # 遊戲邏輯每一步代表的時間，與畫面幀率無關
+MAX_FRAME_TIME = 0.25  # 每幀最多補上的時間（秒）
+MAX_TICKS_PER_FRAME = 5  # 每幀最多推進的步數，避免慢速電腦越追越落後
+TURBO_SCORE_ONLY_INTERVAL = 0.1  # 快轉且只顯示分數時，每隔多久（秒）更新一次畫面
 
-# 定義顏色
-WHITE = (255, 255, 255)
-GREEN = (0, 128, 0)
-RED = (255, 0, 0)
-LIGHT_GREEN = (0, 255, 0)
-YELLOW = (255, 255, 0)
-
-# 載入圖片並調整大小
-bird_img = pygame.transform.scale(pygame.image.load('static/img/bird.png'), (50, 38))
-background_img = pygame.transform.scale(pygame.image.load('static/img/background.png'), (WINDOW_WIDTH, WINDOW_HEIGHT))
-background_night_img = pygame.transform.scale(pygame.image.load('static/img/background_night.jpg'), (WINDOW_WIDTH, WINDOW_HEIGHT))
-homepage_img = pygame.transform.scale(pygame.image.load('static/img/homepage.png'), (WINDOW_WIDTH, WINDOW_HEIGHT)) 
-gameover1_img = pygame.transform.scale(pygame.image.load('static/img/gameover1.png'), (WINDOW_WIDTH, WINDOW_HEIGHT)) 
-gameover2_img = pygame.transform.scale(pygame.image.load('static/img/gameover2.png'), (WINDOW_WIDTH, WINDOW_HEIGHT))
-rules_img = pygame.transform.scale(pygame.image.load('static/img/rules.png'), (WINDOW_WIDTH, WINDOW_HEIGHT))  
-
-# 載入音效
-menu_music = pygame.mixer.Sound('static/sound/background_music.mp3')
-game1_music = pygame.mixer.Sound('static/sound/background_music1.mp3')
-game2_music = pygame.mixer.Sound('static/sound/background_music2.mp3')
-death_sound = pygame.mixer.Sound('static/sound/death.wav')
-shoot_sound = pygame.mixer.Sound('static/sound/shoot.wav')
-jump_sound = pygame.mixer.Sound('static/sound/jump.wav')
-hit_sound = pygame.mixer.Sound('static/sound/hit.wav')
-gameover_sound = pygame.mixer.Sound('static/sound/gameover.mp3')
-click_sound = pygame.mixer.Sound('static/sound/click.wav')
-sounds = [menu_music, game1_music, game2_music, death_sound, shoot_sound, jump_sound, hit_sound, gameover_sound, click_sound]
-
-# 定義設置音量的函數
-for sound in sounds:
-    sound.set_volume(0.01)
-
-# 定義小鳥類別
-class Bird:
-    def __init__(self):
-        self.x = 50  # 小鳥的初始橫坐標
-        self.y = WINDOW_HEIGHT // 2  # 小鳥的初始縱坐標，在窗口高度的一半
-        self.velocity = 0  # 初始速度
-        self.gravity = 0.5  # 重力
-        self.jump_strength = -8  # 跳躍力度
-        self.width = bird_img.get_width()  # 小鳥的寬度
-        self.height = bird_img.get_height()  # 小鳥的高度
-        self.bullets = []  # 子彈列表，儲存小鳥發射的所有子彈
-
-    def jump(self):
-        self.velocity = self.jump_strength  # 設置跳躍速度
-        jump_sound.play()  # 播放跳躍音效
-
-    def move(self):
-        self.velocity += self.gravity  # 速度增加，模擬重力效果
-        self.y += self.velocity  # 更新小鳥的縱坐標
-
-    def shoot(self):
-        self.bullets.append(Bullet(self.x + self.width, self.y + self.height // 2))  # 添加一顆新子彈到子彈列表
-        shoot_sound.play()  # 播放射擊音效
-
-    def draw(self):
-        WINDOW.blit(bird_img, (self.x, self.y))  # 繪製小鳥
-        for bullet in self.bullets:  # 繪製所有子彈
-            bullet.move()
-            bullet.draw()
-            if bullet.x > WINDOW_WIDTH:  # 如果子彈移出窗口，將其移除
-                self.bullets.remove(bullet)
-
-# 定義子彈類別
-class Bullet:
-    def __init__(self, x, y):
-        self.x = x  # 子彈的初始橫坐標
-        self.y = y  # 子彈的初始縱坐標
-        self.speed = 10  # 子彈速度
-        self.width = 10  # 子彈寬度
-        self.height = 5  # 子彈高度
-
-    def move(self):
-        self.x += self.speed  # 更新子彈的橫坐標
-
-    def draw(self):
-        pygame.draw.rect(WINDOW, RED, (self.x, self.y, self.width, self.height))  # 繪製紅色矩形表示子彈
-
-# 定義星星類別
-class Star:
-    def __init__(self, floor_height):
-        self.x = WINDOW_WIDTH  #定義星星的初始橫坐標
-        self.y = random.randint(50, WINDOW_HEIGHT - floor_height - 100)  #定義星星的初始縱坐標，隨機生成
-        self.speed = 5  #定義星星速度
-        self.width = 50  #定義星星寬度
-        self.height = 50  #定義星星高度
-        self.hit = False  # 是否被擊中
-        self.hit_timer = 0  # 被擊中的計時器
-
-    def move(self):
-        self.x -= self.speed  # 更定義星星的橫坐標
-
-    def draw_star(self, surface, color, x, y, size):
-        points = []  # 星形的頂點列表
-        for i in range(5):
-            angle = i * 2 * math.pi / 5 - math.pi / 2  # 外頂點角度
-            outer_x = x + size * math.cos(angle)
-            outer_y = y + size * math.sin(angle)
-            points.append((outer_x, outer_y))
-            angle = (i + 0.5) * 2 * math.pi / 5 - math.pi / 2  # 內頂點角度
-            inner_x = x + size / 2 * math.cos(angle)
-            inner_y = y + size / 2 * math.sin(angle)
-            points.append((inner_x, inner_y))
-        pygame.draw.polygon(surface, color, points)  # 繪製星形
-
-    def draw(self):
-        color = WHITE if self.hit else YELLOW  # 被擊中後變白色，否則為黃色
-        self.draw_star(WINDOW, color, self.x + self.width // 2, self.y + self.height // 2, self.width // 2)  # 繪製星星
-        
-    def got_hit(self):
-        self.hit = True  # 標記為被擊中
-        self.hit_timer = pygame.time.get_ticks()  # 記錄擊中的時間
-        hit_sound.play()  # 播放擊中音效
-    def update(self):
-        if self.hit and pygame.time.get_ticks() - self.hit_timer > 100:  # 如果被擊中後超過100毫秒
-            return True  # 返回True，表示應該移定義星星
-        return False  # 返回False，表示不應該移定義星星
-
-# 定義管道類別
-class Pipe:
-    def __init__(self, is_moving=False, is_clamping=False):
-        self.x = WINDOW_WIDTH  # 管道的初始橫坐標
-        self.pipe_gap = 200  # 上下管道之間的間隙
-        self.top_pipe_height = random.randint(50, WINDOW_HEIGHT - self.pipe_gap - FLOOR_HEIGHT_MODE_1 - 50)  # 上管道的高度
-        self.bottom_pipe_height = WINDOW_HEIGHT - self.pipe_gap - self.top_pipe_height - FLOOR_HEIGHT_MODE_1  # 下管道的高度
-        self.pipe_speed = 5  # 管道移動速度
-        self.pipe_width = 50  # 管道寬度
-        self.is_moving = is_moving  # 管道是否移動
-        self.move_direction = 1  # 移動方向
-        self.move_speed = 2  # 移動速度
-        self.is_clamping = is_clamping  # 管道是否會夾動
-        self.clamp_speed = 1  # 夾動速度
-
-    def move(self):
-        self.x -= self.pipe_speed  # 更新管道的橫坐標
-        if self.is_moving:  # 如果管道會移動
-            self.top_pipe_height += self.move_speed * self.move_direction  # 更新上管道的高度
-            self.bottom_pipe_height = WINDOW_HEIGHT - self.pipe_gap - self.top_pipe_height - FLOOR_HEIGHT_MODE_1  # 更新下管道的高度
-            if self.top_pipe_height < 50 or self.top_pipe_height > WINDOW_HEIGHT - self.pipe_gap - FLOOR_HEIGHT_MODE_1 - 50:  # 如果管道移動超出範圍
-                self.move_direction *= -1  # 反向移動
-        if self.is_clamping:  # 如果管道會夾動
-            self.pipe_gap -= self.clamp_speed * self.move_direction  # 更新管道間隙
-            if self.pipe_gap < 150 or self.pipe_gap > 200:  # 如果間隙超出範圍
-                self.move_direction *= -1  # 反向夾動
-
-    def draw(self):
-        pygame.draw.rect(WINDOW, GREEN, (self.x, 0, self.pipe_width, self.top_pipe_height))  # 繪製上管道
-        pygame.draw.rect(WINDOW, LIGHT_GREEN, (self.x, self.top_pipe_height - 10, self.pipe_width, 10))  # 繪製上管道邊緣
-        pygame.draw.rect(WINDOW, GREEN, (self.x, WINDOW_HEIGHT - FLOOR_HEIGHT_MODE_1 - self.bottom_pipe_height, self.pipe_width, self.bottom_pipe_height))  # 繪製下管道
-        pygame.draw.rect(WINDOW, LIGHT_GREEN, (self.x, WINDOW_HEIGHT - FLOOR_HEIGHT_MODE_1 - self.bottom_pipe_height, self.pipe_width, 10))  # 繪製下管道邊緣
+# 資源管理器：圖片與音效在第一次使用時才載入，背景音樂串流播放
+assets = AssetManager()
+assets.preload_sounds()  # 短音效很小，預先載入避免第一次播放時卡頓
 
 # 停止所有音樂
 def stop_all_music():
-    pygame.mixer.Sound.stop(menu_music)  # 停止主選單音樂
-    pygame.mixer.Sound.stop(game1_music)  # 停止遊戲模式1音樂
-    pygame.mixer.Sound.stop(game2_music)  # 停止遊戲模式2音樂
-    pygame.mixer.Sound.stop(gameover_sound)  # 停止遊戲結束音樂
+    assets.stop_music()  # 停止目前的背景音樂
 
 # 主遊戲循環
-def main():
+def main(profile_log=None, dirty_rects=False, record_dir=None, policy_path=None, trajectory_dir=None, max_fps=60, ai_interval=1,
+         turbo_every=10, turbo_mute=False, clock=None):
     in_rules_page = False  # 是否在規則頁面
     mode = None  # 遊戲模式
-    bird = Bird()  # 創建小鳥實例
-    pipes = []  # 管道列表
-    enemies = []  #定義星星列表
-    game_over = False  # 遊戲是否結束
-    game_started = False  # 遊戲是否開始
-    score = 0  # 分數
-    floor_height = 0  # 地板高度
-    font = pygame.font.SysFont("monospace", 35)  # 設置字體
+    sim = None  # 遊戲模擬器，選擇模式後建立
+    recorder = None  # 輸入錄製器（指定 --record 時使用）
+    trajectories = TrajectoryWriter(trajectory_dir) if trajectory_dir else None  # 軌跡記錄器（指定 --trajectories 時使用）
+    font = pygame.font.SysFont("monospace", 35)  # 設置分數字體
+    dead_font = pygame.font.Font(None, 60)  # 死亡信息字體
+    start_font = pygame.font.Font(None, 36)  # 開始提示字體
+    renderer = Renderer(WINDOW, assets.image("bird"), dirty_rects)  # 渲染器
+    clock = clock or pygame.time.Clock()  # 控制幀率的時鐘（只建立一次；基準測試傳入腳本化的時鐘）
     death_display_time = 0  # 用於顯示死亡頁面的計時器
     ai_enabled = False  # 是否啟用 AI
-    ctypes.windll.user32.LoadKeyboardLayoutW("00000409", 1)  # 設置鍵盤輸入為英文
-    model = load_model()  # 載入 AI 模型
+    if hasattr(ctypes, "windll"):  # 只有 Windows 有 windll
+        ctypes.windll.user32.LoadKeyboardLayoutW("00000409", 1)  # 設置鍵盤輸入為英文
+    if policy_path:
+        model_loader = BackgroundModelLoader(model_path=None, policy_path=policy_path).start()  # 使用指定的 NumPy 策略（例如演化訓練的結果）
+    else:
+        model_loader = BackgroundModelLoader().start()  # 在背景執行緒載入 AI 模型，主選單立即顯示
+    status_font = pygame.font.Font(None, 24)  # AI 狀態提示字體
+    ai_notice_time = -10000  # 模型未就緒時按下 A 鍵的時間
+    profiler = FrameProfiler(sink_path=profile_log)  # 每幀效能分析器，按 F3 顯示
+    profiler_font = pygame.font.Font(None, 20)  # 效能疊加層字體
+
+    accumulator = 0.0  # 累積但還沒推進的時間（秒）
+    turbo = False  # 是否開啟快轉模式（按 T 切換，AI 操作時生效）
+    turbo_speed = 0.0  # 快轉時的實際速度倍率
+    turbo_background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()  # 只顯示分數時的黑色背景
+    previous_bird_y = 0  # 上一步的小鳥高度，用於插值繪製
+    if trajectories is not None:
+        tick_obs = None  # 下一步輸入之前的觀察值
+        tick_jump = 0  # 下一步是否跳躍
 
     stop_all_music()  # 停止所有音樂
-    pygame.mixer.Sound.play(menu_music, loops=-1)  # 播放主選單音樂，循環播放
+    assets.play_music("menu")  # 播放主選單音樂，循環播放
 
     while True:  # 遊戲主循環
+        profiler.begin_frame()  # 開始記錄這一幀
+        turbo_active = False  # 這一幀是否在快轉
+        if trajectories is not None and tick_obs is None and sim is not None and not sim.game_over:
+            tick_obs = sim.observation()  # 新的一局：記錄輸入之前的觀察值
         for event in pygame.event.get():  # 處理所有事件
             if event.type == pygame.QUIT:  # 如果點擊關閉按鈕
+                if recorder is not None and recorder.frames:
+                    save_recording(record_dir, recorder)  # 保存未結束的這一局
+                if trajectories is not None:
+                    trajectories.close()  # 保存軌跡索引
+                profiler.close()  # 關閉效能記錄文件
                 pygame.quit()  # 退出 Pygame
                 sys.exit()  # 退出程式
                 
             if event.type == pygame.KEYDOWN:  # 如果按下鍵盤按鍵
+                if event.key == pygame.K_F3:
+                    profiler.toggle_overlay()  # 切換效能疊加層
+                if event.key == pygame.K_t:
+                    turbo = not turbo  # 切換快轉模式
+
                 if mode is None:  # 如果還未選擇模式
                     if event.key == pygame.K_1:
-                        pygame.mixer.Sound.play(click_sound)  # 播放點擊音效
+                        assets.play_sound("click")  # 播放點擊音效
                         mode = "original"  # 經典模式
-                        floor_height = FLOOR_HEIGHT_MODE_1  # 設置地板高度
+                        sim = GameSimulation(mode)  # 建立經典模式模擬器
+                        recorder = start_recording(record_dir, sim)  # 開始錄製這一局
                         stop_all_music()  # 停止所有音樂
-                        pygame.mixer.Sound.play(game1_music, loops=-1)  # 播放模式1音樂，循環播放
+                        assets.play_music("original")  # 播放模式1音樂，循環播放
                         
                     elif event.key == pygame.K_2:
-                        pygame.mixer.Sound.play(click_sound)  # 播放點擊音效
+                        assets.play_sound("click")  # 播放點擊音效
                         mode = "shooting"  # 射擊模式
-                        floor_height = FLOOR_HEIGHT_MODE_2  # 設置地板高度
+                        sim = GameSimulation(mode)  # 建立射擊模式模擬器
+                        recorder = start_recording(record_dir, sim)  # 開始錄製這一局
                         stop_all_music()  # 停止所有音樂
-                        pygame.mixer.Sound.play(game2_music, loops=-1)  # 播放模式2音樂，循環播放
+                        assets.play_music("shooting")  # 播放模式2音樂，循環播放
                         
                     elif event.key == pygame.K_r:
-                        pygame.mixer.Sound.play(click_sound)  # 播放點擊音效
+                        assets.play_sound("click")  # 播放點擊音效
                         in_rules_page = True  # 進入規則頁面
                         
-                elif not game_over:  # 如果遊戲未結束
+                elif not sim.game_over:  # 如果遊戲未結束
                     if event.key == pygame.K_SPACE:
-                        if not game_started:
-                            game_started = True  # 開始遊戲
-                        bird.jump()  # 讓小鳥跳躍
-                    if mode == "shooting" and event.key == pygame.K_s:
-                        bird.shoot()  # 讓小鳥射擊
+                        sim.jump()  # 讓小鳥跳躍（第一次跳躍會開始遊戲）
+                        assets.play_sound("jump")  # 播放跳躍音效
+                        if recorder is not None:
+                            recorder.jump()
+                        if trajectories is not None:
+                            tick_jump = 1
+                    if event.key == pygame.K_s and sim.shoot():  # 讓小鳥射擊（僅限射擊模式）
+                        assets.play_sound("shoot")  # 播放射擊音效
+                        if recorder is not None:
+                            recorder.shoot()
                         
                     if event.key == pygame.K_a:
-                        ai_enabled = not ai_enabled  # 切換 AI 控制
-
-                if game_over:  # 如果遊戲結束
+                        if model_loader.ready:
+                            ai_enabled = not ai_enabled  # 切換 AI 控制
+                            if recorder is not None:
+                                recorder.ai_toggle()
+                        else:
+                            ai_notice_time = pygame.time.get_ticks()  # 模型尚未就緒，顯示提示
+
+                if sim is not None and sim.game_over:  # 如果遊戲結束
                     if event.key == pygame.K_SPACE:
-                        bird = Bird()  # 創建新小鳥
-                        pipes = []  # 清空管道列表
-                        enemies = []  # 清定義星星列表
-                        game_over = False  # 重置遊戲結束狀態
-                        game_started = False  # 重置遊戲開始狀態
-                        score = 0  # 重置分數
+                        sim.reset()  # 重置遊戲狀態（使用新的種子）
+                        recorder = start_recording(record_dir, sim)  # 開始錄製新的一局
                         death_display_time = 0  # 重置死亡顯示時間
                         stop_all_music()  # 停止所有音樂
                         
                         if mode == "original":
-                            pygame.mixer.Sound.play(game1_music, loops=-1)  # 播放模式1音樂
+                            assets.play_music("original")  # 播放模式1音樂
                         elif mode == "shooting":
-                            pygame.mixer.Sound.play(game2_music, loops=-1)  # 播放模式2音樂
+                            assets.play_music("shooting")  # 播放模式2音樂
                             
                     elif event.key == pygame.K_m:  # 按下 M 鍵返回主選單
                         mode = None  # 重置模式
-                        bird = Bird()  # 創建新小鳥
-                        pipes = []  # 清空管道列表
-                        enemies = []  # 清定義星星列表
-                        game_over = False  # 重置遊戲結束狀態
-                        game_started = False  # 重置遊戲開始狀態
-                        score = 0  # 重置分數
+                        sim = None  # 清除模擬器
+                        recorder = None  # 停止錄製
                         death_display_time = 0  # 重置死亡顯示時間
                         stop_all_music()  # 停止所有音樂
-                        pygame.mixer.Sound.play(menu_music, loops=-1)  # 播放主選單音樂
+                        assets.play_music("menu")  # 播放主選單音樂
                 if in_rules_page and event.key == pygame.K_b:
                     in_rules_page = False  # 退出規則頁面
 
             if event.type == pygame.MOUSEBUTTONDOWN:  # 如果按下滑鼠按鍵
-                pygame.mixer.Sound.play(click_sound)  # 播放點擊音效
+                assets.play_sound("click")  # 播放點擊音效
                 mouse_x, mouse_y = event.pos  # 獲取滑鼠點擊位置
                 if mode is None and not in_rules_page:  # 在主畫面時
                     if 135 < mouse_x < 270 and 320 < mouse_y < 360:  # 如果點擊區域在 "Rules" 按鈕範圍內
@@ -275,131 +166,172 @@ def main():
                         
                     elif 75 < mouse_x < 355 and 220 < mouse_y < 250:  # 如果點擊區域在 "Start" 按鈕範圍內
                         mode = "original"
-                        floor_height = FLOOR_HEIGHT_MODE_1
+                        sim = GameSimulation(mode)
+                        recorder = start_recording(record_dir, sim)  # 開始錄製這一局
                         stop_all_music()  # 停止所有音樂
-                        pygame.mixer.Sound.play(game1_music, loops=-1)  # 播放模式1音樂
+                        assets.play_music("original")  # 播放模式1音樂
                         
                     elif 65 < mouse_x < 365 and 250 < mouse_y < 280:  # 如果點擊區域在 "Shooting" 按鈕範圍內
                         mode = "shooting"
-                        floor_height = FLOOR_HEIGHT_MODE_2
+                        sim = GameSimulation(mode)
+                        recorder = start_recording(record_dir, sim)  # 開始錄製這一局
                         stop_all_music()  # 停止所有音樂
-                        pygame.mixer.Sound.play(game2_music, loops=-1)  # 播放模式2音樂
+                        assets.play_music("shooting")  # 播放模式2音樂
                         
                 elif in_rules_page:  # 在規則頁面時
                     if 165 < mouse_x < 235 and 337 < mouse_y < 374:  # 如果點擊區域在 "Back" 按鈕範圍內
                         in_rules_page = False  # 返回主頁
 
+        profiler.lap("events")
+
         if mode is None and not in_rules_page:  # 如果未選擇模式且不在規則頁面
-            WINDOW.blit(homepage_img, (0, 0))  # 顯示首頁圖片
+            renderer.begin_frame(assets.image("homepage"))  # 顯示首頁圖片
         elif in_rules_page:  # 如果在規則頁面
-            WINDOW.blit(rules_img, (0, 0))  # 顯示規則頁面圖片
+            renderer.begin_frame(assets.image("rules"))  # 顯示規則頁面圖片
         else:
-            if not game_over:  # 如果遊戲未結束
-                if game_started:  # 如果遊戲已開始
-                    if ai_enabled:  # 如果啟用 AI
-                        obs = np.array([bird.y, bird.velocity, pipes[0].x if pipes else 0, bird.y - pipes[0].top_pipe_height if pipes else 0, pipes[0].top_pipe_height if pipes else 0], dtype=np.float32)  # 獲取當前狀態
-                        action, _ = model.predict(obs, deterministic=True)  # AI 做出行動決策
-                        if action == 1:
-                            bird.jump()  # AI 控制小鳥跳躍
-                    bird.move()  # 更新小鳥位置
-
-                    if mode == "original":
-                        if len(pipes) == 0 or pipes[-1].x < WINDOW_WIDTH - 200:
-                            is_moving_pipe = score >= 10  # 當分數達到10時，管道開始移動
-                            is_clamping_pipe = score >= 20  # 當分數達到20時，管道開始夾動
-                            pipes.append(Pipe(is_moving_pipe, is_clamping_pipe))  # 添加新管道
-                    elif mode == "shooting":
-                        if len(enemies) == 0 or enemies[-1].x < WINDOW_WIDTH - 200:
-                            enemies.append(Star(floor_height))  # 添加定義星星
+            # 快轉模式：AI 操作時不限速，每次繪圖之間推進 turbo_every 步（0 表示只在一段時間後顯示分數）
+            turbo_active = turbo and ai_enabled and sim.game_started and not sim.game_over
+            if turbo_mute and assets.muted != turbo_active:
+                assets.set_muted(turbo_active)  # 快轉時靜音
+            turbo_deadline = time.perf_counter() + TURBO_SCORE_ONLY_INTERVAL
+            # 固定時間步長：累積實際經過的時間，每滿 1/60 秒推進一次遊戲邏輯，與畫面的幀率無關
+            ticks = 0
+            while not sim.game_over and (
+                    (ticks < turbo_every if turbo_every else time.perf_counter() < turbo_deadline) if turbo_active
+                    else (accumulator >= TICK_SECONDS and ticks < MAX_TICKS_PER_FRAME)):
+                previous_bird_y = sim.bird.y  # 這一步之前的小鳥高度，用於插值繪製
+                # AI 每 ai_interval 步決策一次；決策只在那一步生效，其餘步不跳躍（不是重複同一個動作，連續跳躍會改變遊戲行為）
+                if sim.game_started and ai_enabled and sim.frame % ai_interval == 0:
+                    obs = np.array(sim.observation(), dtype=np.float32)  # 獲取當前狀態
+                    action, _ = model_loader.model.predict(obs, deterministic=True)  # AI 做出行動決策
+                    if action == 1:
+                        sim.jump()  # AI 控制小鳥跳躍
+                        assets.play_sound("jump")  # 播放跳躍音效
+                        if recorder is not None:
+                            recorder.ai_jump()
+                        if trajectories is not None:
+                            tick_jump = 1
+                profiler.lap("ai")
+
+                sim_events = sim.step()  # 推進一步遊戲邏輯
+                if not turbo_active:
+                    accumulator -= TICK_SECONDS
+                ticks += 1
+                if recorder is not None:
+                    recorder.end_frame()  # 記錄這一步的輸入
+                if trajectories is not None:
+                    if tick_obs is not None and sim.game_started:
+                        if trajectories.episode is None:
+                            trajectories.start_episode(mode=sim.mode, seed=sim.seed)
+                        trajectories.append(tick_obs, tick_jump, CRASH_REWARD if sim.game_over else STEP_REWARD, sim.game_over, ai_enabled)  # 記錄這一步
+                    tick_obs = sim.observation() if not sim.game_over else None  # 下一步輸入之前的觀察值
+                    tick_jump = 0
+                for sim_event in sim_events:
+                    if sim_event == "hit":
+                        assets.play_sound("hit")  # 播放擊中音效
+                    elif sim_event == "death":
+                        if recorder is not None:
+                            save_recording(record_dir, recorder)  # 保存這一局的錄影
+                            recorder = None
+                        stop_all_music()  # 停止所有音樂
+                        death_display_time = pygame.time.get_ticks()  # 設置死亡顯示時間
+                        assets.play_sound("death")  # 播放死亡音效
+                profiler.lap("physics")
+            if turbo_active:
+                accumulator = 0.0  # 快轉時不使用累積的時間
+            elif ticks == MAX_TICKS_PER_FRAME:
+                accumulator = min(accumulator, TICK_SECONDS)  # 電腦太慢時捨棄積壓的時間，遊戲變慢但不會越積越多
+
+            if not sim.game_over:  # 如果遊戲未結束
+                # 插值繪製：畫出上一步與這一步之間的位置，高更新率的螢幕上移動也很平順
+                if turbo_active:
+                    bird_y = sim.bird.y  # 快轉時直接畫出最新的狀態
+                    lag = 0.0
+                elif sim.game_started:
+                    alpha = min(accumulator / TICK_SECONDS, 1.0)  # 距離下一步的進度
+                    bird_y = previous_bird_y + (sim.bird.y - previous_bird_y) * alpha
+                    lag = 1.0 - alpha  # 畫面落後最新一步的比例，水平移動的物體以固定速度往回推
+                else:
+                    bird_y = sim.bird.y
+                    lag = 0.0
 
-                if mode == "original":
-                    WINDOW.blit(background_img, (0, 0))  # 顯示白天背景圖片
+                if turbo_active and not turbo_every:
+                    renderer.begin_frame(turbo_background)  # 只顯示分數，省下繪圖的時間
+                elif mode == "original":
+                    renderer.begin_frame(assets.image("background"))  # 顯示白天背景圖片
                 elif mode == "shooting":
-                    WINDOW.blit(background_night_img, (0, 0))  # 顯示夜晚背景圖片
-
-                bird.draw()  # 繪製小鳥
-
-                if game_started:
-                    if mode == "original":
-                        for pipe in pipes:
-                            pipe.move()  # 移動管道
-                            pipe.draw()  # 繪製管道
-
-                        for pipe in pipes:
-                            if bird.x + bird.width > pipe.x and bird.x < pipe.x + pipe.pipe_width:
-                                if bird.y < pipe.top_pipe_height or bird.y + bird.height > WINDOW_HEIGHT - floor_height - pipe.bottom_pipe_height:
-                                    game_over = True  # 遊戲結束
-                                    stop_all_music()  # 停止所有音樂
-                                    death_display_time = pygame.time.get_ticks()  # 設置死亡顯示時間
-                                    death_sound.play()  # 播放死亡音效
-
-                        if bird.y + bird.height >= WINDOW_HEIGHT - floor_height:
-                            game_over = True  # 遊戲結束
-                            stop_all_music()  # 停止所有音樂
-                            death_display_time = pygame.time.get_ticks()  # 設置死亡顯示時間
-                            death_sound.play()  # 播放死亡音效
-
-                        if pipes and pipes[0].x < -pipes[0].pipe_width:
-                            pipes.pop(0)  # 移除已經移出窗口的管道
-                            score += 1  # 增加分數
-                    elif mode == "shooting":
-                        for enemy in enemies:
-                            enemy.move()  # 移定義星星
-                            if enemy.update():  # 如定義星星應該移除
-                                enemies.remove(enemy)  # 移定義星星
-                            else:
-                                enemy.draw()  # 繪定義星星
+                    renderer.begin_frame(assets.image("background_night"))  # 顯示夜晚背景圖片
 
-                        for enemy in enemies:
-                            if bird.x + bird.width > enemy.x and bird.x < enemy.x + enemy.width:
-                                if bird.y < enemy.y + enemy.height and bird.y + bird.height > enemy.y:
-                                    game_over = True  # 遊戲結束
-                                    stop_all_music()  # 停止所有音樂
-                                    death_display_time = pygame.time.get_ticks()  # 設置死亡顯示時間
-                                    death_sound.play()  # 播放死亡音效
-                            for bullet in bird.bullets:
-                                if bullet.x + bullet.width > enemy.x and bullet.x < enemy.x + enemy.width:
-                                    if bullet.y < enemy.y + enemy.height and bullet.y + bullet.height > enemy.y:
-                                        bird.bullets.remove(bullet)  # 移除擊定義星星的子彈
-                                        enemy.got_hit()  # 標定義星星被擊中
-                                        score += 1  # 增加分數
+                if turbo_active:
+                    renderer.draw_text(status_font, "TURBO {:.0f}x".format(turbo_speed), YELLOW, topleft=(10, 50))  # 顯示快轉倍率
+                if not (turbo_active and not turbo_every):
+                    renderer.draw_bird(sim.bird, bird_y, -BULLET_SPEED * lag)  # 繪製小鳥
 
-                        if bird.y + bird.height >= WINDOW_HEIGHT - floor_height:
-                            game_over = True  # 遊戲結束
-                            stop_all_music()  # 停止所有音樂
-                            death_display_time = pygame.time.get_ticks()  # 設置死亡顯示時間
-                            death_sound.play()  # 播放死亡音效
+                if sim.game_started and not (turbo_active and not turbo_every):
+                    renderer.draw_pipes(sim.pipes, PIPE_SPEED * lag)  # 繪製管道
+                    renderer.draw_enemies(sim.enemies, STAR_SPEED * lag)  # 繪製星星
 
-                        if enemies and enemies[0].x < -enemies[0].width:
-                            enemies.pop(0)  # 移除已經移出窗口定義星星
+                if sim.game_started:  # 分數在所有模式都顯示，包括快轉時只顯示分數
+                    renderer.draw_text(font, "Score: {}".format(sim.score), WHITE, topleft=(10, 10))  # 顯示分數（相同分數只渲染一次）
 
-                    score_text = font.render("Score: {}".format(score), True, WHITE)
-                    WINDOW.blit(score_text, [10, 10])  # 顯示分數
-
-            if game_over:  # 如果遊戲結束
+            if sim.game_over:  # 如果遊戲結束
                 ai_enabled = False  # 關閉 AI 控制
                 current_time = pygame.time.get_ticks()
-                if current_time - death_display_time > death_sound.get_length() * 1000:  # 檢查是否播放完死亡音效
-                    pygame.mixer.Sound.play(gameover_sound, loops=-1)  # 播放遊戲結束音效
+                if current_time - death_display_time > assets.sound("death").get_length() * 1000:  # 檢查是否播放完死亡音效
+                    assets.play_music("gameover")  # 播放遊戲結束音樂（已在播放時不會重新開始）
                     if mode == "original":
-                        WINDOW.blit(gameover1_img, (0, 0))  # 顯示模式1死亡頁面
+                        renderer.begin_frame(assets.image("gameover1"))  # 顯示模式1死亡頁面
                     elif mode == "shooting":
-                        WINDOW.blit(gameover2_img, (0, 0))  # 顯示模式2死亡頁面
+                        renderer.begin_frame(assets.image("gameover2"))  # 顯示模式2死亡頁面
                 else:
                     # 保持黑屏，等待死亡音效播放完畢
-                    font = pygame.font.Font(None, 60)
-                    text1 = font.render("You're dead", True, WHITE)
-                    text_rect1 = text1.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 20))
-                    WINDOW.blit(text1, text_rect1)  # 顯示死亡信息
-
-            elif not game_started:  # 如果遊戲未開始
-                font = pygame.font.Font(None, 36)
-                text = font.render("Press SPACE to start", True, WHITE)
-                text_rect = text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
-                WINDOW.blit(text, text_rect)  # 顯示開始提示
-
-        pygame.display.update()  # 更新窗口顯示
-        pygame.time.Clock().tick(60)  # 設置遊戲速度為每秒60幀
+                    renderer.begin_frame(None)  # 保留上一幀的畫面
+                    renderer.draw_text(dead_font, "You're dead", WHITE, center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 20))  # 顯示死亡信息
+
+            elif not sim.game_started:  # 如果遊戲未開始
+                renderer.draw_text(start_font, "Press SPACE to start", WHITE, center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))  # 顯示開始提示
+
+        if not model_loader.ready:  # 模型未就緒時顯示 AI 狀態
+            if model_loader.status == STATUS_LOADING:
+                status_text = "AI: loading..."
+            elif model_loader.status == STATUS_TRAINING:
+                status_text = "AI: training..."
+            else:
+                status_text = "AI: unavailable"
+            if pygame.time.get_ticks() - ai_notice_time < 2000:  # 按下 A 鍵後的 2 秒內以紅色強調
+                status_color = RED
+            else:
+                status_color = WHITE
+            renderer.draw_text(status_font, status_text, status_color, topleft=(10, WINDOW_HEIGHT - 24))
+
+        for rect in profiler.draw_overlay(WINDOW, profiler_font, YELLOW):  # 繪製效能疊加層
+            renderer.mark(rect)
+        profiler.lap("draw")
+
+        renderer.end_frame()  # 更新窗口顯示
+        profiler.lap("present")
+        elapsed = clock.tick(0 if turbo_active else max_fps) / 1000.0  # 限制畫面幀率（0 表示不限），並取得這一幀經過的時間
+        if turbo_active:
+            turbo_speed = ticks * TICK_SECONDS / max(elapsed, 0.001)  # 模擬時間與實際時間的比例
+        if sim is None or sim.game_over:
+            accumulator = 0.0  # 沒有進行中的遊戲時不累積時間
+        else:
+            accumulator += min(elapsed, MAX_FRAME_TIME)  # 視窗被拖動等長時間停頓時只補上一小段
+        profiler.lap("idle")
+        profiler.end_frame()  # 結束記錄這一幀
 
 if __name__ == '__main__':
-    main()  # 執行主函數
+    parser = argparse.ArgumentParser(description="Flappy Bird")
+    parser.add_argument("--profile-log", default=None, help="write per-frame timings to a .csv or .jsonl file")  # 效能記錄文件
+    parser.add_argument("--dirty-rects", action="store_true", help="only update the changed parts of the screen")  # 只更新變動區域
+    parser.add_argument("--record", default=None, metavar="DIR", help="record every session's seed and inputs to DIR")  # 錄影目錄
+    parser.add_argument("--policy", default=None, help="use a NumPy policy (.npz) or a policy table (.table.npz) for the AI instead of the PPO model")  # AI 策略文件
+    parser.add_argument("--trajectories", default=None, metavar="DIR", help="stream (observation, action, reward, done) frames to DIR")  # 軌跡數據目錄
+    parser.add_argument("--max-fps", type=int, default=60, help="cap the display frame rate (0 = uncapped); physics always runs at 60 Hz")  # 畫面幀率上限
+    parser.add_argument("--ai-interval", type=int, default=1, help="AI decision interval: run inference only every k physics ticks and do not jump on the ticks in between")  # AI 每幾步決策一次
+    parser.add_argument("--turbo-every", type=int, default=10, help="in turbo mode (T key), draw every Nth physics tick; 0 draws only the score")  # 快轉時每幾步繪製一次
+    parser.add_argument("--turbo-mute", action="store_true", help="mute audio while turbo mode is running")  # 快轉時靜音
+    args = parser.parse_args()
+    main(profile_log=args.profile_log, dirty_rects=args.dirty_rects, record_dir=args.record, policy_path=args.policy,
+         trajectory_dir=args.trajectories, max_fps=args.max_fps, ai_interval=max(1, args.ai_interval),
+         turbo_every=max(0, args.turbo_every), turbo_mute=args.turbo_mute)  # 執行主函數
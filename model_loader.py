@@ -0,0 +1,91 @@
+import os  # 用於檢查模型文件是否存在
+import subprocess  # 用於在獨立進程中訓練模型
+import sys  # 用於取得目前的 Python 直譯器路徑
+import threading  # 用於在背景執行緒中載入模型
+
+DEFAULT_MODEL_PATH = "best_ppo_flappybird.zip"  # 預設的模型路徑
+DEFAULT_POLICY_PATH = "best_ppo_flappybird.npz"  # 匯出的 NumPy 權重路徑（與預設模型放在一起）
+
+# 載入狀態
+STATUS_LOADING = "loading"  # 正在載入模型
+STATUS_TRAINING = "training"  # 找不到模型，正在獨立進程中訓練
+STATUS_READY = "ready"  # 模型可以使用
+STATUS_FAILED = "failed"  # 載入或訓練失敗
+
+
+# 定義背景模型載入器：在工作執行緒中匯入 torch / stable-baselines3 並載入模型，主選單可以立即顯示
+class BackgroundModelLoader:
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, policy_path=None):
+        self.model_path = model_path  # 模型文件路徑
+        # NumPy 權重路徑，預設放在模型文件旁邊（不寫入目前的工作目錄）
+        if policy_path is None:
+            policy_path = os.path.splitext(model_path)[0] + ".npz" if model_path else DEFAULT_POLICY_PATH
+        self.policy_path = policy_path
+        self.status = STATUS_LOADING  # 目前的載入狀態
+        self.model = None  # 載入完成的模型
+        self.error = None  # 失敗時的錯誤信息
+        self._lock = threading.Lock()  # 保護 model 與 status，兩者一起發佈給主執行緒
+        self._thread = threading.Thread(target=self._run, daemon=True)  # 守護執行緒，關閉遊戲時不需等待
+
+    def start(self):
+        self._thread.start()  # 開始背景載入
+        return self
+
+    @property
+    def ready(self):
+        with self._lock:
+            return self.status == STATUS_READY  # 模型是否可以使用
+
+    def _set_status(self, status, model=None):
+        # 模型與狀態一起更新，主執行緒看到 READY 時 model 已經是最終使用的模型
+        with self._lock:
+            if model is not None:
+                self.model = model
+            self.status = status
+
+    def _numpy_policy_is_fresh(self):
+        # .npz 存在且不比模型舊時，可以跳過 torch 直接使用；沒有模型路徑時只使用 .npz（例如演化訓練的策略）
+        if not os.path.exists(self.policy_path):
+            return False
+        if self.model_path is None or not os.path.exists(self.model_path):
+            return True
+        return os.path.getmtime(self.policy_path) >= os.path.getmtime(self.model_path)
+
+    def _run(self):
+        try:
+            if self._numpy_policy_is_fresh():
+                from policy_table import TABLE_SUFFIX, PolicyTable
+                if self.policy_path.endswith(TABLE_SUFFIX):
+                    model = PolicyTable(self.policy_path)  # 查表策略，每次決策只讀一個位元
+                else:
+                    from numpy_policy import NumpyPolicy
+                    model = NumpyPolicy(self.policy_path)  # 純 NumPy 推論，不需要匯入 torch
+                self._set_status(STATUS_READY, model)
+                return
+            if self.model_path is None:
+                raise FileNotFoundError(self.policy_path)
+            if not os.path.exists(self.model_path):
+                # 訓練會佔用大量 CPU，放在獨立進程中執行以免拖慢遊戲畫面
+                self._set_status(STATUS_TRAINING)
+                command = "from ai_bird import train_model; train_model({!r})".format(self.model_path)
+                result = subprocess.run([sys.executable, "-c", command])
+                if result.returncode != 0:
+                    raise RuntimeError("training process exited with code {}".format(result.returncode))
+                self._set_status(STATUS_LOADING)
+            from ai_bird import load_model  # 延遲匯入，避免在主執行緒中載入 torch
+            model = load_model(self.model_path)
+            self._set_status(STATUS_READY, self._export_numpy_policy() or model)  # 匯出並切換完成後才發佈
+        except Exception as exc:
+            self.error = exc  # 保留錯誤，遊戲仍可在沒有 AI 的情況下進行
+            self._set_status(STATUS_FAILED)
+            print("Model loading failed: {}".format(exc))
+
+    def _export_numpy_policy(self):
+        # 在模型文件旁匯出 NumPy 權重，下次啟動即可不經 torch 載入；返回 NumPy 策略，失敗時返回 None
+        try:
+            from numpy_policy import export_policy, NumpyPolicy
+            export_policy(self.model_path, self.policy_path)
+            return NumpyPolicy(self.policy_path)
+        except Exception as exc:
+            print("NumPy policy export failed: {}".format(exc))  # 匯出失敗時繼續使用 PPO 模型
+            return None
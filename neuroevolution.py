@@ -0,0 +1,231 @@
+import argparse  # 用於解析命令列參數
+import glob  # 用於尋找最新的檢查點
+import os  # 用於處理檢查點目錄與 CPU 核心數
+import time  # 用於計時每一代
+from multiprocessing import Pool  # 用於將適應度評估分散到多個 CPU 核心
+import numpy as np  # 用於批次前向傳播與基因運算
+from env_core import (BIRD_START_Y, PIPE_START_X, PIPE_SPEED, PIPE_Y_LOW, PIPE_Y_HIGH, CRASH_REWARD, STEP_REWARD,
+                      move_birds, bird_crashed, write_observation)  # 與訓練環境共用的物理參數與規則
+
+DEFAULT_POLICY_PATH = "best_evolved_flappybird.npz"  # 匯出的最佳基因（NumpyPolicy 格式）
+DEFAULT_CHECKPOINT_DIR = "evolution_checkpoints"  # 每一代的檢查點目錄
+
+OBS_SIZE = 5  # 觀察值維度
+NUM_ACTIONS = 2  # 動作數量
+# 觀察值的縮放比例，讓輸入落在 [-1, 1] 附近；匯出時併入第一層權重，遊戲中可直接輸入原始觀察值
+OBS_SCALE = np.array([600, 10, 400, 300, 300], dtype=np.float32)
+
+
+# 網路每層的 (輸入, 輸出) 大小：隱藏層使用 tanh，輸出層為動作 logits
+def layer_shapes(hidden_sizes):
+    sizes = [OBS_SIZE] + list(hidden_sizes) + [NUM_ACTIONS]
+    return list(zip(sizes[:-1], sizes[1:]))
+
+
+# 一個基因（攤平的權重與偏差）的長度
+def genome_size(hidden_sizes):
+    return sum(n_in * n_out + n_out for n_in, n_out in layer_shapes(hidden_sizes))
+
+
+# 隨機產生初始族群，權重依輸入數縮放
+def random_population(population_size, hidden_sizes, rng):
+    parts = []
+    for n_in, n_out in layer_shapes(hidden_sizes):
+        parts.append(rng.standard_normal((population_size, n_in * n_out)) / np.sqrt(n_in))
+        parts.append(np.zeros((population_size, n_out)))
+    return np.concatenate(parts, axis=1).astype(np.float32)
+
+
+# 將一批基因 (P, G) 拆成每層的權重 (P, 輸入, 輸出) 與偏差 (P, 輸出)，只建立視圖不複製
+def unpack(genomes, hidden_sizes):
+    layers = []
+    offset = 0
+    for n_in, n_out in layer_shapes(hidden_sizes):
+        weights = genomes[:, offset:offset + n_in * n_out].reshape(len(genomes), n_in, n_out)
+        offset += n_in * n_out
+        biases = genomes[:, offset:offset + n_out]
+        offset += n_out
+        layers.append((weights, biases))
+    return layers
+
+
+# 同時評估一批基因：每個基因在相同的 E 局管道序列上飛行，返回每個基因的平均總獎勵
+def evaluate_population(genomes, hidden_sizes, pipe_ys, max_steps):
+    layers = unpack(genomes, hidden_sizes)
+    population_size = len(genomes)
+    num_episodes = len(pipe_ys)
+    bird_y = np.full((population_size, num_episodes), BIRD_START_Y, dtype=np.float32)  # 每隻小鳥的高度
+    bird_velocity = np.zeros((population_size, num_episodes), dtype=np.float32)  # 每隻小鳥的速度
+    alive = np.ones((population_size, num_episodes), dtype=bool)  # 還活著的小鳥
+    total_reward = np.zeros((population_size, num_episodes), dtype=np.float64)  # 每隻小鳥的總獎勵
+    obs = np.empty((population_size, num_episodes, OBS_SIZE), dtype=np.float32)  # 觀察值緩衝區
+    # 管道的移動與動作無關，同一局的所有小鳥看到同一個管道，只需記錄目前是第幾個管道
+    pipe_x = PIPE_START_X
+    pipe_index = 0
+    pipe_y = pipe_ys[:, pipe_index].astype(np.float32)
+
+    for _ in range(max_steps):
+        # 與訓練環境相同的觀察值，再縮放到 [-1, 1] 附近
+        write_observation(obs, bird_y, bird_velocity, pipe_x, pipe_y)
+        obs /= OBS_SCALE
+        # 整個族群一次前向傳播：(P, E, 輸入) @ (P, 輸入, 輸出)
+        x = obs
+        for i, (weights, biases) in enumerate(layers):
+            x = np.matmul(x, weights) + biases[:, None, :]
+            if i < len(layers) - 1:
+                x = np.tanh(x)
+        jump = x[..., 1] > x[..., 0]  # 與 argmax 相同，相等時不跳
+
+        # 與 FlappyBirdEnv.step 相同的更新
+        move_birds(bird_y, bird_velocity, jump)
+        pipe_x -= PIPE_SPEED
+        if pipe_x < 0:
+            pipe_x = PIPE_START_X
+            pipe_index += 1
+            pipe_y = pipe_ys[:, pipe_index].astype(np.float32)
+
+        crashed = bird_crashed(bird_y, pipe_x, pipe_y) & alive
+        total_reward[alive] += STEP_REWARD
+        total_reward[crashed] += CRASH_REWARD - STEP_REWARD  # 撞擊的那一步獎勵為 -100
+        alive &= ~crashed
+        if not alive.any():
+            break
+    return total_reward.mean(axis=1)
+
+
+# 產生一代使用的管道序列（所有基因共用，比較公平）
+def sample_pipes(rng, num_episodes, max_steps):
+    steps_per_pipe = PIPE_START_X // PIPE_SPEED + 1  # 管道移出畫面所需的步數
+    return rng.integers(PIPE_Y_LOW, PIPE_Y_HIGH, size=(num_episodes, max_steps // steps_per_pipe + 2))
+
+
+# 錦標賽選擇：每次隨機抽出幾個基因，取適應度最高的一個
+def tournament(fitness, count, size, rng):
+    candidates = rng.integers(0, len(fitness), size=(count, size))
+    return candidates[np.arange(count), fitness[candidates].argmax(axis=1)]
+
+
+# 產生下一代：保留菁英，其餘由錦標賽選出父母、均勻交配並突變
+def next_generation(population, fitness, rng, elite=4, tournament_size=3, crossover_rate=0.7,
+                    mutation_rate=0.1, mutation_sigma=0.2):
+    order = np.argsort(-fitness)
+    num_children = len(population) - elite
+    parents_a = population[tournament(fitness, num_children, tournament_size, rng)]
+    parents_b = population[tournament(fitness, num_children, tournament_size, rng)]
+    # 均勻交配：每個基因位隨機取自其中一個父母；不交配的子代直接複製父母 a
+    crossover = rng.random((num_children, 1)) < crossover_rate
+    take_b = crossover & (rng.random(parents_a.shape) < 0.5)
+    children = np.where(take_b, parents_b, parents_a)
+    # 高斯突變
+    mutate = rng.random(children.shape) < mutation_rate
+    children = children + mutate * rng.standard_normal(children.shape).astype(np.float32) * mutation_sigma
+    return np.concatenate([population[order[:elite]], children]).astype(np.float32)
+
+
+# 將基因匯出為 NumpyPolicy 的 .npz 格式，遊戲的 A 鍵 AI 模式可直接載入
+def export_genome(genome, hidden_sizes, npz_path=DEFAULT_POLICY_PATH):
+    arrays = {}
+    layers = unpack(genome[None, :], hidden_sizes)
+    for i, (weights, biases) in enumerate(layers):
+        weights = weights[0]
+        if i == 0:
+            weights = weights / OBS_SCALE[:, None]  # 將觀察值縮放併入第一層，輸入原始觀察值即可
+        arrays["W{}".format(i)] = weights.astype(np.float32)
+        arrays["b{}".format(i)] = biases[0].astype(np.float32)
+    activations = ["tanh"] * (len(layers) - 1) + ["identity"]
+    np.savez(npz_path, num_layers=len(layers), activations=np.array(activations), **arrays)
+    return npz_path
+
+
+# 保存一代的檢查點：下一代的族群與目前最佳的基因
+def save_checkpoint(checkpoint_dir, generation, population, best_genome, best_fitness, hidden_sizes, seed):
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    path = os.path.join(checkpoint_dir, "generation_{:04d}.npz".format(generation))
+    np.savez(path, generation=generation, population=population, best_genome=best_genome,
+             best_fitness=best_fitness, hidden_sizes=np.array(hidden_sizes), seed=seed)
+    return path
+
+
+# 讀取最新的檢查點，沒有時返回 None
+def load_latest_checkpoint(checkpoint_dir):
+    paths = sorted(glob.glob(os.path.join(checkpoint_dir, "generation_*.npz")))
+    if not paths:
+        return None
+    with np.load(paths[-1]) as data:
+        return {name: data[name] for name in data.files}
+
+
+# 演化訓練：每一代評估整個族群、保存檢查點，並在找到更好的基因時匯出
+def evolve(generations=100, population_size=256, hidden_sizes=(16,), episodes=4, max_steps=2000,
+           elite=4, mutation_rate=0.1, mutation_sigma=0.2, crossover_rate=0.7, workers=None, seed=0,
+           checkpoint_dir=DEFAULT_CHECKPOINT_DIR, policy_path=DEFAULT_POLICY_PATH, resume=False):
+    hidden_sizes = tuple(hidden_sizes)
+    start_generation = 0
+    population = random_population(population_size, hidden_sizes, np.random.default_rng(seed))
+    best_genome = population[0]
+    best_fitness = -np.inf
+    checkpoint = load_latest_checkpoint(checkpoint_dir) if resume else None
+    if checkpoint is not None:
+        hidden_sizes = tuple(int(size) for size in checkpoint["hidden_sizes"])
+        seed = int(checkpoint["seed"])
+        start_generation = int(checkpoint["generation"]) + 1
+        population = checkpoint["population"]
+        best_genome = checkpoint["best_genome"]
+        best_fitness = float(checkpoint["best_fitness"])
+        print("Resuming from generation {} (best fitness {:.1f})".format(start_generation, best_fitness))
+
+    workers = workers or os.cpu_count() or 1
+    pool = Pool(workers) if workers > 1 else None  # 只有一個核心時直接在目前的進程中評估
+    try:
+        for generation in range(start_generation, generations):
+            start = time.perf_counter()
+            rng = np.random.default_rng([seed, generation])  # 每一代有自己的亂數，續跑時可重現
+            pipe_ys = sample_pipes(rng, episodes, max_steps)
+            if pool is None:
+                fitness = evaluate_population(population, hidden_sizes, pipe_ys, max_steps)
+            else:
+                chunks = np.array_split(population, workers)
+                results = pool.starmap(evaluate_population, [(chunk, hidden_sizes, pipe_ys, max_steps) for chunk in chunks])
+                fitness = np.concatenate(results)
+
+            best = int(fitness.argmax())
+            if fitness[best] > best_fitness:
+                best_fitness = float(fitness[best])
+                best_genome = population[best].copy()
+                export_genome(best_genome, hidden_sizes, policy_path)  # 隨時保留目前最好的策略
+            population = next_generation(population, fitness, rng, elite, crossover_rate=crossover_rate,
+                                         mutation_rate=mutation_rate, mutation_sigma=mutation_sigma)
+            save_checkpoint(checkpoint_dir, generation, population, best_genome, best_fitness, hidden_sizes, seed)
+            elapsed = time.perf_counter() - start
+            print("Generation {}: best {:.1f}, mean {:.1f}, best so far {:.1f} ({:.2f} s)".format(
+                generation, fitness[best], fitness.mean(), best_fitness, elapsed))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return best_genome, best_fitness
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evolve a population of small policy networks for Flappy Bird")
+    parser.add_argument("--generations", type=int, default=100)  # 演化的代數
+    parser.add_argument("--population", type=int, default=256)  # 族群大小
+    parser.add_argument("--hidden", type=int, nargs="*", default=[16])  # 隱藏層大小
+    parser.add_argument("--episodes", type=int, default=4)  # 每個基因每代飛行的局數
+    parser.add_argument("--max-steps", type=int, default=2000)  # 每局的最大步數
+    parser.add_argument("--elite", type=int, default=4)  # 直接保留到下一代的菁英數
+    parser.add_argument("--mutation-rate", type=float, default=0.1)  # 每個基因位突變的機率
+    parser.add_argument("--mutation-sigma", type=float, default=0.2)  # 突變的標準差
+    parser.add_argument("--crossover-rate", type=float, default=0.7)  # 子代由交配產生的機率
+    parser.add_argument("--workers", type=int, default=None)  # 評估用的進程數，預設為 CPU 核心數
+    parser.add_argument("--seed", type=int, default=0)  # 亂數種子
+    parser.add_argument("--checkpoint-dir", default=DEFAULT_CHECKPOINT_DIR)  # 檢查點目錄
+    parser.add_argument("--out", default=DEFAULT_POLICY_PATH)  # 匯出的最佳策略
+    parser.add_argument("--resume", action="store_true")  # 從最新的檢查點繼續
+    args = parser.parse_args()
+
+    _, best_fitness = evolve(args.generations, args.population, args.hidden, args.episodes, args.max_steps,
+                             args.elite, args.mutation_rate, args.mutation_sigma, args.crossover_rate,
+                             args.workers, args.seed, args.checkpoint_dir, args.out, args.resume)
+    print("Best fitness {:.1f}, policy exported to {} (play it with: python main.py --policy {})".format(
+        best_fitness, args.out, args.out))
@@ -0,0 +1,127 @@
+import argparse  # 用於解析命令列參數
+import sys  # 用於設定結束代碼
+import numpy as np  # 用於數組運算（純 NumPy 的前向傳播）
+
+DEFAULT_MODEL_PATH = "best_ppo_flappybird.zip"  # 預設的 PPO 模型路徑
+DEFAULT_POLICY_PATH = "best_ppo_flappybird.npz"  # 預設的 NumPy 權重路徑
+
+# 支援的激活函數
+ACTIVATIONS = {
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0),
+    "identity": lambda x: x,
+}
+
+
+# 從 PPO 模型中取出 MlpPolicy 的策略網路權重（需要 torch），返回可以直接保存為 .npz 的數組
+def policy_arrays(model):
+    import torch  # 延遲匯入，遊戲執行時不需要
+
+    shared_net = getattr(model.policy.mlp_extractor, "shared_net", None)
+    if shared_net is not None and len(shared_net):
+        # 策略與價值共用的隱藏層不在 policy_net 中，略過會得到錯誤的策略
+        raise ValueError("policies with shared layers (net_arch with a shared part) are not supported")
+    arrays = {}
+    activations = []
+    num_layers = 0
+    for module in model.policy.mlp_extractor.policy_net:  # 策略分支的隱藏層
+        if isinstance(module, torch.nn.Linear):
+            arrays["W{}".format(num_layers)] = module.weight.detach().cpu().numpy().T.astype(np.float32)  # 轉置成 (輸入, 輸出)
+            arrays["b{}".format(num_layers)] = module.bias.detach().cpu().numpy().astype(np.float32)
+            num_layers += 1
+        else:
+            name = type(module).__name__.lower()
+            if name not in ACTIVATIONS:
+                raise ValueError("unsupported activation: {}".format(type(module).__name__))
+            activations.append(name)
+    # 最後一層是輸出動作 logits 的 action_net，不接激活函數
+    action_net = model.policy.action_net
+    arrays["W{}".format(num_layers)] = action_net.weight.detach().cpu().numpy().T.astype(np.float32)
+    arrays["b{}".format(num_layers)] = action_net.bias.detach().cpu().numpy().astype(np.float32)
+    activations.append("identity")
+    num_layers += 1
+    arrays["num_layers"] = np.array(num_layers)
+    arrays["activations"] = np.array(activations)
+    return arrays
+
+
+# 從 PPO 模型文件匯出策略網路權重為 .npz（需要 torch 與 stable-baselines3，僅離線執行）
+def export_policy(model_path=DEFAULT_MODEL_PATH, npz_path=DEFAULT_POLICY_PATH):
+    from stable_baselines3 import PPO
+
+    model = PPO.load(model_path, device="cpu")
+    np.savez(npz_path, **policy_arrays(model))
+    return npz_path
+
+
+# 定義純 NumPy 的策略網路，介面與 PPO.predict 相同，可直接取代模型使用
+class NumpyPolicy:
+    def __init__(self, npz_path=DEFAULT_POLICY_PATH, arrays=None):
+        # arrays 為 policy_arrays 的結果（例如訓練中傳給評估進程的策略快照），指定時不讀取文件
+        if arrays is None:
+            with np.load(npz_path) as data:
+                arrays = {name: data[name] for name in data.files}
+        num_layers = int(arrays["num_layers"])
+        self.weights = [arrays["W{}".format(i)] for i in range(num_layers)]  # 每層的權重矩陣
+        self.biases = [arrays["b{}".format(i)] for i in range(num_layers)]  # 每層的偏差
+        self.activations = [ACTIVATIONS[str(name)] for name in arrays["activations"]]  # 每層的激活函數
+        self.rng = np.random.default_rng()  # 非確定性取樣時使用
+
+    def forward(self, obs):
+        # 計算動作 logits，輸入可以是一個觀察值 (5,) 或一批觀察值 (N, 5)
+        x = np.asarray(obs, dtype=np.float32).reshape(-1, self.weights[0].shape[0])
+        for weight, bias, activation in zip(self.weights, self.biases, self.activations):
+            x = activation(x @ weight + bias)
+        return x
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        single = np.ndim(observation) == 1  # 是否為單一觀察值
+        logits = self.forward(observation)
+        if deterministic:
+            actions = np.argmax(logits, axis=1)  # 確定性策略：取機率最大的動作
+        else:
+            probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probs /= probs.sum(axis=1, keepdims=True)
+            actions = (self.rng.random((len(probs), 1)) > np.cumsum(probs, axis=1)).sum(axis=1)  # 依機率取樣動作
+        if single:
+            return actions[0], state
+        return actions, state
+
+
+# 隨機產生接近遊戲實際範圍的觀察值，用於比較兩種推論結果
+def sample_observations(num_samples, seed=0):
+    rng = np.random.default_rng(seed)
+    bird_y = rng.uniform(0, 600, num_samples)  # 小鳥高度
+    velocity = rng.uniform(-8, 15, num_samples)  # 小鳥速度
+    pipe_x = rng.uniform(0, 400, num_samples)  # 管道橫坐標
+    pipe_y = rng.uniform(50, 300, num_samples)  # 管道高度
+    return np.stack([bird_y, velocity, pipe_x, bird_y - pipe_y, pipe_y], axis=1).astype(np.float32)
+
+
+# 檢查 NumPy 推論與 PPO.predict 的一致性，返回動作一致的比例
+def check_parity(model_path=DEFAULT_MODEL_PATH, npz_path=DEFAULT_POLICY_PATH, num_samples=10000):
+    from stable_baselines3 import PPO
+
+    model = PPO.load(model_path, device="cpu")
+    policy = NumpyPolicy(npz_path)
+    obs = sample_observations(num_samples)
+    expected, _ = model.predict(obs, deterministic=True)
+    actual, _ = policy.predict(obs, deterministic=True)
+    agreement = np.mean(expected == actual)
+    print("Action agreement: {:.4%} over {} observations".format(agreement, num_samples))
+    return agreement
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the PPO policy to NumPy and check parity")
+    parser.add_argument("command", choices=["export", "check"])  # export：匯出權重；check：比較一致性
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)  # PPO 模型路徑
+    parser.add_argument("--out", default=DEFAULT_POLICY_PATH)  # .npz 權重路徑
+    parser.add_argument("--samples", type=int, default=10000)  # 比較時的觀察值數量
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_policy(args.model, args.out)
+        print("Policy exported to {}".format(args.out))
+    if check_parity(args.model, args.out, args.samples) < 1.0:
+        sys.exit(1)  # 推論結果不一致
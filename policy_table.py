@@ -0,0 +1,196 @@
+import argparse  # 用於解析命令列參數
+import time  # 用於計時建表與查表
+import numpy as np  # 用於批次推論與位元壓縮
+from game_core import WINDOW_WIDTH, WINDOW_HEIGHT, PIPE_WIDTH, PIPE_GAP, FLOOR_HEIGHT_MODE_1, BIRD_JUMP_STRENGTH
+
+TABLE_VERSION = 1  # 動作表的格式版本
+TABLE_SUFFIX = ".table.npz"  # 動作表的副檔名
+DEFAULT_TABLE_PATH = "best_ppo_flappybird" + TABLE_SUFFIX  # 預設的動作表路徑
+CHUNK_SIZE = 1 << 20  # 建表時每批推論的觀察值數量
+
+# 量化網格：名稱 -> (觀察值的欄位, 最小值, 最大值, 間隔)
+# 縱坐標差（第 3 欄）等於高度減管道高度，由另外兩欄決定，不佔用表格的維度
+# 速度以 0.5、管道位置以 5 為單位變化，這兩欄的預設間隔沒有量化誤差
+DEFAULT_GRID = {
+    "bird_y": (0, -50, WINDOW_HEIGHT, 5),
+    "velocity": (1, BIRD_JUMP_STRENGTH, 25, 0.5),
+    "pipe_x": (2, -PIPE_WIDTH, WINDOW_WIDTH, 5),
+    "pipe_top": (4, 50, WINDOW_HEIGHT - PIPE_GAP - FLOOR_HEIGHT_MODE_1 - 50, 5),
+}
+GRID_ORDER = ("bird_y", "velocity", "pipe_x", "pipe_top")  # 表格維度的順序
+
+
+# 每個維度的格點數
+def grid_sizes(grid):
+    return [int(round((grid[name][2] - grid[name][1]) / grid[name][3])) + 1 for name in GRID_ORDER]
+
+
+# 依序產生網格上的觀察值（每批最多 chunk_size 個），返回 (起始索引, 觀察值矩陣)
+def grid_observations(grid, chunk_size=CHUNK_SIZE):
+    sizes = grid_sizes(grid)
+    total = int(np.prod(sizes))
+    for start in range(0, total, chunk_size):
+        index = np.arange(start, min(start + chunk_size, total))
+        coords = np.unravel_index(index, sizes)  # 平面索引 -> 每個維度的格點
+        values = {name: grid[name][1] + coords[i] * grid[name][3] for i, name in enumerate(GRID_ORDER)}
+        obs = np.empty((len(index), 5), dtype=np.float32)
+        obs[:, 0] = values["bird_y"]
+        obs[:, 1] = values["velocity"]
+        obs[:, 2] = values["pipe_x"]
+        obs[:, 3] = values["bird_y"] - values["pipe_top"]
+        obs[:, 4] = values["pipe_top"]
+        yield start, obs
+
+
+# 離線建表：在網格的每個格點上批次執行一次策略，動作以每格 1 位元壓縮保存
+def build_table(policy, path=DEFAULT_TABLE_PATH, grid=DEFAULT_GRID, chunk_size=CHUNK_SIZE, verbose=True):
+    sizes = grid_sizes(grid)
+    total = int(np.prod(sizes))
+    actions = np.zeros(total, dtype=bool)
+    start_time = time.perf_counter()
+    for start, obs in grid_observations(grid, chunk_size):
+        predicted, _ = policy.predict(obs, deterministic=True)
+        actions[start:start + len(obs)] = np.asarray(predicted).reshape(-1) == 1
+        if verbose:
+            print("\rEvaluated {}/{} cells".format(start + len(obs), total), end="", flush=True)
+    if verbose:
+        print(" in {:.1f} s".format(time.perf_counter() - start_time))
+    packed = np.packbits(actions, bitorder="little")  # 第 i 格在第 i // 8 個位元組的第 i % 8 位
+    np.savez_compressed(path, version=np.array(TABLE_VERSION), packed=packed, sizes=np.array(sizes),
+                        columns=np.array([grid[name][0] for name in GRID_ORDER]),
+                        lows=np.array([grid[name][1] for name in GRID_ORDER], dtype=np.float64),
+                        steps=np.array([grid[name][3] for name in GRID_ORDER], dtype=np.float64))
+    if verbose:
+        print("Table saved to {} ({} cells, {:.1f} KB, {:.1%} jump)".format(
+            path, total, packed.nbytes / 1024, actions.mean()))
+    return path
+
+
+# 定義查表策略：觀察值取最近的格點後直接讀出動作位元，不需要任何機器學習執行環境，介面與 NumpyPolicy 相同
+class PolicyTable:
+    def __init__(self, path=DEFAULT_TABLE_PATH):
+        with np.load(path) as data:
+            if int(data["version"]) != TABLE_VERSION:
+                raise ValueError("unsupported policy table version: {}".format(int(data["version"])))
+            self.packed = data["packed"]  # 位元壓縮的動作表
+            self.sizes = data["sizes"].astype(np.int64)  # 每個維度的格點數
+            self.columns = data["columns"].astype(np.int64)  # 每個維度對應的觀察值欄位
+            self.lows = data["lows"]  # 每個維度的最小值
+            self.steps = data["steps"]  # 每個維度的間隔
+        strides = np.ones(len(self.sizes), dtype=np.int64)
+        strides[:-1] = np.cumprod(self.sizes[::-1])[-2::-1]
+        self.strides = strides  # 每個維度在平面索引中的步長
+        self.bits = self.packed.tobytes()  # 單一觀察值查表時使用，避免 NumPy 的逐元素開銷
+        # 單一觀察值查表使用的 Python 常數：(欄位, 最小值, 1 / 間隔, 最大格點, 步長)
+        self.dims = [(int(c), float(low), 1.0 / float(step), int(size) - 1, int(stride))
+                     for c, low, step, size, stride in zip(self.columns, self.lows, self.steps, self.sizes, self.strides)]
+
+    def lookup(self, obs):
+        # 單一觀察值：每個維度四捨五入到最近的格點（超出範圍時取邊界），O(1)
+        index = 0
+        for column, low, inv_step, last, stride in self.dims:
+            cell = int((obs[column] - low) * inv_step + 0.5)
+            index += (0 if cell < 0 else last if cell > last else cell) * stride
+        return (self.bits[index >> 3] >> (index & 7)) & 1
+
+    def lookup_batch(self, obs):
+        # 一批觀察值 (N, 5)，以向量化方式查表
+        obs = np.asarray(obs, dtype=np.float64).reshape(-1, 5)
+        cells = np.floor((obs[:, self.columns] - self.lows) / self.steps + 0.5).astype(np.int64)
+        np.clip(cells, 0, self.sizes - 1, out=cells)
+        index = cells @ self.strides
+        return (self.packed[index >> 3] >> (index & 7)) & 1
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=True):
+        if isinstance(observation, (list, tuple)) or np.ndim(observation) == 1:  # 遊戲傳入的單一觀察值是列表
+            return self.lookup(observation), state
+        return self.lookup_batch(observation).astype(np.int64), state
+
+
+# 比較動作表與原本的策略：隨機觀察值（量化誤差）、策略自己在遊戲中經過的狀態，以及兩者在相同管道路線上的成績
+def agreement_report(policy, table, num_samples=100000, birds=50, seed=0, max_frames=20000):
+    from ghost_race import GhostRace
+    from numpy_policy import sample_observations
+
+    obs = sample_observations(num_samples, seed)
+    expected, _ = policy.predict(obs, deterministic=True)
+    report = {"random_agreement": float(np.mean(np.asarray(expected).reshape(-1) == table.lookup_batch(obs)))}
+
+    # 以原本的策略進行幽靈競賽，在每一幀比較兩者對所有活著的小鳥的動作
+    race = GhostRace([policy], birds, seed)
+    matched = total = 0
+    while not race.finished and race.frame < max_frames:
+        alive = race.alive.copy()
+        obs = race.observations()
+        expected, _ = policy.predict(obs, deterministic=True)
+        expected = np.asarray(expected).reshape(-1)
+        matched += int(np.count_nonzero((expected == table.lookup_batch(obs))[alive]))
+        total += int(np.count_nonzero(alive))
+        race.step(expected == 1)
+    report["on_policy_agreement"] = matched / total if total else float("nan")
+
+    # 兩者在相同的管道路線上比賽
+    race = GhostRace([policy, table], birds, seed)
+    while not race.finished and race.frame < max_frames:
+        race.step()
+    scores = race.bird_scores()
+    report["policy_mean_score"] = float(scores[race.group == 0].mean())
+    report["table_mean_score"] = float(scores[race.group == 1].mean())
+    report["frames"] = race.frame
+    return report
+
+
+# 比較單一觀察值的查表與策略推論所需的時間（微秒）
+def time_predict(policy, table, num_samples=10000, seed=0):
+    from numpy_policy import sample_observations
+
+    observations = [list(map(float, obs)) for obs in sample_observations(num_samples, seed)]
+    timings = {}
+    for name, model in (("policy", policy), ("table", table)):
+        start = time.perf_counter()
+        for obs in observations:
+            model.predict(obs, deterministic=True)
+        timings[name] = (time.perf_counter() - start) / num_samples * 1e6
+    return timings
+
+
+# 列印動作表的一致性、成績與查表速度
+def print_report(policy, table, num_samples=100000, birds=50, seed=0):
+    report = agreement_report(policy, table, num_samples, birds, seed)
+    print("Action agreement: random observations {:.2%}, on-policy states {:.2%}".format(
+        report["random_agreement"], report["on_policy_agreement"]))
+    print("Mean score over {} birds ({} frames): policy {:.1f}, table {:.1f}".format(
+        birds, report["frames"], report["policy_mean_score"], report["table_mean_score"]))
+    timings = time_predict(policy, table)
+    print("Single predict: policy {:.1f} us, table {:.1f} us".format(timings["policy"], timings["table"]))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the policy over a quantized observation grid as a bit-packed action table")
+    parser.add_argument("command", choices=["build", "check"])  # build：建表並比較；check：只比較已有的動作表
+    parser.add_argument("--policy", default=None)  # 原本的策略（.npz 或 PPO .zip），預設使用遊戲的 AI 模型
+    parser.add_argument("--out", default=DEFAULT_TABLE_PATH)  # 動作表路徑
+    for name in GRID_ORDER:
+        parser.add_argument("--{}-step".format(name.replace("_", "-")), type=float, default=None)  # 各維度的量化間隔
+    parser.add_argument("--samples", type=int, default=100000)  # 比較時的隨機觀察值數量
+    parser.add_argument("--birds", type=int, default=50)  # 比較時的小鳥數量
+    parser.add_argument("--seed", type=int, default=0)  # 比較時的種子
+    args = parser.parse_args()
+
+    path = args.policy
+    if path is None:
+        import os
+        from model_loader import DEFAULT_MODEL_PATH, DEFAULT_POLICY_PATH
+        path = DEFAULT_POLICY_PATH if os.path.exists(DEFAULT_POLICY_PATH) else DEFAULT_MODEL_PATH
+    from ghost_race import load_policy
+    policy = load_policy(path)
+    if args.command == "build":
+        grid = dict(DEFAULT_GRID)
+        for name in GRID_ORDER:
+            step = getattr(args, name + "_step")
+            if step:
+                column, low, high, _ = grid[name]
+                grid[name] = (column, low, high, step)
+        build_table(policy, args.out, grid)
+    print_report(policy, PolicyTable(args.out), args.samples, args.birds, args.seed)
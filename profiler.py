@@ -0,0 +1,114 @@
+import csv  # 用於寫出 CSV 格式的效能記錄
+import json  # 用於寫出 JSONL 格式的效能記錄
+import time  # 用於高精度計時
+from collections import deque  # 用於保存最近幾幀的計時結果
+
+# 主循環中的各個階段
+PHASES = ("events", "ai", "physics", "draw", "present", "idle")
+
+
+# 定義每幀效能分析器：記錄每個階段的耗時、計算幀時間百分位數，並可顯示於畫面或寫入文件
+class FrameProfiler:
+    def __init__(self, window=240, sink_path=None):
+        self.frame_times = deque(maxlen=window)  # 最近幾幀的幀時間（秒）
+        self.phase_times = {name: deque(maxlen=window) for name in PHASES}  # 最近幾幀每個階段的耗時（秒）
+        self.current = dict.fromkeys(PHASES, 0.0)  # 目前這一幀每個階段的耗時
+        self.frame_start = None  # 這一幀的開始時間
+        self.last_mark = 0.0  # 上一次 lap 的時間
+        self.frame_count = 0  # 已記錄的幀數
+        self.overlay_visible = False  # 是否顯示效能疊加層
+        self.overlay_lines = []  # 疊加層目前顯示的文字
+        self.overlay_surfaces = []  # 疊加層渲染後的文字圖層
+        self.overlay_key = None  # 渲染疊加層時的文字、字體與顏色
+        self.sink_file = None  # 記錄文件
+        self.sink_writer = None  # CSV 寫入器（JSONL 時為 None）
+        if sink_path:
+            self.sink_file = open(sink_path, "w", newline="")
+            if sink_path.endswith(".csv"):
+                self.sink_writer = csv.writer(self.sink_file)
+                self.sink_writer.writerow(["frame", "frame_ms"] + ["{}_ms".format(name) for name in PHASES])
+
+    def lap(self, name):
+        # 將距離上一次 lap（或幀開始）的時間計入指定階段，適合插在主循環的各段之間
+        now = time.perf_counter()
+        self.current[name] += now - self.last_mark
+        self.last_mark = now
+
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+        self.last_mark = self.frame_start
+        for name in PHASES:
+            self.current[name] = 0.0
+
+    def end_frame(self):
+        if self.frame_start is None:
+            return
+        frame_time = time.perf_counter() - self.frame_start
+        self.frame_times.append(frame_time)
+        for name in PHASES:
+            self.phase_times[name].append(self.current[name])
+        self.frame_count += 1
+
+        if self.sink_file is not None:
+            phase_ms = [round(self.current[name] * 1000, 4) for name in PHASES]
+            if self.sink_writer is not None:
+                self.sink_writer.writerow([self.frame_count, round(frame_time * 1000, 4)] + phase_ms)
+            else:
+                record = {"frame": self.frame_count, "frame_ms": round(frame_time * 1000, 4)}
+                record.update({"{}_ms".format(name): ms for name, ms in zip(PHASES, phase_ms)})
+                self.sink_file.write(json.dumps(record) + "\n")
+
+        if self.overlay_visible and self.frame_count % 15 == 0:  # 每 15 幀更新一次疊加層文字
+            self.overlay_lines = self.summary_lines()
+
+    def percentile(self, values, q):
+        # 以排序後的索引取得百分位數（單位：毫秒）
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+        return ordered[index] * 1000
+
+    def stats(self):
+        # 返回 FPS、幀時間百分位數與各階段平均耗時
+        frame_times = list(self.frame_times)
+        mean_frame = sum(frame_times) / len(frame_times) if frame_times else 0.0
+        return {
+            "fps": 1.0 / mean_frame if mean_frame > 0 else 0.0,
+            "p50_ms": self.percentile(frame_times, 50),
+            "p95_ms": self.percentile(frame_times, 95),
+            "p99_ms": self.percentile(frame_times, 99),
+            "phases_ms": {name: sum(times) / len(times) * 1000 if times else 0.0 for name, times in self.phase_times.items()},
+        }
+
+    def summary_lines(self):
+        stats = self.stats()
+        lines = ["FPS {:.1f}".format(stats["fps"]),
+                 "p50 {:.2f}  p95 {:.2f}  p99 {:.2f} ms".format(stats["p50_ms"], stats["p95_ms"], stats["p99_ms"])]
+        for name, ms in stats["phases_ms"].items():
+            lines.append("{:<8}{:6.2f} ms".format(name, ms))
+        return lines
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+        if self.overlay_visible:
+            self.overlay_lines = self.summary_lines()
+
+    def draw_overlay(self, surface, font, color=(255, 255, 255)):
+        # 在畫面右上角繪製效能數據，返回繪製過的區域
+        if not self.overlay_visible:
+            return []
+        if self.overlay_key != (self.overlay_lines, id(font), color):  # 文字改變時才重新渲染
+            self.overlay_key = (self.overlay_lines, id(font), color)
+            self.overlay_surfaces = [font.render(line, True, color) for line in self.overlay_lines]
+        rects = []
+        y = 5
+        for text in self.overlay_surfaces:
+            rects.append(surface.blit(text, (surface.get_width() - text.get_width() - 5, y)))
+            y += text.get_height()
+        return rects
+
+    def close(self):
+        if self.sink_file is not None:
+            self.sink_file.close()  # 關閉記錄文件
+            self.sink_file = None
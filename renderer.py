@@ -0,0 +1,155 @@
+import math  # 用於數學運算（計算星星的頂點座標）
+import pygame  # 用於繪圖
+from assets import AssetManager  # 延遲載入的圖片資源
+from game_core import WINDOW_HEIGHT, FLOOR_HEIGHT_MODE_1, BULLET_WIDTH, BULLET_HEIGHT, STAR_WIDTH, STAR_HEIGHT, PIPE_WIDTH  # 遊戲世界尺寸與實體大小
+
+# 定義顏色
+WHITE = (255, 255, 255)
+GREEN = (0, 128, 0)
+RED = (255, 0, 0)
+LIGHT_GREEN = (0, 255, 0)
+YELLOW = (255, 255, 0)
+
+TEXT_CACHE_SIZE = 256  # 文字快取的最大數量
+
+
+# 繪製星形
+def draw_star(surface, color, x, y, size):
+    points = []  # 星形的頂點列表
+    for i in range(5):
+        angle = i * 2 * math.pi / 5 - math.pi / 2  # 外頂點角度
+        outer_x = x + size * math.cos(angle)
+        outer_y = y + size * math.sin(angle)
+        points.append((outer_x, outer_y))
+        angle = (i + 0.5) * 2 * math.pi / 5 - math.pi / 2  # 內頂點角度
+        inner_x = x + size / 2 * math.cos(angle)
+        inner_y = y + size / 2 * math.sin(angle)
+        points.append((inner_x, inner_y))
+    return pygame.draw.polygon(surface, color, points)  # 繪製星形
+
+
+# 預先將星星繪製到透明圖層上，之後每幀只需 blit
+def make_star_sprite(color, width, height):
+    sprite = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+    draw_star(sprite, color, width // 2, height // 2, width // 2)
+    return sprite
+
+
+# 取得遊戲畫面需要的圖片（需先建立視窗），供無畫面工具與重播使用
+def load_game_images(assets=None):
+    assets = assets or AssetManager()
+    backgrounds = {
+        "original": assets.image("background"),
+        "shooting": assets.image("background_night"),
+    }
+    return assets.image("bird"), backgrounds
+
+
+# 定義文字快取：相同字體、內容與顏色的文字只渲染一次
+class TextCache:
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size  # 最大快取數量
+        self.surfaces = {}  # (字體, 內容, 顏色) -> 渲染後的圖層
+
+    def render(self, font, text, color):
+        key = (id(font), text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            if len(self.surfaces) >= self.max_size:
+                self.surfaces.clear()  # 超過上限時清空，避免分數等變動文字無限累積
+            surface = font.render(text, True, color)
+            self.surfaces[key] = surface
+        return surface
+
+
+# 定義渲染器：使用轉換過的圖片、預先繪製的星星與文字快取，並支援只更新變動區域的 dirty-rect 模式
+class Renderer:
+    def __init__(self, window, bird_img, dirty_rects=False):
+        self.window = window  # 遊戲視窗
+        self.bird_img = bird_img  # 小鳥圖片
+        self.dirty_rects = dirty_rects  # 是否只更新變動區域
+        self.text_cache = TextCache()  # 文字快取
+        self.star_sprites = {}  # 依顏色快取的星星圖層
+        self.background = None  # 這一幀的背景
+        self.last_background = None  # 上一幀的背景
+        self.frame_open = False  # 這一幀是否已經開始
+        self.full_update = True  # 這一幀是否需要更新整個畫面
+        self.rects = []  # 這一幀繪製過的區域
+        self.last_rects = []  # 上一幀繪製過的區域
+
+    def begin_frame(self, background):
+        # 開始一幀；background 為 None 時保留上一幀的畫面
+        if self.frame_open:
+            if background is not None:  # 同一幀中換背景，視為整個畫面重繪
+                self.window.blit(background, (0, 0))
+                self.background = background
+                self.full_update = True
+                self.rects = []
+            return
+        self.frame_open = True
+        self.rects = []
+        self.background = background
+        if background is None:
+            self.full_update = False
+        elif not self.dirty_rects or background is not self.last_background:
+            self.window.blit(background, (0, 0))  # 背景改變時重繪整個畫面
+            self.full_update = True
+        else:
+            for rect in self.last_rects:
+                self.window.blit(background, rect, rect)  # 只用背景蓋掉上一幀畫過的區域
+            self.full_update = False
+
+    def mark(self, rect):
+        self.rects.append(rect)  # 記錄變動區域
+        return rect
+
+    def blit(self, surface, position):
+        return self.mark(self.window.blit(surface, position))
+
+    def draw_text(self, font, text, color, topleft=None, center=None):
+        surface = self.text_cache.render(font, text, color)
+        if center is not None:
+            return self.blit(surface, surface.get_rect(center=center))
+        return self.blit(surface, topleft)
+
+    def draw_bird(self, bird, y=None, bullet_offset=0):
+        # y 與 bullet_offset 用於插值繪製（小鳥的插值高度、子彈的水平偏移）
+        self.blit(self.bird_img, (bird.x, bird.y if y is None else y))  # 繪製小鳥
+        bullets = bird.bullets
+        for x, y in zip(bullets.x.tolist(), bullets.y.tolist()):  # 繪製所有子彈
+            self.mark(self.window.fill(RED, (x + bullet_offset, y, BULLET_WIDTH, BULLET_HEIGHT)))  # 繪製紅色矩形表示子彈
+
+    def draw_ghosts(self, sprite, x, ys):
+        # 多隻小鳥共用同一張圖片，以一次 blits 呼叫全部繪製
+        self.rects.extend(self.window.blits([(sprite, (x, y)) for y in ys.tolist()]))
+
+    def star_sprite(self, hit):
+        color = WHITE if hit else YELLOW  # 被擊中後變白色，否則為黃色
+        sprite = self.star_sprites.get(color)
+        if sprite is None:
+            sprite = self.star_sprites[color] = make_star_sprite(color, STAR_WIDTH, STAR_HEIGHT)
+        return sprite
+
+    def draw_enemies(self, enemies, offset=0):
+        for x, y, hit in zip(enemies.x.tolist(), enemies.y.tolist(), enemies.hit.tolist()):
+            self.blit(self.star_sprite(hit), (x + offset, y))  # 繪製星星
+
+    def draw_pipes(self, pipes, offset=0):
+        # offset 為插值繪製時的水平偏移
+        for x, top, bottom in zip(pipes.x.tolist(), pipes.top.tolist(), pipes.bottom.tolist()):
+            x += offset
+            bottom_y = WINDOW_HEIGHT - FLOOR_HEIGHT_MODE_1 - bottom
+            self.mark(pygame.draw.rect(self.window, GREEN, (x, 0, PIPE_WIDTH, top)))  # 繪製上管道
+            self.mark(pygame.draw.rect(self.window, LIGHT_GREEN, (x, top - 10, PIPE_WIDTH, 10)))  # 繪製上管道邊緣
+            self.mark(pygame.draw.rect(self.window, GREEN, (x, bottom_y, PIPE_WIDTH, bottom)))  # 繪製下管道
+            self.mark(pygame.draw.rect(self.window, LIGHT_GREEN, (x, bottom_y, PIPE_WIDTH, 10)))  # 繪製下管道邊緣
+
+    def end_frame(self):
+        # 將這一幀顯示到螢幕上
+        if not self.dirty_rects or self.full_update:
+            pygame.display.update()  # 更新整個畫面
+        else:
+            pygame.display.update(self.last_rects + self.rects)  # 只更新上一幀與這一幀的變動區域
+        self.last_background = self.background  # 保留上一幀畫面時為 None，下一幀會整個重繪
+        self.last_rects = self.rects
+        self.frame_open = False
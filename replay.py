@@ -0,0 +1,146 @@
+import argparse  # 用於解析命令列參數
+import os  # 用於建立錄影目錄
+import struct  # 用於讀寫二進位檔頭
+import time  # 用於產生錄影檔名與計時
+import zlib  # 用於壓縮每幀的輸入
+from game_core import GameSimulation  # 無畫面的遊戲模擬核心
+
+# 錄影文件格式：檔頭（魔術字、版本、模式、種子、幀數）+ zlib 壓縮的每幀輸入（每幀 1 個位元組）
+MAGIC = b"FBRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBQI")
+MODES = ("original", "shooting")  # 模式代碼
+
+# 每幀輸入的位元
+INPUT_JUMP = 0x01  # 玩家跳躍
+INPUT_AI_TOGGLE = 0x02  # 切換 AI 控制
+INPUT_AI_JUMP = 0x04  # AI 決定跳躍（重播時不需要模型）
+SHOOT_SHIFT = 3  # 高 5 位元為這一幀的射擊次數
+MAX_SHOTS = 31  # 每幀最多記錄的射擊次數
+
+
+# 定義輸入錄製器：記錄一局的種子與每幀的輸入
+class InputRecorder:
+    def __init__(self, mode, seed):
+        self.mode = mode  # 遊戲模式
+        self.seed = seed  # 這一局的種子
+        self.frames = bytearray()  # 每幀的輸入
+        self.pending = 0  # 目前這一幀累積的輸入
+
+    def jump(self):
+        self.pending |= INPUT_JUMP
+
+    def ai_toggle(self):
+        self.pending |= INPUT_AI_TOGGLE
+
+    def ai_jump(self):
+        self.pending |= INPUT_AI_JUMP
+
+    def shoot(self):
+        shots = min(MAX_SHOTS, (self.pending >> SHOOT_SHIFT) + 1)
+        self.pending = (self.pending & ((1 << SHOOT_SHIFT) - 1)) | (shots << SHOOT_SHIFT)
+
+    def end_frame(self):
+        # 每次 sim.step() 之後呼叫，將這一幀的輸入寫入記錄
+        self.frames.append(self.pending)
+        self.pending = 0
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, MODES.index(self.mode), self.seed, len(self.frames)))
+            f.write(zlib.compress(bytes(self.frames), 9))
+        return path
+
+
+# 在指定目錄中開始錄製一局，未指定目錄時返回 None
+def start_recording(record_dir, sim):
+    if not record_dir:
+        return None
+    return InputRecorder(sim.mode, sim.seed)
+
+
+# 保存一局的錄影到指定目錄
+def save_recording(record_dir, recorder):
+    os.makedirs(record_dir, exist_ok=True)
+    name = "{}_{}_{}.fbr".format(time.strftime("%Y%m%d_%H%M%S"), recorder.mode, recorder.seed)
+    return recorder.save(os.path.join(record_dir, name))
+
+
+# 讀取錄影文件，返回 (模式, 種子, 每幀輸入)
+def load_replay(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, mode_code, seed, frame_count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("{} is not a replay file".format(path))
+    frames = zlib.decompress(data[HEADER.size:])
+    if len(frames) != frame_count:
+        raise ValueError("{} is truncated".format(path))
+    return MODES[mode_code], seed, frames
+
+
+# 將一幀的輸入套用到模擬器上（在 sim.step() 之前呼叫）
+def apply_inputs(sim, flags):
+    if flags & (INPUT_JUMP | INPUT_AI_JUMP):
+        sim.jump()
+    for _ in range(flags >> SHOOT_SHIFT):
+        sim.shoot()
+
+
+# 重新執行錄影；on_frame 在每幀之後呼叫（例如繪圖），返回最後的模擬器狀態
+def run_replay(mode, seed, frames, on_frame=None):
+    sim = GameSimulation(mode, seed=seed)
+    for flags in frames:
+        apply_inputs(sim, flags)
+        sim.step()
+        if on_frame is not None:
+            on_frame(sim)
+    return sim
+
+
+# 以遊戲畫面播放錄影
+def play_rendered(mode, seed, frames, fps=60):
+    import pygame
+    from game_core import WINDOW_WIDTH, WINDOW_HEIGHT
+    from renderer import Renderer, load_game_images, WHITE
+
+    pygame.init()
+    window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption('Flappy Bird - Replay')
+    bird_img, backgrounds = load_game_images()
+    renderer = Renderer(window, bird_img)
+    font = pygame.font.SysFont("monospace", 35)
+    clock = pygame.time.Clock()
+
+    def draw(sim):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                raise SystemExit
+        renderer.begin_frame(backgrounds[mode])
+        renderer.draw_bird(sim.bird)
+        renderer.draw_pipes(sim.pipes)
+        renderer.draw_enemies(sim.enemies)
+        renderer.draw_text(font, "Score: {}".format(sim.score), WHITE, topleft=(10, 10))
+        renderer.end_frame()
+        if fps:
+            clock.tick(fps)
+
+    return run_replay(mode, seed, frames, draw)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded Flappy Bird session")
+    parser.add_argument("path")  # 錄影文件
+    parser.add_argument("--render", action="store_true")  # 以遊戲畫面播放（預設為無畫面全速執行）
+    parser.add_argument("--fps", type=int, default=60)  # 播放幀率，0 表示不限速
+    args = parser.parse_args()
+
+    mode, seed, frames = load_replay(args.path)
+    start = time.perf_counter()
+    if args.render:
+        sim = play_rendered(mode, seed, frames, args.fps)
+    else:
+        sim = run_replay(mode, seed, frames)
+    elapsed = time.perf_counter() - start
+    print("mode={} seed={} frames={} score={} game_over={} ({:.0f} frames/sec)".format(
+        mode, seed, len(frames), sim.score, sim.game_over, len(frames) / elapsed if elapsed > 0 else 0))
@@ -0,0 +1,580 @@
+import argparse  # 用於解析命令列參數
+import asyncio  # 用於非同步的網路伺服器與固定節拍
+import os  # 用於檢查策略文件是否存在
+import random  # 用於每個對局的管道路線
+import struct  # 用於二進位協定的編碼
+import time  # 用於統計每個節拍的耗時
+import numpy as np  # 用於以數組儲存所有對局的狀態
+from game_core import (WINDOW_HEIGHT, BIRD_START_Y, BIRD_HEIGHT, BIRD_GRAVITY, BIRD_JUMP_STRENGTH, FPS, PIPE_GAP,
+                       PIPE_SPEED, PIPE_FIELDS, GameSimulation, new_pipe, needs_pipe, shift_pipes, pipe_hits_bird,
+                       bird_hits_floor, pipe_passed)
+
+DEFAULT_HOST = "127.0.0.1"  # 只接受本機連線
+DEFAULT_PORT = 7777  # 預設的連接埠
+MAX_PIPES = 4  # 每個對局的管道欄位數（同時最多 3 個管道）
+MAX_WRITE_BUFFER = 1 << 20  # 客戶端積壓超過 1 MB 時斷線，避免拖垮伺服器
+MAX_SESSIONS_PER_CONNECTION = 4096  # 每個連線最多同時開啟的對局數
+
+# 客戶端 -> 伺服器：每個指令固定 8 位元組 (操作, 旗標, 對局編號, 參數)，對局編號由客戶端在自己的連線中指定
+COMMAND = struct.Struct("<BBHI")
+OP_OPEN = 1  # 開始新對局：旗標為 OPEN_*，參數為種子
+OP_JUMP = 2  # 跳躍（下一個節拍生效）
+OP_RESET = 3  # 重新開始（下一個節拍生效）
+OP_CLOSE = 4  # 結束對局
+OPEN_AI = 1  # 由伺服器的策略操控
+OPEN_AUTO_RESTART = 2  # 遊戲結束後自動重新開始
+OPEN_RANDOM_SEED = 4  # 忽略參數，使用隨機種子
+
+# 伺服器 -> 客戶端：每個節拍一則訊息 (節拍, 記錄數, 記錄的位元組數)，接著是這個節拍有變化的對局的記錄
+TICK_HEADER = struct.Struct("<IHI")
+# 每筆記錄的固定部分，y 以半像素為單位（速度都是 0.5 的倍數，沒有誤差）；經典模式沒有天花板，
+# 小鳥可以飛到畫面上方很遠的地方，因此使用 i32 而不是 i16
+RECORD_DTYPE = np.dtype([("session", "<u2"), ("flags", "u1"), ("y", "<i4")])
+RECORD_HEAD = struct.Struct("<HBi")  # 與 RECORD_DTYPE 相同，客戶端解碼時使用
+F_TICK = 1  # 對局推進了一步：客戶端把所有管道左移 PIPE_SPEED
+F_SCORE = 2  # 分數改變，後接 u16 分數
+F_PIPES = 4  # 管道改變（生成、移除或上下移動），後接 u8 管道數與每個管道的 (x, top, bottom)
+F_OVER = 8  # 遊戲結束
+F_RESET = 16  # 對局（重新）開始，後接 u32 種子；與 replay.py 相同，種子加上每幀的輸入即可重現整局
+F_REFUSED = 32  # 開局被拒絕（連線的對局數已達上限），這個對局編號沒有對局
+SEED = struct.Struct("<I")
+SCORE = struct.Struct("<H")
+PIPE_COUNT = struct.Struct("<B")
+PIPE = struct.Struct("<hhh")
+
+# 每個對局的欄位：名稱 -> (dtype, 初始值)
+SESSION_FIELDS = {
+    "active": (np.bool_, False),  # 欄位是否被使用
+    "started": (np.bool_, False),  # 遊戲是否開始
+    "over": (np.bool_, False),  # 遊戲是否結束
+    "bird_y": (np.float64, BIRD_START_Y),  # 小鳥的縱坐標
+    "velocity": (np.float64, 0),  # 小鳥的速度
+    "score": (np.int64, 0),  # 分數
+    "frame": (np.int64, 0),  # 幀數計數器
+    "seed": (np.uint32, 0),  # 這一局的種子
+    "head": (np.int64, 0),  # 最前面的管道所在的欄位
+    "count": (np.int64, 0),  # 管道數量
+    # 伺服器使用的欄位
+    "owner": (np.int64, -1),  # 所屬連線的編號
+    "local_id": (np.uint16, 0),  # 客戶端指定的對局編號
+    "ai": (np.bool_, False),  # 是否由伺服器的策略操控
+    "auto_restart": (np.bool_, False),  # 結束後是否自動重新開始
+    "jump_request": (np.bool_, False),  # 下一個節拍要跳躍
+    "reset_request": (np.bool_, False),  # 下一個節拍要重新開始
+    "announce": (np.bool_, False),  # 下一則訊息要送出 F_RESET
+}
+# 每個對局的管道欄位（每個對局 MAX_PIPES 個，以環狀佇列排列），與 game_core 的 PIPE_FIELDS 相同並加上 pipe_ 前綴
+PIPE_SLOT_FIELDS = dict([("pipe_active", np.bool_)] + [("pipe_" + name, dtype) for name, dtype in PIPE_FIELDS])
+
+
+# 定義對局批次：所有對局的經典模式狀態存成數組，一次推進全部對局；規則使用 game_core 的共用函數，與 GameSimulation 相同，
+# 每個對局有自己的 random.Random，給定種子與輸入時結果和 GameSimulation 完全一致
+class SessionBatch:
+    def __init__(self, capacity=1024):
+        self.capacity = capacity  # 目前的容量
+        for name, (dtype, value) in SESSION_FIELDS.items():
+            setattr(self, name, np.full(capacity, value, dtype=dtype))
+        for name, dtype in PIPE_SLOT_FIELDS.items():
+            setattr(self, name, np.zeros((capacity, MAX_PIPES), dtype=dtype))
+        self.rngs = [None] * capacity  # 每個對局的隨機數產生器
+        self.free = list(range(capacity - 1, -1, -1))  # 可用的欄位
+        self.rows = np.arange(capacity)  # 取出每個對局某一個管道時使用的列索引
+
+    def _grow(self):
+        # 容量不足時加倍
+        old = self.capacity
+        self.capacity *= 2
+        for name, (dtype, value) in SESSION_FIELDS.items():
+            grown = np.full(self.capacity, value, dtype=dtype)
+            grown[:old] = getattr(self, name)
+            setattr(self, name, grown)
+        for name, dtype in PIPE_SLOT_FIELDS.items():
+            grown = np.zeros((self.capacity, MAX_PIPES), dtype=dtype)
+            grown[:old] = getattr(self, name)
+            setattr(self, name, grown)
+        self.rngs.extend([None] * old)
+        self.free.extend(range(self.capacity - 1, old - 1, -1))
+        self.rows = np.arange(self.capacity)
+
+    @property
+    def num_sessions(self):
+        return self.capacity - len(self.free)
+
+    def open(self, seed=None):
+        # 建立新對局，返回所在的欄位
+        if not self.free:
+            self._grow()
+        slot = self.free.pop()
+        self.rngs[slot] = random.Random()
+        self.active[slot] = True
+        self.reset(slot, seed if seed is not None else random.randrange(2 ** 32))
+        return slot
+
+    def close(self, slot):
+        for name, (dtype, value) in SESSION_FIELDS.items():
+            getattr(self, name)[slot] = value
+        self.pipe_active[slot] = False
+        self.rngs[slot] = None
+        self.free.append(slot)
+
+    def reset(self, slot, seed=None):
+        # 與 GameSimulation.reset 相同：未指定種子時由這個對局目前的亂數產生
+        rng = self.rngs[slot]
+        if seed is None:
+            seed = rng.randrange(2 ** 32)
+        rng.seed(seed)
+        self.seed[slot] = seed
+        self.bird_y[slot] = BIRD_START_Y
+        self.velocity[slot] = 0
+        self.score[slot] = 0
+        self.frame[slot] = 0
+        self.started[slot] = False
+        self.over[slot] = False
+        self.head[slot] = 0
+        self.count[slot] = 0
+        self.pipe_active[slot] = False
+        return seed
+
+    def observations(self, slots):
+        # 與 GameSimulation.observation 相同的 5 維狀態，一次建立多個對局的觀察值矩陣
+        y = self.bird_y[slots]
+        head = self.head[slots]
+        has_pipe = self.count[slots] > 0
+        pipe_x = self.pipe_x[slots, head]
+        pipe_top = self.pipe_top[slots, head]
+        obs = np.empty((len(slots), 5), dtype=np.float32)
+        obs[:, 0] = y
+        obs[:, 1] = self.velocity[slots]
+        obs[:, 2] = np.where(has_pipe, pipe_x, 0)
+        obs[:, 3] = np.where(has_pipe, y - pipe_top, 0)
+        obs[:, 4] = np.where(has_pipe, pipe_top, 0)
+        return obs
+
+    def pipes(self, slot):
+        # 依前後順序返回一個對局的所有管道 (x, top, bottom)
+        head, count = int(self.head[slot]), int(self.count[slot])
+        return [(self.pipe_x[slot, k], self.pipe_top[slot, k], self.pipe_bottom[slot, k])
+                for k in ((head + j) % MAX_PIPES for j in range(count))]
+
+    def step(self, jump):
+        # 推進所有對局一幀；jump 為每個對局是否跳躍。返回 (推進, 生成管道, 移除管道, 管道上下移動, 死亡) 的遮罩
+        live = self.active & ~self.over
+        jump = jump & live
+        self.started |= jump  # 第一次跳躍會開始遊戲
+        self.velocity[jump] = BIRD_JUMP_STRENGTH
+        self.frame[live] += 1
+        run = live & self.started
+        nothing = np.zeros(self.capacity, dtype=bool)
+        if not run.any():
+            return run, nothing, nothing, nothing, nothing
+
+        velocity = self.velocity
+        velocity[run] += BIRD_GRAVITY  # 模擬重力效果
+        self.bird_y[run] += velocity[run]  # 更新小鳥的縱坐標
+
+        # 生成管道：每個對局大約每 40 幀才生成一次，逐個處理以使用各自的隨機數產生器
+        head, count = self.head, self.count
+        newest = (head + count - 1) % MAX_PIPES
+        spawn = run & ((count == 0) | needs_pipe(self.pipe_x[self.rows, newest]))
+        for slot in np.flatnonzero(spawn):
+            k = (head[slot] + count[slot]) % MAX_PIPES
+            for name, value in new_pipe(self.score[slot], self.rngs[slot]).items():
+                getattr(self, "pipe_" + name)[slot, k] = value
+            self.pipe_active[slot, k] = True
+            count[slot] += 1
+
+        # 移動管道（與 move_pipes 相同，包括上下移動與夾動）
+        pipes = self.pipe_active & run[:, None]
+        x, top, bottom = self.pipe_x, self.pipe_top, self.pipe_bottom
+        x[pipes] -= PIPE_SPEED
+        moving = pipes & self.pipe_is_moving
+        moved = moving.any(axis=1)
+        if moved.any():
+            shift_pipes(top, bottom, self.pipe_gap, self.pipe_direction, moving, moving & self.pipe_is_clamping)
+
+        # 小鳥與所有管道的 AABB 碰撞檢測（對局 x 管道）
+        y = self.bird_y
+        hit = pipes & pipe_hits_bird(x, top, bottom, y[:, None])
+        dead = run & (hit.any(axis=1) | bird_hits_floor(y))
+
+        # 移除已經移出窗口的管道並加分
+        pop = run & (count > 0) & pipe_passed(x[self.rows, head])
+        if pop.any():
+            slots = np.flatnonzero(pop)
+            self.pipe_active[slots, head[slots]] = False
+            head[slots] = (head[slots] + 1) % MAX_PIPES
+            count[slots] -= 1
+            self.score[slots] += 1
+
+        self.over |= dead
+        return run, spawn, pop, moved, dead
+
+
+# 客戶端連線
+class Connection:
+    def __init__(self, conn_id, writer):
+        self.id = conn_id  # 連線編號
+        self.writer = writer  # 傳送訊息的串流
+        self.sessions = {}  # 客戶端的對局編號 -> 批次中的欄位
+        self.refused = []  # 這個節拍被拒絕開局的對局編號
+
+
+# 定義多對局伺服器：所有對局在同一個固定節拍上推進，每個節拍把所有 AI 對局的觀察值合成一批，只呼叫一次 predict，
+# 再把每個連線的所有變化合成一則訊息送出
+class GameServer:
+    def __init__(self, policy=None, tps=FPS, capacity=1024, max_sessions_per_connection=MAX_SESSIONS_PER_CONNECTION):
+        self.policy = policy  # AI 對局使用的策略
+        self.max_sessions_per_connection = max_sessions_per_connection  # 每個連線的對局數上限
+        self.tps = tps  # 每秒節拍數，0 表示不限速
+        self.batch = SessionBatch(capacity)  # 所有對局
+        self.connections = {}  # 連線編號 -> 連線
+        self.next_id = 0  # 下一個連線編號
+        self.tick_count = 0  # 已完成的節拍數
+        self.tick_time = 0.0  # 統計期間內節拍的總耗時
+        self.ticks_since_stats = 0  # 統計期間內的節拍數
+        self.ai_batch = 0  # 最近一次推論的批次大小
+
+    async def handle_client(self, reader, writer):
+        conn = Connection(self.next_id, writer)
+        self.next_id += 1
+        self.connections[conn.id] = conn
+        buffer = b""
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                buffer += data
+                usable = len(buffer) - len(buffer) % COMMAND.size
+                for op, flags, session, arg in COMMAND.iter_unpack(buffer[:usable]):
+                    self.command(conn, op, flags, session, arg)
+                buffer = buffer[usable:]
+        except ConnectionError:
+            pass
+        finally:
+            self.disconnect(conn)
+
+    def command(self, conn, op, flags, session, arg):
+        batch = self.batch
+        if op == OP_OPEN:
+            if session in conn.sessions:
+                batch.close(conn.sessions.pop(session))  # 同一個編號重新開局
+            elif len(conn.sessions) >= self.max_sessions_per_connection:
+                conn.refused.append(session)  # 超過上限，下一則訊息通知客戶端
+                return
+            slot = batch.open(None if flags & OPEN_RANDOM_SEED else arg)
+            batch.owner[slot] = conn.id
+            batch.local_id[slot] = session
+            batch.ai[slot] = bool(flags & OPEN_AI)
+            batch.auto_restart[slot] = bool(flags & OPEN_AUTO_RESTART)
+            batch.announce[slot] = True
+            conn.sessions[session] = slot
+            return
+        slot = conn.sessions.get(session)
+        if slot is None:
+            return  # 忽略不存在的對局
+        if op == OP_JUMP:
+            batch.jump_request[slot] = True
+        elif op == OP_RESET:
+            batch.reset_request[slot] = True
+        elif op == OP_CLOSE:
+            batch.close(conn.sessions.pop(session))
+
+    def disconnect(self, conn):
+        # 斷線時結束這個連線的所有對局
+        if self.connections.pop(conn.id, None) is None:
+            return
+        for slot in conn.sessions.values():
+            self.batch.close(slot)
+        conn.sessions.clear()
+        conn.writer.close()
+
+    def tick(self):
+        # 推進所有對局一步並送出變化
+        batch = self.batch
+        self.tick_count += 1
+        for slot in np.flatnonzero(batch.reset_request):
+            batch.reset(slot)  # 重新開始，種子由這個對局的亂數產生
+            batch.announce[slot] = True
+        batch.reset_request[:] = False
+
+        live = batch.active & ~batch.over
+        jump = batch.jump_request & live
+        batch.jump_request[:] = False
+        ai_slots = np.flatnonzero(live & batch.ai)
+        self.ai_batch = len(ai_slots)
+        if len(ai_slots) and self.policy is not None:
+            actions, _ = self.policy.predict(batch.observations(ai_slots), deterministic=True)  # 所有 AI 對局一次推論
+            jump[ai_slots] |= np.asarray(actions).reshape(-1) == 1
+
+        run, spawn, pop, moved, dead = batch.step(jump)
+        batch.reset_request |= dead & batch.auto_restart  # 先送出 F_OVER，下一個節拍才重新開始
+        flags = (np.where(run, F_TICK, 0) | np.where(pop, F_SCORE, 0) | np.where(spawn | pop | moved, F_PIPES, 0)
+                 | np.where(dead, F_OVER, 0) | np.where(batch.announce, F_RESET, 0)).astype(np.uint8)
+        batch.announce[:] = False
+        self.send(flags)
+
+    def encode_extras(self, slot, flags):
+        # 記錄中固定部分之後的欄位
+        batch = self.batch
+        parts = []
+        if flags & F_RESET:
+            parts.append(SEED.pack(int(batch.seed[slot])))
+        if flags & F_SCORE:
+            parts.append(SCORE.pack(min(int(batch.score[slot]), 0xFFFF)))
+        if flags & F_PIPES:
+            pipes = batch.pipes(slot)
+            parts.append(PIPE_COUNT.pack(len(pipes)))
+            parts.extend(PIPE.pack(int(x), int(top), int(bottom)) for x, top, bottom in pipes)
+        return b"".join(parts)
+
+    def send(self, flags):
+        # 每個連線一則訊息：大部分記錄只有固定部分，直接以數組一次編碼
+        batch = self.batch
+        slots = np.flatnonzero(flags)
+        records = np.empty(len(slots), dtype=RECORD_DTYPE)
+        records["session"] = batch.local_id[slots]
+        records["flags"] = flags[slots]
+        records["y"] = np.round(batch.bird_y[slots] * 2)
+        extended = (flags[slots] & (F_RESET | F_SCORE | F_PIPES)) != 0
+        owners = batch.owner[slots]
+        order = np.argsort(owners, kind="stable")
+        conn_ids, starts = np.unique(owners[order], return_index=True)
+        groups = dict(zip(conn_ids.tolist(), np.split(order, starts[1:])))
+        for conn in list(self.connections.values()):
+            group = groups.get(conn.id)
+            count = 0
+            parts = []  # 沒有變化時只送出節拍，讓客戶端知道時間
+            if group is not None:
+                count = len(group)
+                parts.append(records[group[~extended[group]]].tobytes())
+                for i in group[extended[group]]:
+                    parts.append(records[i].tobytes())
+                    parts.append(self.encode_extras(slots[i], int(flags[slots[i]])))
+            if conn.refused:
+                count += len(conn.refused)
+                parts.extend(RECORD_HEAD.pack(session, F_REFUSED, 0) for session in conn.refused)
+                conn.refused = []
+            payload = b"".join(parts)
+            transport = conn.writer.transport
+            if transport.is_closing() or transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                self.disconnect(conn)  # 跟不上的客戶端直接斷線
+                continue
+            conn.writer.write(TICK_HEADER.pack(self.tick_count & 0xFFFFFFFF, count, len(payload)))
+            conn.writer.write(payload)
+
+    async def run(self, stats_every=0):
+        # 以固定節拍推進；落後時不追趕，直接從現在重新計時
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.tps if self.tps else 0
+        next_tick = loop.time()
+        last_stats = time.perf_counter()
+        while True:
+            start = time.perf_counter()
+            self.tick()
+            self.tick_time += time.perf_counter() - start
+            self.ticks_since_stats += 1
+            if stats_every and start - last_stats >= stats_every:
+                print("{} sessions on {} connections, AI batch {}, tick {:.2f} ms".format(
+                    self.batch.num_sessions, len(self.connections), self.ai_batch,
+                    self.tick_time / self.ticks_since_stats * 1000))
+                self.tick_time = 0.0
+                self.ticks_since_stats = 0
+                last_stats = start
+            if interval:
+                next_tick += interval
+                delay = next_tick - loop.time()
+                if delay < 0:
+                    next_tick = loop.time()
+                await asyncio.sleep(max(delay, 0))
+            else:
+                await asyncio.sleep(0)
+
+
+async def serve(server, host=DEFAULT_HOST, port=DEFAULT_PORT, stats_every=5):
+    listener = await asyncio.start_server(server.handle_client, host, port)
+    print("Serving on {}:{} at {} ticks/s".format(host, port, server.tps or "unlimited"))
+    async with listener:
+        await server.run(stats_every)
+
+
+# 解析一則節拍訊息的記錄，產生 (對局編號, 旗標, y, 種子, 分數, 管道)
+def iter_records(payload, count):
+    offset = 0
+    for _ in range(count):
+        session, flags, y = RECORD_HEAD.unpack_from(payload, offset)
+        offset += RECORD_HEAD.size
+        seed = score = pipes = None
+        if flags & F_RESET:
+            seed, = SEED.unpack_from(payload, offset)
+            offset += SEED.size
+        if flags & F_SCORE:
+            score, = SCORE.unpack_from(payload, offset)
+            offset += SCORE.size
+        if flags & F_PIPES:
+            n, = PIPE_COUNT.unpack_from(payload, offset)
+            offset += PIPE_COUNT.size
+            pipes = [list(PIPE.unpack_from(payload, offset + i * PIPE.size)) for i in range(n)]
+            offset += n * PIPE.size
+        yield session, flags, y / 2, seed, score, pipes
+
+
+# 客戶端依伺服器送來的差量重建的對局狀態
+class SessionMirror:
+    def __init__(self):
+        self.y = BIRD_START_Y  # 小鳥的縱坐標
+        self.previous_y = BIRD_START_Y  # 上一步的縱坐標（推算速度方向）
+        self.score = 0  # 分數
+        self.pipes = []  # [x, top, bottom]
+        self.over = False  # 遊戲是否結束
+        self.seed = None  # 這一局的種子
+        self.frames = 0  # 推進的步數
+
+    def apply(self, flags, y, seed, score, pipes):
+        if flags & F_RESET:
+            self.__init__()
+            self.seed = seed
+        if flags & F_TICK:
+            self.frames += 1
+            for pipe in self.pipes:
+                pipe[0] -= PIPE_SPEED  # 管道每一步固定左移
+        if pipes is not None:
+            self.pipes = pipes
+        if score is not None:
+            self.score = score
+        if flags & F_OVER:
+            self.over = True
+        self.previous_y = self.y
+        self.y = y
+
+    def wants_jump(self):
+        # 客戶端的簡單操控：瞄準第一個管道的間隙下緣附近，下降時才跳
+        target = self.pipes[0][1] + PIPE_GAP * 0.9 if self.pipes else WINDOW_HEIGHT // 2
+        return self.frames == 0 or (self.y + BIRD_HEIGHT > target and self.y >= self.previous_y)
+
+
+# 比較客戶端的狀態與本地的 GameSimulation，返回不一致的描述
+def compare(mirror, sim):
+    expected_pipes = [[int(x), int(top), int(bottom)] for x, top, bottom in
+                      zip(sim.pipes.x.tolist(), sim.pipes.top.tolist(), sim.pipes.bottom.tolist())]
+    if mirror.y != sim.bird.y or mirror.score != sim.score or mirror.over != sim.game_over or mirror.pipes != expected_pipes:
+        return "frame {}: got y={} score={} over={} pipes={}, expected y={} score={} over={} pipes={}".format(
+            sim.frame, mirror.y, mirror.score, mirror.over, mirror.pipes, sim.bird.y, sim.score, sim.game_over, expected_pipes)
+    return None
+
+
+# 本機客戶端：在一個連線中開啟多個對局並依差量重建狀態。ai 為 False 時由客戶端自己送出跳躍；
+# 指定 verify_policy 時以相同的策略在本地執行 GameSimulation，逐步檢查伺服器的規則與差量編碼
+async def run_client(host=DEFAULT_HOST, port=DEFAULT_PORT, sessions=100, ai=True, seed=0, ticks=600, verify_policy=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    flags = OPEN_AUTO_RESTART | (OPEN_AI if ai else 0)
+    mirrors = [SessionMirror() for _ in range(sessions)]
+    replicas = [GameSimulation("original", seed + i) for i in range(sessions)] if verify_policy else None
+    writer.write(b"".join(COMMAND.pack(OP_OPEN, flags, i, seed + i) for i in range(sessions)))
+    stats = {"ticks": 0, "records": 0, "bytes": 0, "games": 0, "refused": 0, "scores": [], "mismatches": []}
+    while stats["ticks"] < ticks:
+        header = await reader.readexactly(TICK_HEADER.size)
+        _, count, size = TICK_HEADER.unpack(header)
+        payload = await reader.readexactly(size)
+        stats["ticks"] += 1
+        stats["records"] += count
+        stats["bytes"] += len(header) + size
+        for session, record_flags, y, record_seed, score, pipes in iter_records(payload, count):
+            mirror = mirrors[session]
+            if record_flags & F_REFUSED:
+                mirror.over = True  # 伺服器沒有開這個對局
+                stats["refused"] += 1
+                continue  # 之後不會再有這個對局的記錄
+            mirror.apply(record_flags, y, record_seed, score, pipes)
+            if record_flags & F_OVER:
+                stats["games"] += 1
+                stats["scores"].append(mirror.score)
+            if replicas is not None:
+                sim = replicas[session]
+                if record_flags & F_RESET:
+                    sim.reset(record_seed)
+                if record_flags & F_TICK:
+                    action, _ = verify_policy.predict(sim.observation(), deterministic=True)
+                    if action == 1:
+                        sim.jump()
+                    sim.step()
+                problem = compare(mirror, sim)
+                if problem and len(stats["mismatches"]) < 10:
+                    stats["mismatches"].append("session {}: {}".format(session, problem))
+        if not ai:
+            writer.write(b"".join(COMMAND.pack(OP_JUMP, 0, i, 0) for i, mirror in enumerate(mirrors)
+                                  if not mirror.over and mirror.wants_jump()))
+    writer.close()
+    await writer.wait_closed()
+    return stats
+
+
+# 讀取策略；沒有指定時與遊戲相同，優先使用 NumPy 權重
+def load_server_policy(path=None, heuristic=False):
+    if heuristic:
+        from benchmark import HeuristicPolicy
+        return HeuristicPolicy()
+    if path is None:
+        from model_loader import DEFAULT_MODEL_PATH, DEFAULT_POLICY_PATH
+        path = DEFAULT_POLICY_PATH if os.path.exists(DEFAULT_POLICY_PATH) else DEFAULT_MODEL_PATH
+    from ghost_race import load_policy
+    return load_policy(path)
+
+
+def print_client_stats(stats, elapsed):
+    scores = stats["scores"]
+    print("{} ticks in {:.1f} s ({:.0f} ticks/s), {} records, {:.1f} KB ({:.1f} bytes/record), {} games, mean score {:.1f}".format(
+        stats["ticks"], elapsed, stats["ticks"] / elapsed, stats["records"], stats["bytes"] / 1024,
+        stats["bytes"] / max(stats["records"], 1), stats["games"], np.mean(scores) if scores else 0.0))
+    if stats["refused"]:
+        print("{} sessions refused (per-connection limit)".format(stats["refused"]))
+    for problem in stats["mismatches"]:
+        print("Mismatch: " + problem)
+
+
+# 在同一個進程中啟動伺服器與客戶端，用於測試
+async def run_local(policy, sessions, ai, ticks, tps, verify, seed=0, max_sessions_per_connection=MAX_SESSIONS_PER_CONNECTION):
+    server = GameServer(policy, tps, max_sessions_per_connection=max_sessions_per_connection)
+    listener = await asyncio.start_server(server.handle_client, DEFAULT_HOST, 0)
+    port = listener.sockets[0].getsockname()[1]
+    server_task = asyncio.ensure_future(server.run())
+    start = time.perf_counter()
+    try:
+        stats = await run_client(DEFAULT_HOST, port, sessions, ai, seed, ticks, policy if verify and ai else None)
+    finally:
+        while server.connections:
+            await asyncio.sleep(0.01)  # 等伺服器處理完斷線
+        server_task.cancel()
+        listener.close()
+    elapsed = time.perf_counter() - start
+    print_client_stats(stats, elapsed)
+    print("Server tick: {:.2f} ms average for {} sessions".format(server.tick_time / max(server.ticks_since_stats, 1) * 1000, sessions))
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host many headless Flappy Bird sessions on a shared tick")
+    parser.add_argument("command", choices=["serve", "client", "local"])  # serve：伺服器；client：本機客戶端；local：同一進程中測試
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--policy", default=None)  # AI 對局使用的策略（.npz、.table.npz 或 PPO .zip）
+    parser.add_argument("--heuristic", action="store_true")  # 使用腳本策略，不需要模型
+    parser.add_argument("--tps", type=int, default=FPS)  # 每秒節拍數，0 表示不限速
+    parser.add_argument("--stats-every", type=float, default=5)  # 伺服器每隔幾秒輸出統計
+    parser.add_argument("--sessions", type=int, default=100)  # 客戶端開啟的對局數
+    parser.add_argument("--human", action="store_true")  # 客戶端自己送出跳躍，不使用伺服器的策略
+    parser.add_argument("--ticks", type=int, default=600)  # 客戶端接收的節拍數
+    parser.add_argument("--seed", type=int, default=0)  # 第一個對局的種子
+    parser.add_argument("--verify", action="store_true")  # 以本地的 GameSimulation 檢查每一步（AI 對局）
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        asyncio.run(serve(GameServer(load_server_policy(args.policy, args.heuristic), args.tps), args.host, args.port, args.stats_every))
+    elif args.command == "client":
+        policy = load_server_policy(args.policy, args.heuristic) if args.verify and not args.human else None
+        start = time.perf_counter()
+        stats = asyncio.run(run_client(args.host, args.port, args.sessions, not args.human, args.seed, args.ticks, policy))
+        print_client_stats(stats, time.perf_counter() - start)
+    else:
+        policy = load_server_policy(args.policy, args.heuristic)
+        asyncio.run(run_local(policy, args.sessions, not args.human, args.ticks, args.tps, args.verify, args.seed))
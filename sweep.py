@@ -0,0 +1,190 @@
+import argparse  # 用於解析命令列參數
+import itertools  # 用於產生網格搜尋的組合
+import json  # 用於讀取搜尋空間與保存參數
+import math  # 用於對數均勻取樣
+import os  # 用於取得 CPU 核心數與設定執行緒數
+import random  # 用於隨機搜尋
+import sqlite3  # 用於保存試驗結果
+import time  # 用於計時每個試驗
+import zlib  # 用於由參數產生固定的模型檔名
+from concurrent.futures import ProcessPoolExecutor, as_completed  # 用於同時執行多個試驗
+
+DEFAULT_DB_PATH = "sweep_results.db"  # 預設的結果資料庫
+
+# 預設的搜尋空間：列表為候選值；{"low", "high", "log"} 為連續範圍（只用於隨機搜尋），兩端都是整數時取整數（例如 n_steps）
+DEFAULT_SPACE = {
+    "learning_rate": [1e-4, 3e-4, 1e-3],
+    "n_steps": [512, 1024, 2048],
+    "batch_size": [32, 64, 128],
+    "gamma": [0.95, 0.99],
+    "net_arch": [[32, 32], [64, 64], [128, 128]],
+}
+
+
+# 網格搜尋：搜尋空間中所有候選值的組合
+def grid_trials(space):
+    names = sorted(space)
+    for name in names:
+        if not isinstance(space[name], list):
+            raise ValueError("grid search needs a list of values for {}".format(name))
+    for values in itertools.product(*(space[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+# 範圍的兩端是否都是整數，例如 n_steps 與 batch_size 不能取到小數
+def is_integer_range(spec):
+    return all(isinstance(spec[key], int) and not isinstance(spec[key], bool) for key in ("low", "high"))
+
+
+# 隨機搜尋：每個參數獨立取樣，給定種子即可重現
+def random_trials(space, num_trials, seed=0):
+    rng = random.Random(seed)
+    for _ in range(num_trials):
+        params = {}
+        for name in sorted(space):
+            spec = space[name]
+            if isinstance(spec, list):
+                params[name] = rng.choice(spec)
+            elif spec.get("log"):
+                value = 10 ** rng.uniform(math.log10(spec["low"]), math.log10(spec["high"]))
+                params[name] = min(max(int(round(value)), spec["low"]), spec["high"]) if is_integer_range(spec) else value
+            elif is_integer_range(spec):
+                params[name] = rng.randint(spec["low"], spec["high"])
+            else:
+                params[name] = rng.uniform(spec["low"], spec["high"])
+        yield params
+
+
+# 建立結果資料表
+def open_results(db_path):
+    connection = sqlite3.connect(db_path)
+    connection.execute("""CREATE TABLE IF NOT EXISTS trials (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        params TEXT UNIQUE,
+        status TEXT,
+        best_mean_reward REAL,
+        timesteps INTEGER,
+        stopped_early INTEGER,
+        duration REAL,
+        evaluations TEXT,
+        error TEXT)""")
+    return connection
+
+
+# 已經完成的試驗參數，續跑時跳過
+def finished_params(connection):
+    return {row[0] for row in connection.execute("SELECT params FROM trials WHERE status = 'done'")}
+
+
+# 保存一個試驗的結果
+def save_result(connection, result):
+    connection.execute(
+        "INSERT OR REPLACE INTO trials (params, status, best_mean_reward, timesteps, stopped_early, duration, evaluations, error) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (result["params"], result["status"], result.get("best_mean_reward"), result.get("timesteps"),
+         int(result.get("stopped_early", False)), result["duration"], json.dumps(result.get("evaluations", [])), result.get("error")))
+    connection.commit()
+
+
+# 工作進程的初始化：限制每個試驗使用的 CPU 核心數（需在匯入 torch 之前設定）
+def limit_threads(cores_per_trial):
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[name] = str(cores_per_trial)
+    import torch
+    torch.set_num_threads(cores_per_trial)
+
+
+# 在工作進程中執行一個試驗：以給定的超參數訓練 PPO，使用 ai_bird 的評估與早停流程剪除沒有進步的試驗
+def run_trial(params_key, settings):
+    from stable_baselines3 import PPO
+    from ai_bird import make_eval_env, make_training_env, train_with_early_stopping
+
+    params = json.loads(params_key)
+    start = time.perf_counter()
+    result = {"params": params_key}
+    env = make_training_env(settings["n_envs"], "batched", settings["seed"])  # 單一進程的批次環境，工作進程不需再開子進程
+    try:
+        net_arch = params.get("net_arch", [64, 64])
+        kwargs = {name: value for name, value in params.items() if name != "net_arch"}
+        model = PPO("MlpPolicy", env, verbose=0, seed=settings["seed"],
+                    policy_kwargs={"net_arch": dict(pi=list(net_arch), vf=list(net_arch))}, **kwargs)
+        best_model_path = None
+        if settings["save_dir"]:
+            os.makedirs(settings["save_dir"], exist_ok=True)
+            best_model_path = os.path.join(settings["save_dir"], "trial_{:08x}.zip".format(zlib.crc32(params_key.encode())))
+        eval_env = make_eval_env(min(settings["eval_episodes"], 10))  # 所有試驗使用相同種子的評估環境，結果可以互相比較
+        outcome = train_with_early_stopping(model, eval_env, settings["timesteps"],
+                                            settings["eval_interval"], settings["eval_episodes"], settings["patience"],
+                                            best_model_path=best_model_path, verbose=False)
+        result.update(outcome, status="done")
+    except Exception as exc:
+        result.update(status="failed", error=repr(exc))  # 例如 batch_size 與 n_steps 不相容
+    finally:
+        env.close()
+    result["duration"] = time.perf_counter() - start
+    return result
+
+
+# 執行超參數搜尋：試驗在進程池中同時進行，每個試驗使用 cores_per_trial 個核心，結果寫入 SQLite
+def run_sweep(trials, db_path=DEFAULT_DB_PATH, cores_per_trial=1, workers=None, timesteps=200000,
+              eval_interval=20000, eval_episodes=10, patience=3, n_envs=8, seed=0, save_dir=None):
+    connection = open_results(db_path)
+    done = finished_params(connection)
+    keys = []
+    for params in trials:
+        key = json.dumps(params, sort_keys=True)
+        if key not in done and key not in keys:  # 跳過已完成與重複的組合
+            keys.append(key)
+    workers = workers or max(1, (os.cpu_count() or 1) // cores_per_trial)
+    settings = {"timesteps": timesteps, "eval_interval": eval_interval, "eval_episodes": eval_episodes,
+                "patience": patience, "n_envs": n_envs, "seed": seed, "save_dir": save_dir}
+    print("Running {} trials ({} already done) on {} workers x {} cores".format(len(keys), len(done), workers, cores_per_trial))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=limit_threads, initargs=(cores_per_trial,)) as pool:
+        futures = [pool.submit(run_trial, key, settings) for key in keys]
+        for count, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            save_result(connection, result)
+            if result["status"] == "done":
+                print("[{}/{}] {} -> best {:.1f} after {} steps{} ({:.0f} s)".format(
+                    count, len(keys), result["params"], result["best_mean_reward"], result["timesteps"],
+                    ", pruned" if result["stopped_early"] else "", result["duration"]))
+            else:
+                print("[{}/{}] {} failed: {}".format(count, len(keys), result["params"], result["error"]))
+    return connection
+
+
+# 列出最好的幾個試驗
+def print_leaderboard(connection, limit=10):
+    rows = connection.execute("SELECT best_mean_reward, timesteps, stopped_early, params FROM trials "
+                              "WHERE status = 'done' ORDER BY best_mean_reward DESC LIMIT ?", (limit,)).fetchall()
+    print("{:>12}{:>12}{:>8}  params".format("best reward", "timesteps", "pruned"))
+    for best, timesteps, pruned, params in rows:
+        print("{:>12.1f}{:>12}{:>8}  {}".format(best, timesteps, "yes" if pruned else "no", params))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel PPO hyperparameter sweep")
+    parser.add_argument("--space", default=None)  # 搜尋空間的 JSON 文件，預設使用 DEFAULT_SPACE
+    parser.add_argument("--search", choices=["grid", "random"], default="random")  # 搜尋方式
+    parser.add_argument("--trials", type=int, default=20)  # 隨機搜尋的試驗數
+    parser.add_argument("--cores-per-trial", type=int, default=1)  # 每個試驗使用的核心數
+    parser.add_argument("--workers", type=int, default=None)  # 同時進行的試驗數，預設為 核心數 / 每個試驗的核心數
+    parser.add_argument("--timesteps", type=int, default=200000)  # 每個試驗的最大訓練步數
+    parser.add_argument("--eval-interval", type=int, default=20000)  # 評估間隔
+    parser.add_argument("--eval-episodes", type=int, default=10)  # 每次評估的回合數
+    parser.add_argument("--patience", type=int, default=3)  # 連續幾次沒有進步就剪除試驗
+    parser.add_argument("--n-envs", type=int, default=8)  # 每個試驗的批次環境數量
+    parser.add_argument("--seed", type=int, default=0)  # 亂數種子
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)  # 結果資料庫
+    parser.add_argument("--save-dir", default=None)  # 保存每個試驗最佳模型的目錄
+    args = parser.parse_args()
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    trials = grid_trials(space) if args.search == "grid" else random_trials(space, args.trials, args.seed)
+    connection = run_sweep(trials, args.db, args.cores_per_trial, args.workers, args.timesteps, args.eval_interval,
+                           args.eval_episodes, args.patience, args.n_envs, args.seed, args.save_dir)
+    print_leaderboard(connection)
@@ -0,0 +1,4 @@
+import os  # 用於取得專案根目錄
+import sys  # 用於讓測試可以匯入專案根目錄的模組
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
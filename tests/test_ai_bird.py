@@ -0,0 +1,48 @@
+import os  # 用於檢查暫存的模型文件
+import numpy as np  # 用於比較獎勵
+import pytest  # 測試框架
+
+stable_baselines3 = pytest.importorskip("stable_baselines3")
+ai_bird = pytest.importorskip("ai_bird")
+
+
+def make_model():
+    env = ai_bird.make_training_env(n_envs=2, vec_env="dummy", seed=0)
+    return stable_baselines3.PPO("MlpPolicy", env, n_steps=64, batch_size=32, n_epochs=1, seed=0, device="cpu")
+
+
+def train(model, tmp_path, total_timesteps, resume_state=None):
+    return ai_bird.train_with_early_stopping(
+        model, ai_bird.make_eval_env(2), total_timesteps, eval_interval=128, num_eval_episodes=2,
+        early_stopping_patience=10, best_model_path=str(tmp_path / "best.zip"), verbose=False,
+        state_path=str(tmp_path / ai_bird.EARLY_STOPPING_STATE_NAME), resume_state=resume_state)
+
+
+def test_resume_keeps_best_reward_and_patience(tmp_path):
+    state_path = str(tmp_path / ai_bird.EARLY_STOPPING_STATE_NAME)
+    outcome = train(make_model(), tmp_path, 256)
+    saved = ai_bird.load_early_stopping_state(state_path)
+    assert saved["best_mean_reward"] == outcome["best_mean_reward"]
+    assert saved["timesteps"] == 256
+
+    # 續跑時之前的最佳平均獎勵更高：較差的模型不能覆蓋最佳模型，早停計數要接續
+    (tmp_path / "best.zip").unlink()
+    resume_state = dict(saved, best_mean_reward=np.inf, no_improvement_steps=2)
+    train(make_model(), tmp_path, 128, resume_state)
+    assert not (tmp_path / "best.zip").exists()
+    resumed = ai_bird.load_early_stopping_state(state_path)
+    assert resumed["best_mean_reward"] == np.inf
+    assert resumed["no_improvement_steps"] == 3
+
+
+def test_closing_evaluator_removes_unpromoted_snapshots(tmp_path):
+    model = make_model()
+    evaluator = ai_bird.BackgroundEvaluator(num_episodes=2)
+    paths = [str(tmp_path / "best.{}.pending.zip".format(i)) for i in range(2)]
+    try:
+        for path in paths:
+            evaluator.submit(model, path)
+        assert all(os.path.exists(path) for path in paths)
+    finally:
+        evaluator.close()  # 模擬訓練中斷：結果還沒經過 results()
+    assert not any(os.path.exists(path) for path in paths)
@@ -0,0 +1,39 @@
+import numpy as np  # 用於比較動作
+import pytest  # 測試框架
+
+from numpy_policy import NumpyPolicy, policy_arrays, sample_observations
+
+stable_baselines3 = pytest.importorskip("stable_baselines3")
+ai_bird = pytest.importorskip("ai_bird")
+
+
+# 訓練一個很小的 PPO 模型，只需要讓權重不是初始值
+def make_model(**policy_kwargs):
+    model = stable_baselines3.PPO("MlpPolicy", ai_bird.FlappyBirdEnv(), n_steps=64, batch_size=32, n_epochs=1,
+                                  seed=0, device="cpu", policy_kwargs=policy_kwargs or None)
+    model.learn(total_timesteps=128)
+    return model
+
+
+def test_exported_policy_matches_ppo_predict(tmp_path):
+    model = make_model(net_arch=dict(pi=[32, 32], vf=[32, 32]))
+    path = str(tmp_path / "policy.npz")
+    np.savez(path, **policy_arrays(model))
+    policy = NumpyPolicy(path)
+
+    obs = sample_observations(5000)
+    expected, _ = model.predict(obs, deterministic=True)
+    actual, _ = policy.predict(obs, deterministic=True)
+    np.testing.assert_array_equal(actual, expected)
+
+    single, _ = policy.predict(obs[0].tolist(), deterministic=True)  # 遊戲傳入的單一觀察值
+    assert single == expected[0]
+
+
+def test_shared_layers_are_rejected():
+    # stable-baselines3 1.8 起不能再建立共用層，直接加上 1.x 舊模型的 shared_net
+    torch = pytest.importorskip("torch")
+    model = make_model()
+    model.policy.mlp_extractor.shared_net = torch.nn.Sequential(torch.nn.Linear(5, 5), torch.nn.Tanh())
+    with pytest.raises(ValueError):
+        policy_arrays(model)
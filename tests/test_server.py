@@ -0,0 +1,27 @@
+import asyncio  # 用於執行本機伺服器與客戶端
+
+import numpy as np  # 用於建立記錄
+
+from benchmark import HeuristicPolicy
+from server import RECORD_DTYPE, F_TICK, iter_records, run_local
+
+
+def test_server_matches_game_simulation():
+    stats = asyncio.run(run_local(HeuristicPolicy(), 50, True, 1500, 0, True))
+    assert stats["mismatches"] == []
+    assert stats["games"] > 0
+
+
+def test_record_keeps_y_far_above_screen():
+    # 經典模式沒有天花板：-20000 像素以半像素計已超出 i16 的範圍
+    records = np.zeros(2, dtype=RECORD_DTYPE)
+    records["session"] = [0, 1]
+    records["flags"] = F_TICK
+    records["y"] = np.round(np.array([-20000.5, 470.0]) * 2)
+    assert [record[2] for record in iter_records(records.tobytes(), 2)] == [-20000.5, 470.0]
+
+
+def test_sessions_beyond_limit_are_refused():
+    stats = asyncio.run(run_local(HeuristicPolicy(), 10, True, 50, 0, True, max_sessions_per_connection=4))
+    assert stats["refused"] == 6
+    assert stats["mismatches"] == []
@@ -0,0 +1,13 @@
+from sweep import random_trials
+
+
+def test_integer_ranges_sample_integers():
+    space = {
+        "n_steps": {"low": 256, "high": 4096, "log": True},
+        "batch_size": {"low": 32, "high": 256},
+        "learning_rate": {"low": 1e-5, "high": 1e-3, "log": True},
+    }
+    for params in random_trials(space, 50):
+        assert isinstance(params["n_steps"], int) and 256 <= params["n_steps"] <= 4096
+        assert isinstance(params["batch_size"], int) and 32 <= params["batch_size"] <= 256
+        assert isinstance(params["learning_rate"], float)
@@ -0,0 +1,24 @@
+import json  # 用於修改索引
+
+from trajectory import TrajectoryWriter, TrajectoryDataset, INDEX_NAME
+
+
+def write_episode(directory, first, frames=3):
+    writer = TrajectoryWriter(str(directory), chunk_size=4)
+    for i in range(frames):
+        writer.append([first + i] * 5, 0, 1.0, i == frames - 1)
+    writer.close()
+
+
+def test_dataset_skips_empty_chunks(tmp_path):
+    write_episode(tmp_path, 0)
+    # 模擬開啟區塊後還沒寫入就中斷的記錄：索引中留下一個沒有幀的區塊
+    path = tmp_path / INDEX_NAME
+    index = json.loads(path.read_text())
+    index["chunks"].append({"name": "chunk_00001", "length": 0})
+    path.write_text(json.dumps(index))
+    write_episode(tmp_path, 10)
+
+    dataset = TrajectoryDataset(str(tmp_path))
+    assert len(dataset) == 6
+    assert [chunk["obs"][:, 0].tolist() for chunk in dataset.iter_chunks()] == [[0, 1, 2], [10, 11, 12]]
@@ -0,0 +1,203 @@
+import argparse  # 用於解析命令列參數
+import json  # 用於讀寫索引文件
+import os  # 用於處理數據目錄
+import numpy as np  # 用於記憶體映射的數組文件
+from env_core import STEP_REWARD, CRASH_REWARD  # 與 FlappyBirdEnv 相同的獎勵，遊戲記錄時使用
+
+INDEX_NAME = "index.json"  # 索引文件名稱
+INDEX_VERSION = 1  # 索引格式版本
+DEFAULT_CHUNK_SIZE = 65536  # 每個區塊預先配置的幀數
+
+# 每幀記錄的欄位：名稱 -> (dtype, 每幀的形狀)，觀察值與 AI 使用的 5 維狀態相同
+FIELDS = {
+    "obs": ("float32", (5,)),  # 做出動作前的觀察值
+    "action": ("int8", ()),  # 1 表示跳躍
+    "reward": ("float32", ()),  # 與 FlappyBirdEnv 相同的獎勵
+    "done": ("bool", ()),  # 這一幀之後一局是否結束
+    "ai": ("bool", ()),  # 這一幀是否由 AI 控制
+}
+
+
+# 區塊中每個欄位的文件路徑
+def chunk_path(directory, chunk_name, field):
+    return os.path.join(directory, "{}_{}.npy".format(chunk_name, field))
+
+
+# 定義軌跡記錄器：把 (觀察值, 動作, 獎勵, 結束) 寫入預先配置的記憶體映射區塊，每幀只是幾次數組賦值
+class TrajectoryWriter:
+    def __init__(self, directory, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.directory = directory  # 數據目錄
+        self.chunk_size = chunk_size  # 每個區塊的幀數
+        os.makedirs(directory, exist_ok=True)
+        index_path = os.path.join(directory, INDEX_NAME)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                self.index = json.load(f)  # 接在已有的數據後面繼續記錄
+        else:
+            self.index = {"version": INDEX_VERSION, "chunk_size": chunk_size,
+                          "fields": {name: [dtype, list(shape)] for name, (dtype, shape) in FIELDS.items()},
+                          "chunks": [], "episodes": []}
+        self.total = sum(chunk["length"] for chunk in self.index["chunks"])  # 已記錄的總幀數
+        self.arrays = None  # 目前區塊的記憶體映射數組
+        self.position = 0  # 目前區塊已寫入的幀數
+        self.episode = None  # 目前這一局的信息
+
+    def _open_chunk(self):
+        # 預先配置一個新的區塊（每個欄位一個 .npy 文件）
+        name = "chunk_{:05d}".format(len(self.index["chunks"]))
+        self.arrays = {}
+        for field, (dtype, shape) in FIELDS.items():
+            self.arrays[field] = np.lib.format.open_memmap(chunk_path(self.directory, name, field), mode="w+",
+                                                           dtype=dtype, shape=(self.chunk_size,) + shape)
+        self.index["chunks"].append({"name": name, "length": 0})
+        self.position = 0
+
+    def _close_chunk(self):
+        for array in self.arrays.values():
+            array.flush()  # 將寫入的數據落盤
+        self.arrays = None
+        self._write_index()
+
+    def _write_index(self):
+        # 先寫暫存文件再取代，中途當機也不會留下損壞的索引
+        path = os.path.join(self.directory, INDEX_NAME)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.index, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def start_episode(self, **info):
+        # 開始新的一局，info（例如模式與種子）會寫入索引
+        self.episode = dict(info, start=self.total, length=0)
+
+    def append(self, obs, action, reward, done, ai=False):
+        if self.arrays is None:
+            self._open_chunk()
+        if self.episode is None:
+            self.start_episode()
+        arrays = self.arrays
+        position = self.position
+        arrays["obs"][position] = obs
+        arrays["action"][position] = action
+        arrays["reward"][position] = reward
+        arrays["done"][position] = done
+        arrays["ai"][position] = ai
+        self.position = position + 1
+        self.total += 1
+        self.episode["length"] += 1
+        self.index["chunks"][-1]["length"] = self.position
+        if done:
+            self._end_episode()
+        if self.position == self.chunk_size:
+            self._close_chunk()  # 區塊已滿，下一幀寫入新的區塊
+
+    def _end_episode(self):
+        self.index["episodes"].append(self.episode)
+        self.episode = None
+        self._write_index()
+
+    def close(self):
+        # 結束記錄；未結束的這一局以截斷的方式保存
+        if self.episode is not None and self.episode["length"]:
+            self.episode["truncated"] = True
+            self._end_episode()
+        if self.arrays is not None:
+            self._close_chunk()
+
+
+# 定義軌跡數據集：以唯讀記憶體映射開啟所有區塊，數據不需要載入記憶體，取出的切片都不複製
+class TrajectoryDataset:
+    def __init__(self, directory):
+        self.directory = directory  # 數據目錄
+        with open(os.path.join(directory, INDEX_NAME)) as f:
+            self.index = json.load(f)
+        self.episodes = self.index["episodes"]  # 每一局的起點、長度與信息
+        self.chunk_info = [chunk for chunk in self.index["chunks"] if chunk["length"]]  # 有數據的區塊（略過空的區塊）
+        self.lengths = [chunk["length"] for chunk in self.chunk_info]  # 每個區塊的幀數
+        self.offsets = np.cumsum([0] + self.lengths)  # 每個區塊在整個數據集中的起點
+        self._chunks = [None] * len(self.lengths)  # 延遲開啟的區塊
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def chunk(self, i):
+        # 返回第 i 個區塊的欄位視圖（記憶體映射，不複製）
+        if self._chunks[i] is None:
+            name = self.chunk_info[i]["name"]
+            self._chunks[i] = {field: np.load(chunk_path(self.directory, name, field), mmap_mode="r")[:self.lengths[i]]
+                               for field in FIELDS}
+        return self._chunks[i]
+
+    def iter_chunks(self):
+        for i in range(len(self.lengths)):
+            yield self.chunk(i)
+
+    def iter_batches(self, batch_size=4096, fields=tuple(FIELDS)):
+        # 依序產生批次；批次不跨越區塊，因此每個批次都是記憶體映射的切片
+        for chunk in self.iter_chunks():
+            for start in range(0, len(chunk["obs"]), batch_size):
+                yield {field: chunk[field][start:start + batch_size] for field in fields}
+
+    def sample(self, batch_size, rng=None, fields=tuple(FIELDS)):
+        # 隨機取樣一批（行為克隆的小批次），只複製被選中的幀
+        rng = rng or np.random.default_rng()
+        indices = np.sort(rng.integers(0, len(self), batch_size))
+        chunk_ids = np.searchsorted(self.offsets, indices, side="right") - 1
+        batch = {field: np.empty((batch_size,) + tuple(FIELDS[field][1]), dtype=FIELDS[field][0]) for field in fields}
+        for i in np.unique(chunk_ids):
+            rows = chunk_ids == i
+            local = indices[rows] - self.offsets[i]
+            chunk = self.chunk(i)
+            for field in fields:
+                batch[field][rows] = chunk[field][local]
+        return batch
+
+
+# 離線評估策略：逐批比較策略的動作與記錄中的動作，ai 為 False 時只比較人類操作的幀
+def action_agreement(dataset, policy, ai=None, batch_size=4096):
+    matched = 0
+    total = 0
+    for batch in dataset.iter_batches(batch_size, ("obs", "action", "ai")):
+        actions, _ = policy.predict(batch["obs"], deterministic=True)
+        agree = np.asarray(actions).reshape(-1) == batch["action"]
+        if ai is not None:
+            agree = agree[batch["ai"] == ai]
+        matched += int(np.count_nonzero(agree))
+        total += len(agree)
+    return matched / total if total else float("nan")
+
+
+# 統計數據集的內容：幀數、局數、人類與 AI 的幀數與每局的總獎勵
+def summarize(dataset):
+    ai_frames = sum(int(np.count_nonzero(chunk["ai"])) for chunk in dataset.iter_chunks())
+    returns = []
+    for episode in dataset.episodes:
+        start, length = episode["start"], episode["length"]
+        total = 0.0
+        while length:  # 一局可能跨越兩個區塊
+            i = int(np.searchsorted(dataset.offsets, start, side="right") - 1)
+            local = start - int(dataset.offsets[i])
+            rewards = dataset.chunk(i)["reward"][local:local + length]
+            total += float(rewards.sum())
+            start += len(rewards)
+            length -= len(rewards)
+        returns.append(total)
+    return {"frames": len(dataset), "episodes": len(dataset.episodes), "ai_frames": ai_frames,
+            "human_frames": len(dataset) - ai_frames, "mean_return": float(np.mean(returns)) if returns else float("nan")}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect recorded trajectories or evaluate a policy on them")
+    parser.add_argument("command", choices=["info", "eval"])  # info：統計數據；eval：比較策略與記錄的動作
+    parser.add_argument("directory")  # 數據目錄
+    parser.add_argument("--policy", default=None)  # 要評估的策略（.npz 或 PPO .zip）
+    args = parser.parse_args()
+
+    dataset = TrajectoryDataset(args.directory)
+    if args.command == "info":
+        for key, value in summarize(dataset).items():
+            print("{}: {}".format(key, value))
+    else:
+        from ghost_race import load_policy
+        policy = load_policy(args.policy)
+        print("Action agreement: all {:.2%}, human {:.2%}, AI {:.2%}".format(
+            action_agreement(dataset, policy), action_agreement(dataset, policy, ai=False), action_agreement(dataset, policy, ai=True)))